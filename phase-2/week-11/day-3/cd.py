@@ -6,13 +6,14 @@ Professional autonomous system combining:
 """
 import time
 import threading
-from queue import Queue
 from pathlib import Path
 import signal
 import sys
 
 from rover_controller import Rover
 from oakd_depth_navigator import OakDDepthCamera, DepthNavigator
+from frame_ring import FrameRing
+from lazy_frame import LazyFrame
 from llava_cpp_navigator import LLaVACppNavigator
 
 
@@ -31,8 +32,11 @@ class DepthLLaVARover:
         self.llava_interval = llava_interval
         self.safe_distance_mm = safe_distance_mm
         
-        # Frame queue - "общий стол" для кадров
-        self.frame_queue = Queue(maxsize=2)
+        # Frame ring - "общий стол" для кадров. Every consumer has its own cursor,
+        # so LLaVA no longer takes frames away from the depth loop (and back)
+        self.frames = FrameRing(slots=4)
+        self.nav_frames = self.frames.subscribe('depth_nav', policy='every')
+        self.llava_frames = self.frames.subscribe('llava', policy='latest')
         
         self.llava_guidance = None
         self.guidance_lock = threading.Lock()  # Замок для защиты llava_guidance
@@ -72,12 +76,8 @@ class DepthLLaVARover:
         """'Поставщик' - единственный поток, который захватывает кадры."""
         while self.running:
             try:
-                rgb, depth = self.camera.capture_frames()
-                
-                # Положить свежие кадры в очередь
-                if self.frame_queue.full():
-                    self.frame_queue.get()  # Удалить старый кадр
-                self.frame_queue.put((rgb, depth))
+                # Положить свежие кадры в кольцо
+                self.camera.capture_into(self.frames)
                 
                 time.sleep(0.03)  # ~30 FPS
                 
@@ -97,11 +97,15 @@ class DepthLLaVARover:
         
         while self.running:
             try:
-                if not self.frame_queue.empty():
-                    rgb, _ = self.frame_queue.get()
-                    
+                with self.llava_frames.read(timeout=0) as frame:
+                    image = None
+                    if frame is not None:
+                        # Encode while pinned, generate after releasing the slot
+                        image = self.llava_nav.encode(LazyFrame.from_ring(frame))
+                
+                if image is not None:
                     print(f"[AI] Analyzing scene with LLaVA...")
-                    guidance = self.llava_nav.get_navigation_command(rgb)
+                    guidance = self.llava_nav.get_navigation_command(image)
                     
                     with self.guidance_lock:
                         self.llava_guidance = guidance
@@ -121,9 +125,10 @@ class DepthLLaVARover:
         
         while self.running:
             try:
-                rgb, depth = self.frame_queue.get()
-                
-                depth_cmd = self.depth_nav.get_navigation_command(rgb, depth)
+                with self.nav_frames.read(timeout=1.0) as frame:
+                    if frame is None:
+                        continue
+                    depth_cmd = self.depth_nav.get_navigation_command(None, frame['depth'])
                 
                 local_llava_guidance = None
                 with self.guidance_lock:
@@ -263,6 +268,7 @@ class DepthLLaVARover:
     
     def stop(self):
         self.running = False
+        self.frames.close()
         time.sleep(0.3)
         
         if self.rover:
@@ -284,6 +290,9 @@ class DepthLLaVARover:
         if self.llava_nav:
             self.llava_nav.cleanup()
         
+        for name, sub in self.frames.stats()['subscribers'].items():
+            print(f"[Frames] {name}: {sub['received']} read, {sub['dropped']} missed")
+        
         print("\n[System] Shutdown complete")
 
 
@@ -6,22 +6,45 @@ Professional autonomous system combining:
 """
 import time
 import threading
-from queue import Queue
 from pathlib import Path
 import signal
 import sys
 
 from rover_controller import Rover
 from oakd_depth_navigator import OakDDepthCamera, DepthNavigator
+from camera_daemon import DaemonCamera, DEFAULT_SOCKET
+from local_costmap import LocalCostmap
+from ground_plane import GroundPlane
+from frame_ring import FrameRing
+from capture_pacing import CapturePacer
+from latency_trace import LatencyTracer
+from lazy_frame import LazyFrame
+from scene_cache import SceneCache
+from scene_change import SceneChangeTrigger
+from telemetry import get_telemetry
 from llava_cpp_navigator import LLaVACppNavigator
 
 
+# Corridor directly in front of the rover (top, bottom, left, right as 0-1)
+FRONT_ROI = (0.35, 0.65, 0.35, 0.65)
+# Emergency stop if this share of valid front pixels is closer than blocked distance
+FRONT_NEAR_LIMIT = 0.30
+
+# Rover geometry for the local costmap (L/R sent to the base are wheel speeds in m/s)
+ROVER_WIDTH_M = 0.30
+TRACK_WIDTH_M = 0.20
+
+
 class DepthLLaVARover:
     """
     Professional autonomous navigation system.
     """
     
-    def __init__(self, port='/dev/ttyACM0', llava_interval=15.0, safe_distance_mm=800):
+    def __init__(self, port='/dev/ttyACM0', llava_interval=15.0, safe_distance_mm=800, n_sectors=None,
+                 clearance_maps=False, temporal_window=None, median_filter=None,
+                 coarse_factor=None, costmap=False, steady_state=False, telemetry_file=None,
+                 ground_plane=None, sync_frames=False, fps=30.0, camera_daemon=None,
+                 scene_cache=False, scene_trigger=None, llava_min_interval=2.0, structured_llava=False):
         self.rover = None
         self.camera = None
         self.depth_nav = None
@@ -30,20 +53,74 @@ class DepthLLaVARover:
         self.port = port
         self.llava_interval = llava_interval
         self.safe_distance_mm = safe_distance_mm
+        self.n_sectors = n_sectors  # None = classic 5 regions
+        self.clearance_maps = clearance_maps  # O(1) front-corridor emergency check
+        self.temporal_window = temporal_window  # host-side depth fusion over K frames
+        # Host fusion replaces the on-device median filter unless told otherwise
+        if median_filter is None and temporal_window:
+            median_filter = 'off'
+        self.median_filter = median_filter
+        self.coarse_factor = coarse_factor  # coarse-to-fine depth decisions
+        self.steady_state = steady_state  # allocation-free 5-zone navigator
+        # Floor calibration JSON (python ground_plane.py calib.json) -> full-frame analysis
+        self.ground_plane = GroundPlane.load(ground_plane) if ground_plane else None
+        self.sync_frames = sync_frames  # timestamp-matched RGB/depth pairs only
+        self.fps = fps  # device sensor rate
+        self.camera_daemon = camera_daemon  # socket of a running camera_daemon.py (warm device)
+        self.scene_cache = scene_cache  # reuse LLaVA answers for scenes that did not change
+        self.structured_llava = structured_llava  # grammar-constrained JSON commands from LLaVA
+        # Query LLaVA when the scene changed (score >= scene_trigger) instead of every
+        # llava_interval, which then only bounds the time between queries
+        self.scene_trigger = SceneChangeTrigger(threshold=scene_trigger, min_interval=llava_min_interval,
+                                                max_interval=llava_interval) if scene_trigger else None
+        # Robot-centred occupancy memory, remembers obstacles that left the view
+        self.costmap = LocalCostmap() if costmap else None
         
-        # Frame queue - "общий стол" для кадров
-        self.frame_queue = Queue(maxsize=2)
+        # Frame ring - "общий стол" для кадров: the capture thread fills preallocated
+        # slots in place, readers pin the newest one (newest + LLaVA + depth + writer).
+        # Each consumer has its own cursor, so nobody takes frames from the other:
+        # depth and LLaVA both get the newest frame when they are free (depth
+        # counts the frames it missed as drops)
+        self.frames = FrameRing(slots=4)
+        self.nav_frames = self.frames.subscribe('depth_nav', policy='latest')
+        self.llava_frames = self.frames.subscribe('llava', policy='latest')
+        # Capture as fast as the device delivers and publish every frame, so a
+        # busy depth loop finds the newest one, not one that waited in the ring
+        self.pacer = CapturePacer(self.frames, required=[self.nav_frames], device_fps=fps)
+        # Per-frame trace from device capture to motor command (histograms at stop())
+        self.tracer = LatencyTracer()
         
         self.llava_guidance = None
         self.guidance_lock = threading.Lock()  # Замок для защиты llava_guidance
         
+        # Hot loops record here instead of printing; a background thread echoes
+        # state changes to the console and optionally appends to telemetry_file
+        self.telemetry = get_telemetry()
+        self.telemetry_file = telemetry_file
+        tm = self.telemetry
+        self._ev_action = tm.register('nav.action', "[Nav] {action} - {note}", echo_interval=0)
+        self._ev_drive = tm.register('nav.drive')  # every executed command, history only
+        self._ev_emergency = tm.register(
+            'nav.emergency_stop', "[Nav] 🚨 EMERGENCY STOP - {label} ({value:.0%})", echo_interval=0.5)
+        self._ev_nav_error = tm.register('nav.error', "[Nav] Error: {note}", echo_interval=1.0)
+        self._ev_frame = tm.register('capture.frame')
+        self._ev_capture_error = tm.register('capture.error', "[Capture] Error: {note}", echo_interval=1.0)
+        
         signal.signal(signal.SIGINT, self._signal_handler)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self._dump_handler)
         
     def _signal_handler(self, signum, frame):
         print("\n[System] Stopping...")
         self.stop()
         sys.exit(0)
     
+    def _dump_handler(self, signum, frame):
+        """kill -USR1 <pid> writes the in-memory telemetry history to a file."""
+        path = f"telemetry_{int(time.time())}.txt"
+        self.telemetry.dump(path)
+        print(f"[System] Telemetry dumped to {path}")
+    
     def initialize(self):
         print("=" * 70)
         print("PROFESSIONAL AUTONOMOUS NAVIGATION SYSTEM")
@@ -53,14 +130,25 @@ class DepthLLaVARover:
         print("\n[1/4] Connecting to rover...")
         self.rover = Rover(port=self.port)
         
-        print("\n[2/4] Starting Oak-D stereo camera...")
-        self.camera = OakDDepthCamera(resolution=(640, 480))
+        if self.camera_daemon:
+            # The daemon already runs the pipeline: no device boot, and other scripts can share it
+            print("\n[2/4] Attaching to the Oak-D camera daemon...")
+            self.camera = DaemonCamera(self.camera_daemon, name='depth_llava_nav')
+        else:
+            print("\n[2/4] Starting Oak-D stereo camera...")
+            self.camera = OakDDepthCamera(resolution=(640, 480), median_filter=self.median_filter,
+                                          sync_frames=self.sync_frames, fps=self.fps)
         self.camera.start()
         
         print("\n[3/4] Initializing 3D depth navigator...")
         # Use safe_distance from args if provided  
         safe_dist = getattr(self, 'safe_distance_mm', 500)  # 500mm for indoor spaces
-        self.depth_nav = DepthNavigator(safe_distance_mm=safe_dist)
+        self.depth_nav = DepthNavigator(safe_distance_mm=safe_dist, n_sectors=self.n_sectors,
+                                        build_clearance_maps=self.clearance_maps,
+                                        temporal_window=self.temporal_window,
+                                        coarse_factor=self.coarse_factor,
+                                        preallocate=self.steady_state,
+                                        ground_plane=self.ground_plane)
         
         print("\n[4/4] LLaVA AI will load in background...")
         self.llava_nav = None  # Will be loaded by LLaVA thread
@@ -73,17 +161,13 @@ class DepthLLaVARover:
         """'Поставщик' - единственный поток, который захватывает кадры."""
         while self.running:
             try:
-                rgb, depth = self.camera.capture_frames()
-                
-                # Положить свежие кадры в очередь
-                if self.frame_queue.full():
-                    self.frame_queue.get()  # Удалить старый кадр
-                self.frame_queue.put((rgb, depth))
-                
-                time.sleep(0.03)  # ~30 FPS
+                # Положить свежие кадры прямо в кольцо (no new arrays per frame).
+                # Blocks until the device has a frame - no extra sleep
+                if self.pacer.capture(self.camera) is not None:
+                    self.telemetry.increment(self._ev_frame)
                 
             except Exception as e:
-                print(f"[Capture] Error: {e}")
+                self.telemetry.record(self._ev_capture_error, label=type(e).__name__, note=str(e))
                 time.sleep(0.5)
     
     def _llava_thread(self):
@@ -91,28 +175,51 @@ class DepthLLaVARover:
         # Load LLaVA in this thread so it doesn't block startup
         print("[AI] Loading LLaVA in background...")
         try:
-            self.llava_nav = LLaVACppNavigator(n_gpu_layers=99)
+            self.llava_nav = LLaVACppNavigator(n_gpu_layers=99,
+                                               scene_cache=SceneCache() if self.scene_cache else None,
+                                               structured=self.structured_llava)
             print("[AI] LLaVA loaded and ready!")
         except Exception as e:
             print(f"[AI] Failed to load LLaVA: {e}")
             return
         
+        trigger = self.scene_trigger
         while self.running:
             try:
-                # Взять кадр из очереди
-                if not self.frame_queue.empty():
-                    rgb, _ = self.frame_queue.get()
-                    
-                    print(f"[AI] Analyzing scene with LLaVA...")
-                    guidance = self.llava_nav.get_navigation_command(rgb)
+                # Взять последний кадр (без ожидания) - the depth thread has its own cursor
+                with self.llava_frames.read(timeout=0) as frame:
+                    image = None
+                    if frame is not None:
+                        lazy = LazyFrame.from_ring(frame)
+                        if trigger is None or trigger.update(lazy):
+                            # CLIP-encode while the slot is pinned; generation then runs
+                            # on the embedding and the slot is free again
+                            image = self.llava_nav.encode(lazy)
+                
+                if image is not None:
+                    if trigger is not None:
+                        print(f"[AI] Analyzing scene with LLaVA ({trigger.last_reason}, "
+                              f"change {trigger.last_score:.2f})...")
+                    else:
+                        print(f"[AI] Analyzing scene with LLaVA...")
+                    guidance = self.llava_nav.get_navigation_command(image)
                     
                     # Безопасная запись с использованием lock
                     with self.guidance_lock:
                         self.llava_guidance = guidance
                     
-                    print(f"[AI] Recommendation: {guidance['action']} - {guidance['reasoning'][:50]}")
+                    timing = self.llava_nav.last_timing
+                    if timing.get('cached'):
+                        detail = ' (cached scene)'
+                    elif 'tokens' in timing:
+                        detail = (f" ({timing['tokens']} tokens, prefill {timing['prefill_ms']:.0f}ms + "
+                                  f"decode {timing['decode_ms']:.0f}ms)")
+                    else:
+                        detail = ''
+                    print(f"[AI] Recommendation{detail}: {guidance['action']} - {guidance['reasoning'][:50]}")
                 
-                time.sleep(self.llava_interval)
+                # With the trigger, look at the newest frame often (a score is ~2ms)
+                time.sleep(trigger.poll_interval if trigger is not None else self.llava_interval)
                 
             except Exception as e:
                 print(f"[AI] Error: {e}")
@@ -122,14 +229,35 @@ class DepthLLaVARover:
         """Real-time 3D depth-based navigation with intelligent evasion."""
         last_action = None
         last_clearance = 1.0  # Track clearance for emergency detection
+        wheels = (0.0, 0.0)  # Last (L, R) sent, for costmap dead reckoning
+        wheels_time = time.time()
         
         while self.running:
             try:
-                # ПРОСТО ПОЛУЧАЕМ КАДР - автоматически ждет если пусто
-                rgb, depth = self.frame_queue.get()
-                
-                # Get depth-based obstacle avoidance
-                depth_cmd = self.depth_nav.get_navigation_command(rgb, depth)
+                # ПРОСТО ПОЛУЧАЕМ КАДР - ждет следующий кадр. The slot stays pinned only
+                # while the frame is read (costmap + navigator copy what they keep)
+                with self.nav_frames.read(timeout=1.0) as frame:
+                    if frame is None:
+                        continue
+                    self.tracer.begin(frame)
+                    depth = frame['depth']
+                    
+                    if self.costmap is not None:
+                        # Shift the map by what the wheels did since the last frame
+                        now = time.time()
+                        dt = now - wheels_time
+                        wheels_time = now
+                        self.costmap.move((wheels[0] + wheels[1]) / 2 * dt,
+                                          (wheels[1] - wheels[0]) / TRACK_WIDTH_M * dt)
+                        self.costmap.update(depth, dt)
+                    
+                    # Get depth-based obstacle avoidance
+                    # The navigator ignores RGB, so the preview is never converted here
+                    depth_cmd = self.depth_nav.get_navigation_command(None, depth)
+                    self.tracer.mark('navigated')
+                    if self.scene_trigger is not None:
+                        # Navigator switching action = the rover enters new space
+                        self.scene_trigger.note_action(depth_cmd['action'])
                 
                 # Безопасное чтение LLaVA guidance
                 local_llava_guidance = None
@@ -138,6 +266,7 @@ class DepthLLaVARover:
                         local_llava_guidance = self.llava_guidance.copy()
                 
                 # Combine with LLaVA strategic guidance (используем локальную копию!)
+                source = 'depth'
                 metrics = depth_cmd.get('metrics', {})
                 if local_llava_guidance and depth_cmd['action'] != 'stop' and metrics:
                     llava_action = local_llava_guidance.get('action')
@@ -153,6 +282,7 @@ class DepthLLaVARover:
                     
                     reference_clearance = metrics.get('front', 0)
                     if suggested_clearance >= max(reference_clearance * 0.9, self.depth_nav.blocked_distance_mm):
+                        source = 'llava'
                         cmd = {
                             'action': llava_action,
                             'speed': depth_cmd['speed'],
@@ -165,10 +295,22 @@ class DepthLLaVARover:
                         cmd = depth_cmd
                 else:
                     cmd = depth_cmd
+                self.tracer.mark('arbitrated')
                 
                 # Execute smooth movement
                 action = cmd['action']
                 
+                # Costmap memory also covers obstacles too close or too low for the camera:
+                # turn away from them, toward the side with less remembered clutter
+                if self.costmap is not None and action == 'forward':
+                    memory_obstacle_m = self.costmap.nearest_obstacle_m(width_m=ROVER_WIDTH_M)
+                    if memory_obstacle_m is not None and memory_obstacle_m * 1000 < self.depth_nav.blocked_distance_mm:
+                        left_occ, right_occ = self.costmap.side_occupancy()
+                        action = 'left' if left_occ <= right_occ else 'right'
+                        source = 'costmap'
+                        cmd = dict(cmd, action=action,
+                                   reasoning=f'Costmap obstacle {memory_obstacle_m:.2f}m ahead - turning {action}')
+                
                 # VERY REDUCED SPEEDS for better reaction time
                 # Add PREVENTIVE slowdown based on path clearance
                 base_speed_lookup = {'slow': 0.12, 'medium': 0.18, 'fast': 0.25}
@@ -180,12 +322,32 @@ class DepthLLaVARover:
                 else:
                     clearance = max([v for v in cmd.get('scores', {}).values() if v > 0] or [0.5])
                 
+                # Direct front-corridor check straight from the integral maps
+                front_near = 0.0
+                maps = self.depth_nav.clearance_maps
+                if maps is not None and action == 'forward':
+                    front_near = float(maps.near_fraction(*maps.roi(*FRONT_ROI)))
+                
                 # EMERGENCY STOP if clearance drops suddenly (collision imminent!)
                 clearance_drop = last_clearance - clearance
+                if front_near > FRONT_NEAR_LIMIT:
+                    self.telemetry.record(self._ev_emergency, action='stop', value=front_near,
+                                          label=f'front corridor < {self.depth_nav.blocked_distance_mm}mm')
+                    self.rover.stop()
+                    self.tracer.actuate('emergency')
+                    wheels = (0.0, 0.0)
+                    last_action = 'stop'
+                    last_clearance = clearance
+                    time.sleep(0.3)
+                    continue
+                
                 if clearance_drop > 0.30 and clearance < 0.40:
                     # Sudden drop + low clearance = EMERGENCY!
-                    print(f"[Nav] 🚨 EMERGENCY STOP - Clearance dropped {int(clearance_drop*100)}% (now {int(clearance*100)}%)")
+                    self.telemetry.record(self._ev_emergency, action='stop', value=clearance_drop,
+                                          label='clearance drop')
                     self.rover.stop()
+                    self.tracer.actuate('emergency')
+                    wheels = (0.0, 0.0)
                     last_action = 'stop'
                     last_clearance = clearance
                     time.sleep(0.3)
@@ -203,14 +365,17 @@ class DepthLLaVARover:
                 if action == 'stop':
                     if last_action != 'stop':
                         reason_text = cmd.get('reasoning', depth_cmd.get('reasoning', 'Idle'))
-                        print(f"[Nav] STOP - {reason_text}")
+                        self.telemetry.record(self._ev_action, action='stop', value=clearance,
+                                              label=source, note=reason_text)
                         self.rover.stop()
+                        self.tracer.actuate('stop')
+                        wheels = (0.0, 0.0)
                         last_action = 'stop'
                     time.sleep(0.2)
                     
                 else:
                     # Execute movement command
-                    bias = float(cmd.get('steering_bias', 0.0)) if isinstance(cmd, dict) else 0.0
+                    bias = float(cmd.get('steering_bias', 0.0))
                     bias = max(min(bias, 0.8), -0.8)
                     
                     if action == 'forward':
@@ -235,18 +400,23 @@ class DepthLLaVARover:
                         R = 0.0
                     
                     self.rover._send(L, R)
+                    self.tracer.actuate(action)
+                    wheels = (L, R)
+                    self.telemetry.record(self._ev_drive, action=action, value=speed_val, label=source)
                     
                     if action != last_action:
                         reason_text = cmd.get('reasoning', depth_cmd.get('reasoning', ''))
-                        print(f"[Nav] {action.upper()} - {reason_text}")
+                        self.telemetry.record(self._ev_action, action=action, value=clearance,
+                                              label=source, note=reason_text)
                         last_action = action
                     
                     time.sleep(0.05)  # 20Hz for very smooth control
                 
             except Exception as e:
-                print(f"[Nav] Error: {e}")
+                self.telemetry.record(self._ev_nav_error, label=type(e).__name__, note=str(e))
                 try:
                     self.rover.stop()
+                    wheels = (0.0, 0.0)
                 except:
                     pass
                 time.sleep(1)
@@ -256,11 +426,17 @@ class DepthLLaVARover:
         self.running = True
         
         print(f"\n🚀 Starting navigation for {duration} seconds")
-        print(f"  • Camera: Capturing at 30 FPS")
+        print(f"  • Camera: Capturing at {self.fps:g} FPS (paced by the depth loop)")
         print(f"  • 3D Depth: Real-time obstacle avoidance (20 FPS)")
-        print(f"  • LLaVA AI: Scene understanding (every {self.llava_interval}s)")
+        if self.scene_trigger is not None:
+            print(f"  • LLaVA AI: Scene understanding (on scene change, every "
+                  f"{self.scene_trigger.min_interval:g}-{self.llava_interval:g}s)")
+        else:
+            print(f"  • LLaVA AI: Scene understanding (every {self.llava_interval}s)")
         print("  • Press Ctrl+C to stop\n")
         
+        self.telemetry.start_flusher(path=self.telemetry_file)
+        
         # Start all threads - capture FIRST!
         capture_thread = threading.Thread(target=self._capture_thread, daemon=True)
         llava_thread = threading.Thread(target=self._llava_thread, daemon=True)
@@ -280,6 +456,7 @@ class DepthLLaVARover:
     
     def stop(self):
         self.running = False
+        self.frames.close()
         time.sleep(0.3)
         
         if self.rover:
@@ -301,6 +478,24 @@ class DepthLLaVARover:
         if self.llava_nav:
             self.llava_nav.cleanup()
         
+        self.telemetry.stop_flusher()
+        counters = ', '.join(f"{k}={v}" for k, v in self.telemetry.counters().items())
+        print(f"[Telemetry] {counters}")
+        stats = self.frames.stats()
+        subscribers = ', '.join(f"{name}: {sub['received']} read / {sub['dropped']} missed"
+                                for name, sub in stats['subscribers'].items())
+        print(f"[Frames] {stats['published']} published, {stats['dropped']} dropped (all slots pinned); "
+              f"{subscribers}")
+        pacing = self.pacer.metrics()
+        print(f"[Capture] {pacing['capture_fps']:.1f} FPS from device, {pacing['publish_fps']:.1f} published, "
+              f"{pacing['skipped']} skipped, frames wait {pacing['wait_ms']:.1f}ms; "
+              f"depth loop drains {pacing['drain_fps']:.1f} FPS -> --fps {pacing['suggested_fps']:g} would do")
+        if self.scene_trigger is not None:
+            t = self.scene_trigger.stats()
+            print(f"[AI] {t['triggers']} LLaVA queries ({t['change']} scene changes, {t['timeout']} timeouts) "
+                  f"from {t['evaluated']} scored frames")
+        print(f"[Latency] Device capture -> motor command:\n{self.tracer.format_report()}")
+        
         print("\n[System] Shutdown complete")
 
 
@@ -312,17 +507,68 @@ if __name__ == '__main__':
     )
     parser.add_argument('--duration', type=int, default=60)
     parser.add_argument('--llava-interval', type=float, default=15.0,
-                       help='LLaVA analysis interval (seconds)')
+                       help='LLaVA analysis interval (seconds; with --scene-trigger the longest one)')
+    parser.add_argument('--scene-trigger', type=float, nargs='?', const=0.25, default=None,
+                       metavar='THRESHOLD', help='Run LLaVA when the RGB/depth/action change score since the '
+                                                 'last analysis reaches THRESHOLD (default 0.25)')
+    parser.add_argument('--llava-min-interval', type=float, default=2.0,
+                       help='Shortest LLaVA interval with --scene-trigger (seconds)')
     parser.add_argument('--safe-distance', type=int, default=500,
                        help='Safe distance to obstacles (mm)')
     parser.add_argument('--port', default='/dev/ttyACM0')
+    parser.add_argument('--sectors', type=int, default=None,
+                       help='Use N-sector polar histogram (e.g. 32, 64) instead of 5 regions')
+    parser.add_argument('--clearance-maps', action='store_true',
+                       help='Build integral clearance maps for an extra front-corridor emergency stop')
+    parser.add_argument('--temporal-window', type=int, default=None,
+                       help='Fuse depth over the last K frames on the host (turns device median filter off)')
+    parser.add_argument('--median-filter', choices=['off', '3x3', '5x5', '7x7'], default=None,
+                       help='Override the on-device stereo median filter')
+    parser.add_argument('--coarse-factor', type=int, default=None,
+                       help='Decide on a min-pooled strip (even factor, e.g. 8) and refine only unclear zones')
+    parser.add_argument('--costmap', action='store_true',
+                       help='Keep a local occupancy grid and turn away from remembered obstacles ahead')
+    parser.add_argument('--ground-plane', default=None,
+                       help='Floor calibration JSON; analyse the whole frame instead of the middle strip')
+    parser.add_argument('--telemetry-file', default=None,
+                       help='Append binary telemetry records to this file (kill -USR1 dumps history as text)')
+    parser.add_argument('--steady-state', action='store_true',
+                       help='Reuse navigator buffers and result object (no per-frame allocations, 5 regions only)')
+    parser.add_argument('--fps', type=float, default=30.0,
+                       help='Camera FPS (shutdown prints the rate the depth loop actually keeps up with)')
+    parser.add_argument('--sync-frames', action='store_true',
+                       help='Only use RGB/depth pairs with matching timestamps (counts discarded frames)')
+    parser.add_argument('--structured-llava', action='store_true',
+                       help='Constrain LLaVA to a short JSON command (action/speed/distance/reason) at temperature 0')
+    parser.add_argument('--scene-cache', action='store_true',
+                       help='Answer LLaVA from a perceptual-hash cache while the scene does not change')
+    parser.add_argument('--camera-daemon', nargs='?', const=DEFAULT_SOCKET, default=None,
+                       metavar='SOCKET', help='Read frames from a running camera_daemon.py instead of '
+                                              'opening the device (--median-filter / --sync-frames / --fps '
+                                              'are then the daemon\'s options)')
     
     args = parser.parse_args()
     
     rover = DepthLLaVARover(
         port=args.port,
         llava_interval=args.llava_interval,
-        safe_distance_mm=args.safe_distance
+        safe_distance_mm=args.safe_distance,
+        n_sectors=args.sectors,
+        clearance_maps=args.clearance_maps,
+        temporal_window=args.temporal_window,
+        median_filter=args.median_filter,
+        coarse_factor=args.coarse_factor,
+        costmap=args.costmap,
+        steady_state=args.steady_state,
+        telemetry_file=args.telemetry_file,
+        ground_plane=args.ground_plane,
+        sync_frames=args.sync_frames,
+        fps=args.fps,
+        camera_daemon=args.camera_daemon,
+        scene_cache=args.scene_cache,
+        scene_trigger=args.scene_trigger,
+        llava_min_interval=args.llava_min_interval,
+        structured_llava=args.structured_llava
     )
     
     rover.initialize()
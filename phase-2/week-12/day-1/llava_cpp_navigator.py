@@ -2,13 +2,95 @@
 LLaVA navigator using llama-cpp-python with vision support
 Efficient GPU-accelerated inference on Jetson Orin
 """
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaGrammar
 from llama_cpp.llama_chat_format import Llava15ChatHandler
+import ctypes
 import json
 import re
+import time
+import weakref
 from PIL import Image
+import cv2
 import numpy as np
 
+
+# LLaVA-1.5's CLIP (ViT-L/14-336) sees 336x336; larger frames are only shipped
+# to be scaled down by clip.cpp
+CLIP_IMAGE_SIZE = 336
+
+# Structured replies: decoding is constrained to exactly this JSON shape, so
+# the answer is short, complete and parsed without guessing from keywords.
+# The reason is capped at 60 characters (~15 tokens), the whole reply at ~45
+NAV_ACTIONS = ('forward', 'left', 'right', 'backward', 'stop')
+NAV_SPEEDS = ('slow', 'medium', 'fast')
+NAV_GRAMMAR = r'''
+root     ::= "{\"action\": " action ", \"speed\": " speed ", \"distance\": " distance ", \"reason\": " reason "}"
+action   ::= "\"forward\"" | "\"left\"" | "\"right\"" | "\"backward\"" | "\"stop\""
+speed    ::= "\"slow\"" | "\"medium\"" | "\"fast\""
+distance ::= "0." [0-9] | "1.0"
+reason   ::= "\"" [a-zA-Z0-9 ,.'-]{1,60} "\""
+'''
+STRUCTURED_MAX_TOKENS = 64  # safety net only: the grammar ends the reply first
+STRUCTURED_PROMPT = ("You are steering a small indoor rover through this camera view. "
+                     "Reply with the next move as JSON: action (forward, left, right, backward or stop), "
+                     "speed, distance in meters (0.0-1.0) and a short reason.")
+
+
+class ImageEmbedding:
+    """
+    CLIP embedding of one frame, computed once.
+    
+    Pass it instead of an image to get_navigation_command() / ask() to run
+    several prompts on the same frame without encoding it again.
+    """
+    
+    def __init__(self, llava_cpp, embed, embed_ms):
+        self._llava_cpp = llava_cpp
+        self.embed = embed  # llava_image_embed*
+        self.n_tokens = embed.contents.n_image_pos
+        self.embed_ms = embed_ms
+        self.uses = 0       # prompts evaluated with it
+        self.phash = None   # scene hash when it lives in a SceneCache
+    
+    def free(self):
+        if self.embed is not None:
+            self._llava_cpp.llava_image_embed_free(self.embed)
+            self.embed = None
+    
+    def __del__(self):
+        self.free()
+
+
+def fit_size(width, height, longest=CLIP_IMAGE_SIZE):
+    """(width, height) scaled so the longer side is at most longest."""
+    scale = min(1.0, longest / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def ppm_bytes(rgb):
+    """Binary PPM of an (H, W, 3) RGB array: raw pixels, no compression (see LazyFrame.ppm)."""
+    h, w = rgb.shape[:2]
+    return b'P6\n%d %d\n255\n' % (w, h) + np.ascontiguousarray(rgb, dtype=np.uint8).tobytes()
+
+
+def parse_structured(text):
+    """
+    Navigation command from a NAV_GRAMMAR reply.
+    
+    Raises:
+        ValueError: not a complete reply (e.g. cut off by max_tokens)
+    """
+    reply = json.loads(text)
+    if reply.get('action') not in NAV_ACTIONS or reply.get('speed') not in NAV_SPEEDS:
+        raise ValueError(f"Unexpected reply: {text[:80]}")
+    return {
+        'action': reply['action'],
+        'distance': min(max(float(reply['distance']), 0.0), 1.0),
+        'speed': reply['speed'],
+        'reasoning': reply.get('reason') or 'AI analysis'
+    }
+
+
 class LLaVACppNavigator:
     """
     LLaVA navigator using llama-cpp-python for fast GPU inference.
@@ -17,7 +99,9 @@ class LLaVACppNavigator:
     def __init__(self,
                  model_path="/home/jetson/.cache/llava-v1.5-7b-q4.gguf",
                  mmproj_path="/home/jetson/.cache/llava-mmproj-fixed.gguf",
-                 n_gpu_layers=99):
+                 n_gpu_layers=99,
+                 scene_cache=None,
+                 structured=False):
         """
         Initialize LLaVA with llama-cpp-python.
         
@@ -25,9 +109,14 @@ class LLaVACppNavigator:
             model_path: Path to GGUF model
             mmproj_path: Path to vision projector GGUF
             n_gpu_layers: Number of layers to offload to GPU (99 = all)
+            scene_cache: SceneCache - answers and CLIP embeddings of scenes seen
+                         recently are reused instead of running the model again
+            structured: Grammar-constrained JSON replies (action, speed, distance,
+                        reason) at temperature 0 instead of a free-form description
         """
         self.model_path = model_path
         self.mmproj_path = mmproj_path
+        self.scene_cache = scene_cache
         
         print(f"[LLaVA-cpp] Loading model with {n_gpu_layers} GPU layers...")
         
@@ -44,56 +133,296 @@ class LLaVACppNavigator:
             verbose=False,
             n_threads=4
         )
+        self.n_threads = 4
+        
+        # llama-cpp-python builds with the llava C API: images go to CLIP as raw
+        # pixels, no JPEG / base64 / data URI round trip (newer mtmd builds fall
+        # back to the chat handler)
+        self.direct_images = hasattr(self.chat_handler, 'clip_ctx') and hasattr(
+            self.chat_handler, '_llava_cpp')
+        self.last_timing = {}  # embed_ms / prefill_ms / decode_ms / generate_ms / tokens / cached
+        
+        # What the KV cache holds from the last query, to skip re-evaluating it:
+        # the constant prompt prefix (text, tokens) and the image evaluated after it
+        self._kv_prefix = None
+        self._kv_image = None      # weakref to that ImageEmbedding
+        self._kv_image_end = 0     # n_tokens right after the image
+        self.prefix_reuses = 0
+        self.image_reuses = 0
+        
+        # Compiled by llama.cpp when sampling starts; the Python object is just the text
+        self.grammar = LlamaGrammar.from_string(NAV_GRAMMAR, verbose=False) if structured else None
         
         print("[LLaVA-cpp] Model loaded successfully on GPU!")
     
-    def get_navigation_command(self, image, custom_prompt=None):
+    def image_bytes(self, image):
         """
-        Get navigation command from image.
+        Pre-resized raw RGB (PPM) bytes CLIP decodes without a codec.
         
         Args:
-            image: PIL Image or numpy array
-            custom_prompt: Optional custom prompt for goal-based navigation
-            
+            image: LazyFrame, RGB numpy array or PIL Image
+        """
+        if hasattr(image, 'ppm'):
+            return image.ppm(size=fit_size(*image.size))
+        if not isinstance(image, np.ndarray):
+            image = np.asarray(image.convert('RGB'))
+        size = fit_size(image.shape[1], image.shape[0])
+        if size != (image.shape[1], image.shape[0]):
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return ppm_bytes(image)
+    
+    def embed_image(self, image):
+        """
+        Run CLIP on a frame once.
+        
+        Args:
+            image: LazyFrame, RGB numpy array, PIL Image (or an ImageEmbedding,
+                   returned as is)
+        
         Returns:
-            dict: Navigation command
+            ImageEmbedding: reusable across prompts for this frame
+        """
+        if isinstance(image, ImageEmbedding):
+            return image
+        if not self.direct_images:
+            raise RuntimeError("This llama-cpp-python has no llava image-embed API")
+        data = self.image_bytes(image)
+        start = time.perf_counter()
+        llava_cpp = self.chat_handler._llava_cpp
+        embed = llava_cpp.llava_image_embed_make_with_bytes(
+            self.chat_handler.clip_ctx, self.n_threads,
+            (ctypes.c_uint8 * len(data)).from_buffer(bytearray(data)), len(data))
+        if not embed:
+            raise RuntimeError("CLIP could not embed the image")
+        return ImageEmbedding(llava_cpp, embed, (time.perf_counter() - start) * 1000)
+    
+    def encode(self, image):
         """
-        # Convert numpy to PIL if needed
-        if isinstance(image, np.ndarray):
-            image = Image.fromarray(image)
+        Do everything that needs the pixels now: the CLIP embedding (or the
+        JPEG for the chat-handler fallback, cached on a LazyFrame).
         
-        # Convert to base64 data URI
+        Call it while a FrameRing slot is pinned and release the slot
+        before the slow generation; the result can be asked any number of
+        prompts. With a scene cache, a frame of a recently seen scene gets
+        that scene's embedding back without running CLIP.
+        """
+        if isinstance(image, ImageEmbedding):
+            return image
+        phash = self.scene_hash(image)
+        if self.direct_images:
+            embedding = self.scene_cache.embedding(phash) if phash is not None else None
+            if embedding is None:
+                embedding = self.embed_image(image)
+                if phash is not None:
+                    embedding.phash = phash
+                    self.scene_cache.put_embedding(phash, embedding)
+            return embedding
+        if hasattr(image, 'jpeg'):
+            image.jpeg()
+        return image
+    
+    def scene_hash(self, image):
+        """Perceptual hash of an image / embedding for the scene cache (None without one)."""
+        if self.scene_cache is None:
+            return None
+        if isinstance(image, ImageEmbedding):
+            return image.phash
+        return self.scene_cache.hash(image)
+    
+    def ask(self, image, prompt, max_tokens=100, temperature=0.7, top_p=0.9, repeat_penalty=1.1,
+            grammar=None, instruction=None):
+        """
+        Answer one prompt about an image (or a precomputed ImageEmbedding).
+        
+        Args:
+            grammar: LlamaGrammar the reply must follow (e.g. self.grammar)
+            instruction: Constant text placed before the image; it is part of the
+                         prompt prefix kept in the KV cache between calls
+        
+        Returns:
+            str: The model's answer
+        """
+        if not self.direct_images:
+            if instruction:
+                prompt = f"{instruction}\n{prompt}" if prompt else instruction
+            return self._ask_chat(image, prompt, max_tokens, temperature, top_p, repeat_penalty, grammar)
+        
+        embedding = self.encode(image)
+        try:
+            return self._generate(embedding, prompt, max_tokens, temperature, top_p, repeat_penalty, grammar,
+                                  instruction)
+        finally:
+            # Made just for this call and not kept by the scene cache
+            if embedding is not image and embedding.phash is None:
+                embedding.free()
+    
+    def _restore(self, prefix):
+        """
+        Bring the KV cache to the end of the prompt prefix (and of the image
+        after it, if given), evaluating only what it does not hold yet.
+        
+        Nothing is copied: the model's input_ids say which tokens the cache
+        holds, and cells past the restored point are dropped before the next
+        evaluation overwrites them.
+        
+        Returns:
+            bool: The prefix was already there
+        """
+        llm = self.llm
+        if self._kv_prefix is None or self._kv_prefix[0] != prefix:
+            self._kv_prefix = (prefix, llm.tokenize(prefix.encode(), add_bos=False, special=True))
+            self._kv_image = None
+        tokens = self._kv_prefix[1]
+        n = len(tokens)
+        if llm.n_tokens >= n and llm.input_ids[:n].tolist() == tokens:
+            llm.n_tokens = n
+            return True
+        llm.reset()
+        llm.eval(tokens)
+        self._kv_image = None
+        return False
+    
+    def _generate(self, embedding, prompt, max_tokens, temperature, top_p, repeat_penalty, grammar,
+                  instruction=None):
+        if embedding.embed is None:
+            # llava_eval_image_embed would dereference NULL and crash the process
+            raise ValueError("Image embedding was already freed")
+        # CLIP time is charged to the first prompt that uses the embedding
+        embed_ms = embedding.embed_ms if embedding.uses == 0 else 0.0
+        embedding.uses += 1
+        llm = self.llm
+        # Same prompt layout as Llava15ChatHandler: system, USER: <image>text, ASSISTANT:
+        # (a constant instruction goes before the image, where it stays cached)
+        prefix = f"{self.chat_handler.DEFAULT_SYSTEM_MESSAGE}\nUSER: "
+        if instruction:
+            prefix += f"{instruction}\n"
+        start = time.perf_counter()
+        held = llm.n_tokens  # tokens the KV cache holds from the last query
+        prefix_reused = self._restore(prefix)
+        self.prefix_reuses += prefix_reused
+        prefix_done = time.perf_counter()
+        
+        # The image right after the prefix is still in the cache when the same
+        # embedding is asked again (e.g. a scene cache hit with a new prompt)
+        image_reused = (prefix_reused and self._kv_image is not None and self._kv_image() is embedding
+                        and held >= self._kv_image_end)
+        if image_reused:
+            llm.n_tokens = self._kv_image_end
+            self.image_reuses += 1
+        else:
+            if llm.n_tokens + embedding.n_tokens > llm.n_ctx():
+                raise ValueError(f"Prompt exceeds n_ctx: {llm.n_tokens + embedding.n_tokens} > {llm.n_ctx()}")
+            llm._ctx.kv_cache_seq_rm(-1, llm.n_tokens, -1)  # what followed the prefix last time
+            n_past = ctypes.c_int(llm.n_tokens)
+            self.chat_handler._llava_cpp.llava_eval_image_embed(llm.ctx, embedding.embed, llm.n_batch,
+                                                                ctypes.pointer(n_past))
+            llm.input_ids[llm.n_tokens:n_past.value] = -1  # image positions have no token ids
+            llm.n_tokens = n_past.value
+            self._kv_image = weakref.ref(embedding)
+            self._kv_image_end = llm.n_tokens
+        image_done = time.perf_counter()
+        llm.eval(llm.tokenize(f"{prompt}\nASSISTANT: ".encode(), add_bos=False, special=True))
+        prefill_done = time.perf_counter()
+        
+        # Prompt tokens identical to the evaluated ones: generation reuses the KV cache
+        completion = llm.create_completion(
+            prompt=llm.input_ids[:llm.n_tokens].tolist(),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            grammar=grammar
+        )
+        end = time.perf_counter()
+        self.last_timing = {'embed_ms': embed_ms, 'prefix_ms': (prefix_done - start) * 1000,
+                            'image_ms': (image_done - prefix_done) * 1000,
+                            'prompt_ms': (prefill_done - image_done) * 1000,
+                            'prefill_ms': (prefill_done - start) * 1000, 'decode_ms': (end - prefill_done) * 1000,
+                            'generate_ms': (end - start) * 1000, 'tokens': completion['usage']['completion_tokens'],
+                            'prefix_reused': prefix_reused, 'image_reused': image_reused, 'cached': False}
+        return completion['choices'][0]['text'].strip()
+    
+    def _ask_chat(self, image, prompt, max_tokens, temperature, top_p, repeat_penalty, grammar):
+        # JPEG data URI through the chat handler (builds without the llava C API)
         import io
         import base64
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        if isinstance(image, ImageEmbedding):
+            raise RuntimeError("This llama-cpp-python cannot take precomputed embeddings")
+        start = time.perf_counter()
+        if hasattr(image, 'jpeg'):
+            # LazyFrame: encoded at most once, straight from the camera layout
+            jpeg = image.jpeg()
+        else:
+            # Convert numpy to PIL if needed
+            if isinstance(image, np.ndarray):
+                image = Image.fromarray(image)
+            buffered = io.BytesIO()
+            image.save(buffered, format="JPEG")
+            jpeg = buffered.getvalue()
+        img_str = base64.b64encode(jpeg).decode()
         data_uri = f"data:image/jpeg;base64,{img_str}"
         
+        response = self.llm.create_chat_completion(
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "image_url", "image_url": {"url": data_uri}},
+                    {"type": "text", "text": prompt}
+                ]
+            }],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            grammar=grammar
+        )
+        generate_ms = (time.perf_counter() - start) * 1000
+        self.last_timing = {'embed_ms': 0.0, 'prefill_ms': 0.0, 'decode_ms': generate_ms, 'generate_ms': generate_ms,
+                            'tokens': response['usage']['completion_tokens'], 'cached': False}
+        return response['choices'][0]['message']['content']
+    
+    def get_navigation_command(self, image, custom_prompt=None):
+        """
+        Get navigation command from image.
+        
+        Args:
+            image: LazyFrame, RGB numpy array, PIL Image or ImageEmbedding
+                   (embed_image() once to ask several prompts about one frame)
+            custom_prompt: Optional custom prompt for goal-based navigation
+            
+        Returns:
+            dict: Navigation command
+        """
         # Create prompt - use custom if provided, otherwise default
-        if custom_prompt:
+        if self.grammar is not None:
+            prompt = f"{custom_prompt}\n{STRUCTURED_PROMPT}" if custom_prompt else STRUCTURED_PROMPT
+        elif custom_prompt:
             prompt = custom_prompt
         else:
             prompt = "Describe this scene briefly. What do you see?"
         
+        # Same scene, same question: answer from the cache in microseconds
+        phash = self.scene_hash(image)
+        if phash is not None:
+            cached = self.scene_cache.response(phash, prompt)
+            if cached is not None:
+                self.last_timing = {'embed_ms': 0.0, 'prefill_ms': 0.0, 'decode_ms': 0.0, 'generate_ms': 0.0,
+                                    'cached': True}
+                return dict(cached)
+        
         # Query model
         try:
-            response = self.llm.create_chat_completion(
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "image_url", "image_url": {"url": data_uri}},
-                        {"type": "text", "text": prompt}
-                    ]
-                }],
-                temperature=0.7,
-                max_tokens=100,
-                top_p=0.9,
-                repeat_penalty=1.1
-            )
+            if self.grammar is not None:
+                # Greedy and grammar-bound: the same scene gives the same JSON
+                # The fixed instruction precedes the image, so it stays in the KV cache
+                command = parse_structured(self.ask(image, custom_prompt or '', max_tokens=STRUCTURED_MAX_TOKENS,
+                                                    temperature=0.0, grammar=self.grammar,
+                                                    instruction=STRUCTURED_PROMPT))
+                if phash is not None:
+                    self.scene_cache.put_response(phash, prompt, dict(command))
+                return command
             
-            # Extract response
-            answer = response['choices'][0]['message']['content']
+            answer = self.ask(image, prompt)
             
             # Filter out hash marks
             answer = answer.replace('#', '').strip()
@@ -140,12 +469,15 @@ class LLaVACppNavigator:
             # Clean reasoning text
             reasoning = answer[:100] if answer and len(answer) > 3 else 'AI analysis'
             
-            return {
+            command = {
                 'action': action,
                 'distance': distance,
                 'speed': speed,
                 'reasoning': reasoning
             }
+            if phash is not None:
+                self.scene_cache.put_response(phash, prompt, dict(command))
+            return command
                 
         except Exception as e:
             print(f"[LLaVA-cpp] Error: {e}")
@@ -158,6 +490,11 @@ class LLaVACppNavigator:
     
     def cleanup(self):
         """Clean up resources."""
+        if self.direct_images:
+            print(f"[LLaVA-cpp] KV cache reuse: prompt prefix {self.prefix_reuses}x, image {self.image_reuses}x")
+        if self.scene_cache is not None:
+            print(f"[LLaVA-cpp] Scene cache: {self.scene_cache.stats()}")
+            self.scene_cache.clear()  # cached embeddings nobody else holds are freed here
         if hasattr(self, 'llm'):
             del self.llm
         if hasattr(self, 'chat_handler'):
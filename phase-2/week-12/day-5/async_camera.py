@@ -0,0 +1,231 @@
+"""
+asyncio access to the Oak-D output queues
+One reader thread blocks in device.getQueueEvent() on all host queues at
+once and hands new messages to the event loop; coroutines consume them
+with async iterators that keep a small bounded buffer each. No polling
+loop, no thread per stream, and camera, face recognition, TTS and rover
+I/O can all run as coroutines in one process.
+
+Usage:
+    async with AsyncOakCamera(PipelineSpec(streams=('rgb', 'depth'))) as camera:
+        async for rgb, depth in camera.stream():
+            ...
+"""
+import asyncio
+import threading
+from collections import deque
+from datetime import timedelta
+
+import depthai as dai
+
+from frame_sync import FrameSynchronizer
+from oak_pipeline import PipelineSpec, build_pipeline, open_queues
+
+
+class MessageStream:
+    """
+    Bounded async iterator over messages of one or more queues.
+
+    When the consumer falls behind, the oldest buffered message is
+    dropped (and counted): a slow coroutine always continues with the
+    freshest data instead of working through a backlog.
+    """
+
+    def __init__(self, names, maxsize=1, convert=None):
+        """
+        Args:
+            names: Queue names this stream receives
+            maxsize: Messages buffered before the oldest is dropped
+            convert: Applied to each message when it is consumed, in the
+                     consumer's task (e.g. ImgFrame -> numpy)
+        """
+        self.names = tuple(names)
+        self.maxsize = maxsize
+        self.convert = convert
+        self.received = 0
+        self.dropped = 0
+        self._buffer = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def _push(self, name, msg):
+        if len(self._buffer) >= self.maxsize:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append((name, msg) if len(self.names) > 1 else msg)
+        self.received += 1
+        self._ready.set()
+
+    def _close(self):
+        self._closed = True
+        self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._buffer:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        item = self._buffer.popleft()
+        return self.convert(item) if self.convert else item
+
+
+class AsyncOakCamera:
+    """
+    Oak-D with async iterators instead of polled queues.
+
+    Either builds its own pipeline from a PipelineSpec, or wraps an
+    already open device and its queues (scripts with custom pipelines).
+    """
+
+    def __init__(self, spec=None, device=None, queues=None):
+        """
+        Args:
+            spec: PipelineSpec to build and open (default: RGB + depth)
+            device: Already open dai.Device (then queues is required)
+            queues: {name: output queue} of that device
+        """
+        if (device is None) != (queues is None):
+            raise ValueError("Pass device and queues together")
+        self.spec = spec if spec is not None or device is not None else PipelineSpec()
+        self.device = device
+        self.queues = dict(queues) if queues else {}
+        self._owns_device = device is None
+        self._streams = []
+        self._loop = None
+        self._reader = None
+        self._stop = threading.Event()
+
+    async def start(self):
+        """Open the device (in a worker thread, it takes seconds) and start the reader."""
+        self._loop = asyncio.get_running_loop()
+        if self.device is None:
+            pipeline = build_pipeline(self.spec)
+            self.device = await self._loop.run_in_executor(None, dai.Device, pipeline)
+            self.queues = open_queues(self.device, self.spec)
+            print(f"[Oak-D async] XLink: {self.spec.describe()}")
+        self._stop.clear()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        return self
+
+    def _read_loop(self):
+        names = list(self.queues)
+        while not self._stop.is_set():
+            # Blocks until any queue has data (empty name on timeout, to check _stop)
+            name = self.device.getQueueEvent(names, timedelta(milliseconds=100))
+            if not name:
+                continue
+            msgs = self.queues[name].tryGetAll()
+            if msgs:
+                self._loop.call_soon_threadsafe(self._dispatch, name, msgs)
+        self._loop.call_soon_threadsafe(self._close_streams)
+
+    def _dispatch(self, name, msgs):
+        for stream in self._streams:
+            if name in stream.names:
+                for msg in msgs:
+                    stream._push(name, msg)
+
+    def _close_streams(self):
+        for stream in self._streams:
+            stream._close()
+
+    def subscribe(self, names, maxsize=1, convert=None):
+        """
+        Raw message stream of one or more queues.
+
+        Returns:
+            MessageStream yielding messages, or (name, message) for several queues
+        """
+        names = (names,) if isinstance(names, str) else tuple(names)
+        missing = [name for name in names if name not in self.queues]
+        if missing:
+            raise ValueError(f"No queue {missing} (open: {sorted(self.queues)})")
+        stream = MessageStream(names, maxsize, convert)
+        self._streams.append(stream)
+        return stream
+
+    def frames(self, maxsize=1):
+        """BGR frames of the 'rgb' queue."""
+        return self.subscribe('rgb', maxsize, lambda msg: msg.getCvFrame())
+
+    def depth(self, maxsize=1):
+        """uint16 depth frames (mm) of the 'depth' queue."""
+        return self.subscribe('depth', maxsize, lambda msg: msg.getFrame())
+
+    def detections(self, maxsize=4):
+        """Detection lists of the 'detections' queue."""
+        return self.subscribe('detections', maxsize, lambda msg: msg.detections)
+
+    async def stream(self, maxsize=2, threshold_ms=None):
+        """
+        Timestamp-matched (rgb, depth) pairs.
+
+        Uses the device Sync node's groups when the pipeline has one,
+        otherwise pairs the two queues with a FrameSynchronizer.
+        """
+        if 'sync' in self.queues:
+            async for group in self.subscribe('sync', maxsize):
+                yield group["rgb"].getCvFrame(), group["depth"].getFrame()
+            return
+        if threshold_ms is None:
+            threshold_ms = self.spec.sync_threshold_ms if self.spec else 20.0
+        synchronizer = FrameSynchronizer(threshold_ms=threshold_ms)
+        async for name, msg in self.subscribe(('rgb', 'depth'), maxsize * 2):
+            synchronizer.add(name, msg)
+            pair = synchronizer.newest_pair()
+            if pair is not None:
+                yield pair[0].getCvFrame(), pair[1].getFrame()
+
+    def stats(self):
+        """{stream names: (received, dropped)}"""
+        return {'+'.join(stream.names): (stream.received, stream.dropped) for stream in self._streams}
+
+    async def close(self):
+        """Stop the reader (ends every stream) and close the device if it is ours."""
+        if self._reader is not None:
+            self._stop.set()
+            await self._loop.run_in_executor(None, self._reader.join)
+            self._reader = None
+        if self._owns_device and self.device is not None:
+            self.device.close()
+            self.device = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Print the FPS of every stream for a few seconds')
+    parser.add_argument('--streams', nargs='+', default=['rgb', 'depth'])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    async def count(name, stream, counts):
+        async for _ in stream:
+            counts[name] += 1
+
+    async def main():
+        async with AsyncOakCamera(PipelineSpec(streams=args.streams)) as camera:
+            counts = {name: 0 for name in camera.queues}
+            tasks = [asyncio.create_task(count(name, camera.subscribe(name), counts)) for name in counts]
+            start = time.monotonic()
+            await asyncio.sleep(args.seconds)
+            elapsed = time.monotonic() - start
+            for task in tasks:
+                task.cancel()
+            for name, n in counts.items():
+                print(f"[Oak-D async] {name}: {n / elapsed:.1f} msg/s")
+            print(f"[Oak-D async] (received, dropped): {camera.stats()}")
+
+    asyncio.run(main())
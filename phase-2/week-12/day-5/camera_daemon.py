@@ -0,0 +1,414 @@
+"""
+Persistent Oak-D camera daemon
+One long-running process owns the device and captures into a FrameRing
+whose slots live in shared memory. Other processes attach through a
+Unix socket, get the shared-memory names of the slot they are handed and
+map it directly: no device boot or blob upload per script launch, and
+several scripts (navigator, VLM, tests) read the same camera at once.
+
+A slot stays pinned by the daemon while a client works on it, exactly
+like a FrameRing read in one process; if the client dies, the
+connection drops and the pin goes with it.
+
+Protocol (one JSON object per line):
+    -> {"op": "hello", "name": "nav", "policy": "latest"}
+    <- {"ok": true, "camera": {"streams": [...], "fps": 30.0, "person_detection": false}}
+    -> {"op": "read", "timeout": 1.0}
+    <- {"ok": true, "seq": 42, "timestamp": ..., "published_at": ...,
+        "buffers": {"depth": ["oakd_...", [400, 640], "<u2"], ...}, "detections": [...]}
+       (the slot is pinned until the client sends)
+    -> {"op": "release"}
+    -> {"op": "stats"}
+    <- {"ok": true, "stats": {...FrameRing.stats()...}}
+A read that times out answers {"ok": true, "seq": null}.
+
+Usage:
+    python camera_daemon.py --person-detection          # once, keeps running
+    camera = DaemonCamera()                              # in any script
+    camera.start()
+    rgb, depth = camera.capture_frames()
+"""
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from frame_ring import FrameRing, RingFrame
+from lazy_frame import LazyFrame
+
+
+DEFAULT_SOCKET = '/tmp/oakd_camera.sock'
+# Slot arrays a camera's capture_into() may publish
+RAW_STREAMS = ('rgb_planar', 'rgb', 'depth')
+
+
+def _attach(name):
+    # Clients must not unlink the daemon's segments when they exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _free(shm, unlink=False):
+    if unlink:
+        shm.unlink()
+    try:
+        shm.close()
+    except BufferError:
+        pass  # arrays still map it; unmapped when they are garbage collected
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    """One connected client: its subscriber and the slot it holds."""
+
+    def handle(self):
+        daemon = self.server.camera_daemon
+        subscriber = None
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                op = request.get('op')
+                if op == 'hello':
+                    subscriber = daemon.subscribe(request.get('name', 'client'), request.get('policy', 'latest'))
+                    self._send({'ok': True, 'camera': daemon.camera_info()})
+                elif op == 'read' and subscriber is not None:
+                    if not self._serve_read(daemon, subscriber, request):
+                        break
+                elif op == 'stats':
+                    self._send({'ok': True, 'stats': daemon.ring.stats()})
+                else:
+                    self._send({'ok': False, 'error': f"Unexpected op {op!r}"})
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if subscriber is not None:
+                daemon.ring.unsubscribe(subscriber.name)
+
+    def _serve_read(self, daemon, subscriber, request):
+        with subscriber.read(timeout=request.get('timeout')) as frame:
+            if frame is None:
+                self._send({'ok': True, 'seq': None})
+                return True
+            self._send({'ok': True, 'seq': frame.seq, 'timestamp': frame.timestamp,
+                        'published_at': frame.published_at, 'buffers': daemon.buffers(frame),
+                        'detections': daemon.detections.get(frame.seq, [])})
+            # Pinned until the client is done with it (or disconnects)
+            return self.rfile.readline().strip() != b''
+
+    def _send(self, reply):
+        self.wfile.write(json.dumps(reply).encode() + b'\n')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CameraDaemon:
+    """
+    Owns a camera and serves its frames from shared memory.
+
+    Usage:
+        daemon = CameraDaemon(OakDDepthCamera(enable_person_detection=True))
+        daemon.serve_forever()
+    """
+
+    def __init__(self, camera, socket_path=DEFAULT_SOCKET, slots=6):
+        """
+        Args:
+            camera: OakDDepthCamera / ReplayCamera (anything with capture_into)
+            socket_path: Unix socket clients connect to
+            slots: Ring slots (newest + one per concurrently reading client + one to write)
+        """
+        self.camera = camera
+        self.socket_path = socket_path
+        self.ring = FrameRing(slots=slots, allocator=self._allocate)
+        self.detections = {}  # seq -> person detections of that frame
+        self._segments = {}   # id(array) -> (array, SharedMemory)
+        self._specs = None
+        self._clients = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._capture = None
+        self.running = False
+
+    def _allocate(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size, name=f"oakd_{os.getpid()}_{len(self._segments)}_"
+                                                                      f"{os.urandom(4).hex()}")
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array.fill(0)
+        self._segments[id(array)] = (array, shm)
+        return array
+
+    def _release_old_segments(self):
+        # After a reallocation (resolution change): segments no slot uses any more.
+        # Unlinking keeps existing mappings valid, so clients holding one are fine
+        live = {id(arr) for slot in self.ring._buffers for arr in slot.values()}
+        for key in [key for key in self._segments if key not in live]:
+            _free(self._segments.pop(key)[1], unlink=True)
+
+    def buffers(self, frame):
+        """{stream: [shared memory name, shape, dtype]} of a pinned RingFrame."""
+        result = {}
+        for name in self.ring.specs:
+            view = frame[name]
+            _, shm = self._segments[id(view.base)]
+            result[name] = [shm.name, list(view.shape), view.dtype.str]
+        return result
+
+    def camera_info(self):
+        return {'streams': sorted(self.ring.specs or ()),
+                'fps': getattr(self.camera, 'fps', None),
+                'person_detection': bool(getattr(self.camera, 'enable_person_detection', False))}
+
+    def subscribe(self, name, policy):
+        with self._lock:
+            self._clients += 1
+            return self.ring.subscribe(f"{name}#{self._clients}", policy)
+
+    def _capture_loop(self):
+        while self.running:
+            try:
+                seq = self.camera.capture_into(self.ring)
+            except EOFError:
+                break
+            except Exception as e:
+                print(f"[Camera daemon] Capture error: {e}")
+                time.sleep(0.1)
+                continue
+            if self.ring.specs is not self._specs:
+                self._specs = self.ring.specs
+                self._release_old_segments()
+            if seq is not None and self.camera.enable_person_detection:
+                self.detections[seq] = self.camera.detect_person()
+                self.detections.pop(seq - 2 * self.ring.n_slots, None)
+        self.ring.close()
+
+    def start(self):
+        """Start the camera, the capture thread and the socket server (returns at once)."""
+        if os.path.exists(self.socket_path):
+            with socket.socket(socket.AF_UNIX) as probe:
+                if probe.connect_ex(self.socket_path) == 0:
+                    raise RuntimeError(f"A camera daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale, from a daemon that crashed
+        self.camera.start()
+        self.running = True
+        self._capture = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture.start()
+        self._server = _Server(self.socket_path, _ClientHandler)
+        self._server.camera_daemon = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"[Camera daemon] Serving on {self.socket_path}")
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._capture.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.running = False
+        self.ring.close()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self._capture is not None:
+            self._capture.join(timeout=2.0)
+            self._capture = None
+        self.camera.close()
+        for _, shm in self._segments.values():
+            _free(shm, unlink=True)
+        self._segments.clear()
+        print(f"[Camera daemon] Stopped: {self.ring.stats()}")
+
+
+class DaemonCamera:
+    """
+    Drop-in stand-in for OakDDepthCamera that reads from a CameraDaemon.
+
+    read() hands out the shared slot itself (zero copies, pinned while the
+    with block runs); capture() / capture_into() copy the raw slot arrays
+    out of it like the live camera copies out of the device message.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, name=None, policy='latest'):
+        """
+        Args:
+            socket_path: The daemon's Unix socket
+            name: Client name in the daemon's stats (default: script name)
+            policy: FrameSubscriber policy, 'latest' behaves like the device queue
+        """
+        self.socket_path = socket_path
+        self.name = name or os.path.basename(sys.argv[0])
+        self.policy = policy
+        self.enable_person_detection = False
+        self.fps = None
+        self.last_seq = -1
+        self.last_timestamp = None
+        self.last_detections = []
+        self._sock = None
+        self._file = None
+        self._segments = {}  # shared memory name -> SharedMemory
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_UNIX)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError as e:
+            self._sock.close()
+            self._sock = None
+            raise ConnectionError(f"No camera daemon on {self.socket_path} (python camera_daemon.py)") from e
+        self._file = self._sock.makefile('rwb')
+        info = self._request({'op': 'hello', 'name': self.name, 'policy': self.policy})['camera']
+        self.enable_person_detection = info['person_detection']
+        self.fps = info['fps']
+        print(f"[Oak-D daemon] Attached to {self.socket_path}: {info}")
+
+    def _send(self, request):
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+
+    def _request(self, request):
+        self._send(request)
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Camera daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise RuntimeError(f"Camera daemon: {reply.get('error')}")
+        return reply
+
+    def _view(self, name, shape, dtype):
+        shm = self._segments.get(name)
+        if shm is None:
+            shm = self._segments[name] = _attach(name)
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        view.flags.writeable = False
+        return view
+
+    @contextlib.contextmanager
+    def read(self, timeout=None):
+        """
+        Pin the next frame in the daemon for the duration of a with block.
+
+        Yields:
+            RingFrame with read-only shared-memory views, or None on timeout
+        """
+        reply = self._request({'op': 'read', 'timeout': timeout})
+        if reply['seq'] is None:
+            yield None
+            return
+        try:
+            frame = RingFrame({name: self._view(*buffer) for name, buffer in reply['buffers'].items()})
+            frame.seq, frame.timestamp, frame.published_at = reply['seq'], reply['timestamp'], reply['published_at']
+            self.last_seq = frame.seq
+            self.last_timestamp = frame.timestamp
+            self.last_detections = reply['detections']
+            yield frame
+        finally:
+            self._send({'op': 'release'})
+
+    def capture(self):
+        """Next frame as a LazyFrame over copies of the raw slot arrays (see OakDDepthCamera.capture)."""
+        with self.read() as frame:
+            if frame is None:
+                raise ConnectionError("Camera daemon stopped")
+            arrays = {name: frame[name].copy() for name in RAW_STREAMS if name in frame}
+        return LazyFrame(depth=arrays.get('depth'), rgb_planar=arrays.get('rgb_planar'), bgr=arrays.get('rgb'),
+                         timestamp=frame.timestamp, seq=frame.seq)
+
+    def capture_frames(self):
+        """Copy of the next (rgb_frame, depth_frame); rgb is None if the daemon has none."""
+        frame = self.capture()
+        return frame.bgr, frame.depth
+
+    def capture_into(self, ring):
+        """Copy the next frame into a local FrameRing slot (see OakDDepthCamera.capture_into)."""
+        with self.read() as frame:
+            if frame is None:
+                raise ConnectionError("Camera daemon stopped")
+            specs = {name: (frame[name].shape, frame[name].dtype) for name in RAW_STREAMS if name in frame}
+            with ring.write(specs, timestamp=frame.timestamp) as slot:
+                if slot is None:
+                    return None
+                for name in specs:
+                    np.copyto(slot[name], frame[name])
+        return ring.seq
+
+    def skip_frame(self):
+        """Advance past the next frame without copying it."""
+        with self.read():
+            pass
+
+    def detect_person(self, debug=False):
+        """The daemon's person detections of the frame returned last."""
+        if debug:
+            print(f"[Oak-D daemon] {len(self.last_detections)} person detections")
+        return [dict(d, bbox=tuple(d['bbox']), center=tuple(d['center'])) for d in self.last_detections]
+
+    def get_person_direction(self, person_bbox):
+        """Same thirds rule as OakDDepthCamera.get_person_direction."""
+        x, y, w, h = person_bbox
+        center_x = x + w / 2
+        if center_x < 0.33:
+            return 'left'
+        elif center_x > 0.67:
+            return 'right'
+        return 'center'
+
+    def stats(self):
+        """The daemon's FrameRing stats (all clients)."""
+        return self._request({'op': 'stats'})['stats']
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+        for shm in self._segments.values():
+            _free(shm)
+        self._segments.clear()
+        print("[Oak-D daemon] Detached")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from oakd_depth_navigator import OakDDepthCamera
+    from recording import ReplayCamera
+
+    parser = argparse.ArgumentParser(description='Own the Oak-D and serve its frames to other processes')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    parser.add_argument('--slots', type=int, default=6, help='Ring slots (clients reading at once + 2)')
+    parser.add_argument('--person-detection', action='store_true')
+    parser.add_argument('--no-rgb', action='store_true', help='Depth only (saves USB bandwidth)')
+    parser.add_argument('--median-filter', choices=['off', '3x3', '5x5', '7x7'], default=None)
+    parser.add_argument('--sync-frames', action='store_true')
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--replay', metavar='RECORDING', help='Serve a recording instead of the camera')
+    args = parser.parse_args()
+
+    if args.replay:
+        camera = ReplayCamera(args.replay, loop=True)
+    else:
+        camera = OakDDepthCamera(enable_person_detection=args.person_detection, median_filter=args.median_filter,
+                                 sync_frames=args.sync_frames, rgb=not args.no_rgb, fps=args.fps)
+    CameraDaemon(camera, args.socket, args.slots).serve_forever()
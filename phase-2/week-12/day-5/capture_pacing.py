@@ -0,0 +1,134 @@
+"""
+Consumer-driven capture pacing
+The capture thread used to sleep a fixed 30 ms after every frame, on
+top of already waiting for the device. CapturePacer instead captures as
+fast as frames arrive and publishes every frame a consumer can still
+read: a consumer that is behind takes the newest frame when it comes
+back (its 'latest' cursor skips the ones in between, counted as drops),
+never an older one that waited in the ring. Only frames nobody could
+read (no subscribers, every slot pinned) are pulled off the device
+queue without being converted or copied. It measures achieved FPS, the
+consumers' drain rate and how long frames wait before they are read,
+and suggests a device FPS that matches the drain rate (the sensor rate
+is fixed once the pipeline runs).
+"""
+import time
+
+from telemetry import get_telemetry
+
+
+class CapturePacer:
+    """
+    Decides per device frame whether to publish it into a FrameRing.
+
+    Usage:
+        nav_subscriber = ring.subscribe('nav', policy='latest')
+        pacer = CapturePacer(ring, required=[nav_subscriber])
+        while running:
+            pacer.capture(camera)       # blocks on the device, never sleeps
+        print(pacer.metrics())
+    """
+
+    def __init__(self, ring, required, report_interval=5.0, device_fps=30.0):
+        """
+        Args:
+            ring: FrameRing the camera writes into
+            required: 'latest' FrameSubscribers whose drain rate and frame age
+                      the metrics and suggested_fps follow (the optional ones,
+                      e.g. LLaVA, are left out)
+            report_interval: Seconds between 'capture.pacing' telemetry records
+            device_fps: Configured sensor rate, for suggested_fps
+        """
+        for sub in required:
+            # An 'every' cursor reads the oldest unread frame, so a consumer
+            # that fell behind would work on frames that waited in the ring
+            if sub.policy != 'latest':
+                raise ValueError(f"Subscriber {sub.name!r} has policy {sub.policy!r}, "
+                                 f"CapturePacer needs 'latest'")
+        self.ring = ring
+        self.required = list(required)
+        self.report_interval = report_interval
+        self.device_fps = device_fps
+
+        self.captured = 0   # frames taken off the device
+        self.skipped = 0    # ... of which were not converted (nobody could read them)
+        self._window_start = time.monotonic()
+        self._window = {'captured': 0, 'published': ring.published,
+                        'received': [sub.received for sub in self.required]}
+        self._rates = {'capture_fps': 0.0, 'publish_fps': 0.0, 'drain_fps': 0.0}
+
+        self.telemetry = get_telemetry()
+        self._event = self.telemetry.register(
+            'capture.pacing', "[Capture] {value:.1f} FPS published, frames wait {latency_ms:.1f}ms, "
+                              "{count} skipped", echo_interval=report_interval)
+
+    def backlog(self):
+        """Frames published since the slowest required subscriber last read."""
+        if not self.required:
+            return 0
+        return self.ring.seq - min(sub.last_seq for sub in self.required)
+
+    def capture(self, camera):
+        """
+        Take the next device frame and publish it, unless nobody could read it.
+
+        A required subscriber that has not read the previous frame yet gets
+        this one instead (publishing over its unread frame keeps what it
+        reads as fresh as possible); its drop counter records the skip.
+
+        Args:
+            camera: OakDDepthCamera / ReplayCamera (capture_into + skip_frame)
+
+        Returns:
+            int: Ring sequence number, or None if the frame was skipped / dropped
+        """
+        if not self.ring.subscribers or not self.ring.can_write():
+            camera.skip_frame()
+            seq = None
+            self.skipped += 1
+        else:
+            seq = camera.capture_into(self.ring)
+        self.captured += 1
+
+        now = time.monotonic()
+        if now - self._window_start >= self.report_interval:
+            self._update(now)
+        return seq
+
+    def _update(self, now):
+        dt = now - self._window_start
+        received = [sub.received for sub in self.required]
+        drained = [r - r0 for r, r0 in zip(received, self._window['received'])]
+        self._rates = {
+            'capture_fps': (self.captured - self._window['captured']) / dt,
+            'publish_fps': (self.ring.published - self._window['published']) / dt,
+            'drain_fps': min(drained) / dt if drained else 0.0
+        }
+        self._window = {'captured': self.captured, 'published': self.ring.published, 'received': received}
+        self._window_start = now
+        self.telemetry.record(self._event, value=self._rates['publish_fps'], count=self.skipped,
+                              latency_ms=self.wait_ms())
+
+    def wait_ms(self):
+        """Mean time frames waited in the ring before the required subscribers took them."""
+        received = sum(sub.received for sub in self.required)
+        if not received:
+            return 0.0
+        return sum(sub.total_wait_s for sub in self.required) / received * 1000
+
+    def suggested_fps(self):
+        """
+        Device FPS that matches the slowest required consumer (with 20%
+        headroom), capped at the configured rate. Lowering the sensor FPS
+        to this saves USB bandwidth and device power that skipped frames
+        waste now.
+        """
+        drain = self._rates['drain_fps']
+        if drain <= 0:
+            return self.device_fps
+        return min(self.device_fps, round(drain * 1.2))
+
+    def metrics(self):
+        """Rates of the last report window plus totals."""
+        return dict(self._rates, captured=self.captured, skipped=self.skipped, backlog=self.backlog(),
+                    wait_ms=self.wait_ms(), suggested_fps=self.suggested_fps())
@@ -0,0 +1,120 @@
+"""
+Summed-area (integral image) clearance maps
+Build once per depth frame, then answer any rectangular ROI query
+(mean depth, valid fraction, near-obstacle pixel count) in O(1).
+"""
+import cv2
+import numpy as np
+
+from depth_zone_stats import MIN_VALID_MM, MAX_VALID_MM
+
+
+class ClearanceMaps:
+    """
+    Integral images of valid-pixel count, depth sum and near-pixel count.
+
+    Buffers are (H+1, W+1) with a zero first row/column (cv2.integral
+    layout), allocated once per frame shape and refilled in place every
+    frame. ROI bounds are half-open pixel ranges: rows y0:y1, columns
+    x0:x1 (like slicing).
+    """
+
+    def __init__(self, near_mm=800):
+        """
+        Args:
+            near_mm: Valid pixels closer than this count as near obstacles
+        """
+        self.near_mm = near_mm
+        self.shape = None
+        self._valid = None
+        self._sum = None
+        self._near = None
+
+    def _allocate(self, shape):
+        h, w = shape
+        self._valid = np.zeros((h + 1, w + 1), dtype=np.int32)
+        self._near = np.zeros((h + 1, w + 1), dtype=np.int32)
+        # uint16 input only integrates to float64 (exact up to 2^53)
+        self._sum = np.zeros((h + 1, w + 1), dtype=np.float64)
+        # Per-frame scratch, reused so build() allocates nothing
+        self._valid_px = np.zeros(shape, dtype=bool)
+        self._near_px = np.zeros(shape, dtype=bool)
+        self._depth_valid = np.zeros(shape, dtype=np.uint16)
+        self.shape = shape
+
+    def build(self, depth_frame):
+        """
+        Precompute the integral images for one depth frame.
+
+        Args:
+            depth_frame: (H, W) depth in millimeters
+
+        Returns:
+            ClearanceMaps: self, for chaining
+        """
+        if depth_frame.shape != self.shape:
+            self._allocate(depth_frame.shape)
+
+        valid, near = self._valid_px, self._near_px
+        np.greater_equal(depth_frame, MIN_VALID_MM, out=valid)
+        np.less(depth_frame, MAX_VALID_MM, out=near)
+        valid &= near
+        np.less(depth_frame, self.near_mm, out=near)
+        near &= valid
+        depth_valid = np.multiply(depth_frame, valid, out=self._depth_valid, casting='unsafe')
+
+        cv2.integral(valid.view(np.uint8), self._valid, sdepth=cv2.CV_32S)
+        cv2.integral(near.view(np.uint8), self._near, sdepth=cv2.CV_32S)
+        cv2.integral(depth_valid, self._sum, sdepth=cv2.CV_64F)
+        return self
+
+    @staticmethod
+    def _box(table, y0, y1, x0, x1):
+        # Works for scalars and for equally-shaped index arrays
+        return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+
+    def valid_count(self, y0, y1, x0, x1):
+        """Number of valid depth pixels in the ROI."""
+        return self._box(self._valid, y0, y1, x0, x1)
+
+    def near_count(self, y0, y1, x0, x1):
+        """Number of valid pixels closer than near_mm in the ROI."""
+        return self._box(self._near, y0, y1, x0, x1)
+
+    def valid_fraction(self, y0, y1, x0, x1):
+        """Valid pixels / ROI area (0 for an empty ROI)."""
+        area = np.maximum((np.asarray(y1) - y0) * (np.asarray(x1) - x0), 1)
+        return self.valid_count(y0, y1, x0, x1) / area
+
+    def near_fraction(self, y0, y1, x0, x1):
+        """Near pixels / valid pixels in the ROI (0 if nothing valid)."""
+        return self.near_count(y0, y1, x0, x1) / np.maximum(self.valid_count(y0, y1, x0, x1), 1)
+
+    def mean_depth(self, y0, y1, x0, x1):
+        """Mean depth (mm) over the valid pixels of the ROI, 0 if none."""
+        count = self.valid_count(y0, y1, x0, x1)
+        total = self._box(self._sum, y0, y1, x0, x1)
+        return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+    def query(self, rois):
+        """
+        Answer many ROIs at once.
+
+        Args:
+            rois: (K, 4) int array of (y0, y1, x0, x1)
+
+        Returns:
+            dict: 'mean_mm', 'valid_fraction', 'near_count', each shape (K,)
+        """
+        rois = np.asarray(rois, dtype=np.int64)
+        y0, y1, x0, x1 = rois.T
+        return {
+            'mean_mm': self.mean_depth(y0, y1, x0, x1),
+            'valid_fraction': self.valid_fraction(y0, y1, x0, x1),
+            'near_count': self.near_count(y0, y1, x0, x1)
+        }
+
+    def roi(self, top, bottom, left, right):
+        """Convert fractional bounds (0-1) to a pixel ROI (y0, y1, x0, x1)."""
+        h, w = self.shape
+        return int(h * top), int(h * bottom), int(w * left), int(w * right)
@@ -0,0 +1,12 @@
+"""
+Navigation hot-path benchmarks
+Synthetic depth scenes, latency percentiles / allocation tracking and a
+JSON baseline so a slowdown fails the run before it reaches the rover.
+
+Usage (from the directory holding oakd_depth_navigator.py):
+    python -m depth_bench --save-baseline bench_baseline.json
+    python -m depth_bench --baseline bench_baseline.json
+"""
+from depth_bench.scenes import SCENES, make_frames
+from depth_bench.harness import measure, compare, save_baseline, load_baseline
+from depth_bench.runner import NAVIGATOR_MODES, run_navigator, run_recording, run_face, run_llava
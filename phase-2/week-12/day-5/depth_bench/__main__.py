@@ -0,0 +1,100 @@
+"""
+python -m depth_bench [--baseline FILE | --save-baseline FILE] [options]
+
+Exits with status 1 if any case regressed against the baseline.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from depth_bench.harness import compare, format_table, load_baseline, save_baseline
+from depth_bench.runner import NAVIGATOR_MODES, run_face, run_llava, run_navigator, run_recording
+from depth_bench.scenes import SCENES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the navigation hot path')
+    parser.add_argument('--frames', type=int, default=300, help='Timed frames per case')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--modes', nargs='+', choices=list(NAVIGATOR_MODES), default=None,
+                        help='Navigator modes (default: all)')
+    parser.add_argument('--scenes', nargs='+', choices=list(SCENES), default=None,
+                        help='Synthetic scenes (default: all)')
+    parser.add_argument('--recording', type=Path, nargs='+', default=None,
+                        help='Also benchmark on footage recorded with recording.py')
+    parser.add_argument('--recording-frames', type=int, default=None,
+                        help='Use only the first N recorded frames (default: all)')
+    parser.add_argument('--no-alloc', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--face', action='store_true',
+                        help='Also benchmark FaceRecognitionService.recognize_faces')
+    parser.add_argument('--known-faces', default='known-faces',
+                        help='Known faces directory; its photos are also the face benchmark input')
+    parser.add_argument('--llava', nargs=2, metavar=('MODEL', 'MMPROJ'), default=None,
+                        help='Also benchmark LLaVACppNavigator.get_navigation_command')
+    parser.add_argument('--llava-frames', type=int, default=5)
+    parser.add_argument('--images', nargs='+', default=None,
+                        help='Photos for the LLaVA benchmark (default: random noise)')
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help='Compare against this baseline and fail on regression')
+    parser.add_argument('--save-baseline', type=Path, default=None,
+                        help='Write the results as a new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative p50/p95 latency growth (default 0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    shape = (args.height, args.width)
+    settings = {'frames': args.frames, 'warmup': args.warmup, 'shape': list(shape), 'seed': args.seed}
+
+    print(f"[Bench] DepthNavigator: {args.frames} frames per case at {args.width}x{args.height}")
+    results = run_navigator(args.modes, args.scenes, args.frames, args.warmup, shape,
+                            seed=args.seed, track_allocations=not args.no_alloc)
+    for path in args.recording or []:
+        print(f"[Bench] DepthNavigator on recording {path}")
+        results.update(run_recording(path, args.modes, args.frames, args.warmup, args.recording_frames,
+                                     args.seed, track_allocations=not args.no_alloc))
+
+    if args.face:
+        photos = sorted(p for p in Path(args.known_faces).iterdir()
+                        if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+        print(f"[Bench] Face recognition on {len(photos)} photos")
+        results.update(run_face(photos, args.known_faces))
+        for path in args.recording or []:
+            from recording import Recording
+            recording = Recording(str(path))
+            # 30 frames spread over the recording
+            step = max(len(recording) // 30, 1)
+            print(f"[Bench] Face recognition on recording {path}")
+            results.update(run_face(recording.rgb_frames()[::step], args.known_faces,
+                                    case=f'face/recognize_faces/rec:{path.name}'))
+
+    if args.llava:
+        print(f"[Bench] LLaVA: {args.llava_frames} calls")
+        results.update(run_llava(args.llava[0], args.llava[1], args.images, args.llava_frames))
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    print()
+    print(format_table(results, baseline))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, settings)
+        print(f"\n[Bench] Baseline saved to {args.save_baseline}")
+
+    if baseline is None:
+        return 0
+    if baseline.get('settings') != settings:
+        print(f"\n[Bench] ⚠️  Baseline settings differ: {baseline.get('settings')} vs {settings}")
+    regressions = compare(results, baseline, time_tolerance=args.tolerance)
+    if regressions:
+        print(f"\n[Bench] ❌ {len(regressions)} regression(s):")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print("\n[Bench] ✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
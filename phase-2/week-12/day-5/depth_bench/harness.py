@@ -0,0 +1,169 @@
+"""
+Timing / allocation harness and JSON baselines
+"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def measure(fn, inputs, frames=300, warmup=20, track_allocations=True):
+    """
+    Time fn over a cycle of inputs and measure its allocations.
+
+    Timing runs with the garbage collector off (like timeit). The
+    allocation pass is separate because tracemalloc slows every
+    allocation down.
+
+    Args:
+        fn: Callable taking one input
+        inputs: Sequence of inputs, cycled through
+        frames: Timed calls
+        warmup: Untimed calls first (caches, lazily built tables)
+        track_allocations: Run the tracemalloc pass
+
+    Returns:
+        dict: latency percentiles (ms), fps and allocation stats (KB)
+    """
+    n = len(inputs)
+    for i in range(warmup):
+        fn(inputs[i % n])
+
+    times = np.empty(frames)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(frames):
+            x = inputs[i % n]
+            t0 = time.perf_counter()
+            fn(x)
+            times[i] = time.perf_counter() - t0
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    times *= 1000.0
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    result = {
+        'frames': frames,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_ms': float(times.mean()),
+        'max_ms': float(times.max()),
+        'fps': float(1000.0 / times.mean())
+    }
+    if track_allocations:
+        result.update(allocations(fn, inputs, min(frames, 50)))
+    return result
+
+
+def allocations(fn, inputs, frames=50):
+    """
+    Per-call memory churn measured with tracemalloc (numpy buffers included).
+
+    Returns:
+        dict:
+            'alloc_peak_kb': median peak of memory allocated during one call
+            'retained_kb_per_frame': memory still held after the calls, per call
+                                     (should be ~0, anything else is a leak)
+    """
+    n = len(inputs)
+    peaks = np.empty(frames)
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for i in range(frames):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn(inputs[i % n])
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[i] = peak - before
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_kb': float(np.median(peaks)) / 1024,
+        'retained_kb_per_frame': max(end - start, 0) / 1024 / frames
+    }
+
+
+def machine_info():
+    """Where a baseline was recorded (timings only compare on the same machine)."""
+    return {
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'node': platform.node(),
+        'python': platform.python_version(),
+        'numpy': np.__version__
+    }
+
+
+def save_baseline(path, results, settings):
+    """Write results plus machine/settings info as JSON."""
+    with open(path, 'w') as f:
+        json.dump({'machine': machine_info(), 'settings': settings, 'results': results}, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, time_tolerance=0.25, alloc_tolerance=0.10,
+            time_slack_ms=0.05, alloc_slack_kb=16.0):
+    """
+    Check results against a baseline.
+
+    A case regresses when its p50 latency grows by more than
+    time_tolerance (relative) + time_slack_ms, its p95 by more than twice
+    that (tails are noisier), or its peak allocation by more than
+    alloc_tolerance + alloc_slack_kb. The slack keeps sub-ms cases from
+    failing on timer jitter. p99 is reported but not gated. A baseline
+    case without a result (renamed, crashed, not run) is a regression too,
+    so compare against a baseline saved with the same case selection.
+
+    Args:
+        results: {case: measure() dict}
+        baseline: Loaded baseline JSON
+
+    Returns:
+        list: Human readable regression messages (empty = pass)
+    """
+    regressions = []
+    for case, base in baseline['results'].items():
+        current = results.get(case)
+        if current is None:
+            regressions.append(f"{case}: missing from results")
+            continue
+        for key, scale in (('p50_ms', 1), ('p95_ms', 2)):
+            limit = base[key] * (1 + time_tolerance * scale) + time_slack_ms * scale
+            if current[key] > limit:
+                regressions.append(f"{case}: {key} {current[key]:.3f} > {limit:.3f} "
+                                   f"(baseline {base[key]:.3f})")
+        if 'alloc_peak_kb' in base and 'alloc_peak_kb' in current:
+            limit = base['alloc_peak_kb'] * (1 + alloc_tolerance) + alloc_slack_kb
+            if current['alloc_peak_kb'] > limit:
+                regressions.append(f"{case}: alloc_peak_kb {current['alloc_peak_kb']:.1f} > {limit:.1f} "
+                                   f"(baseline {base['alloc_peak_kb']:.1f})")
+    return regressions
+
+
+def format_table(results, baseline=None):
+    """Plain-text report, with the baseline p50 when one is given."""
+    header = f"{'case':<32}{'p50':>8}{'p95':>8}{'p99':>8}{'fps':>9}{'alloc KB':>10}{'leak KB':>9}"
+    if baseline:
+        header += f"{'base p50':>10}"
+    lines = [header, '-' * len(header)]
+    for case, r in results.items():
+        line = (f"{case:<32}{r['p50_ms']:>8.3f}{r['p95_ms']:>8.3f}{r['p99_ms']:>8.3f}"
+                f"{r['fps']:>9.1f}{r.get('alloc_peak_kb', float('nan')):>10.1f}"
+                f"{r.get('retained_kb_per_frame', float('nan')):>9.2f}")
+        if baseline:
+            base = baseline['results'].get(case)
+            line += f"{base['p50_ms']:>10.3f}" if base else f"{'-':>10}"
+        lines.append(line)
+    return '\n'.join(lines)
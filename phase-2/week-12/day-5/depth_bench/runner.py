@@ -0,0 +1,138 @@
+"""
+Benchmark cases: DepthNavigator modes on synthetic scenes or recorded
+footage, plus the optional face recognition and LLaVA calls.
+"""
+import contextlib
+import os
+import random
+
+import numpy as np
+
+from depth_bench.harness import measure
+from depth_bench.scenes import CAMERA_HEIGHT_M, DEFAULT_SHAPE, SCENES, make_frames
+from ground_plane import GroundPlane
+
+
+# DepthNavigator constructor options per benchmarked mode
+NAVIGATOR_MODES = {
+    'zones': {},
+    'polar': {'n_sectors': 32},
+    'coarse': {'coarse_factor': 8},
+    'fused': {'temporal_window': 4},
+    'maps': {'build_clearance_maps': True},
+    'steady': {'preallocate': True},
+    'steady_fused': {'preallocate': True, 'temporal_window': 4},
+    'ground': {'ground_plane': GroundPlane(camera_height_m=CAMERA_HEIGHT_M)}
+}
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Swallow the navigator's console prints so they are not timed against the terminal."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_navigator(modes=None, scenes=None, frames=300, warmup=20, shape=DEFAULT_SHAPE,
+                  unique_frames=32, seed=0, track_allocations=True):
+    """
+    Benchmark DepthNavigator.get_navigation_command.
+
+    Every (mode, scene) pair gets a fresh navigator and the same
+    pre-rendered frames, so temporal state never leaks between cases.
+
+    Returns:
+        dict: {'navigator/<mode>/<scene>': measure() result}
+    """
+    scenes = scenes or list(SCENES)
+    inputs = {scene: make_frames(scene, unique_frames, shape, seed) for scene in scenes}
+    return _bench_navigator(modes, inputs, frames, warmup, seed, track_allocations)
+
+
+def run_recording(path, modes=None, frames=300, warmup=20, max_frames=None, seed=0,
+                  track_allocations=True):
+    """
+    Benchmark DepthNavigator on depth recorded with recording.py.
+
+    Frames come straight from the memory-mapped chunks (touched once
+    before timing so page faults are not measured).
+
+    Returns:
+        dict: {'navigator/<mode>/rec:<name>': measure() result}
+    """
+    from recording import Recording
+
+    recording = Recording(str(path))
+    depth_frames = recording.depth_frames(stop=min(len(recording), max_frames or len(recording)))
+    for depth in depth_frames:
+        depth.sum()
+    name = os.path.basename(os.path.normpath(str(path)))
+    return _bench_navigator(modes, {f'rec:{name}': depth_frames}, frames, warmup, seed,
+                            track_allocations)
+
+
+def _bench_navigator(modes, inputs, frames, warmup, seed, track_allocations):
+    from oakd_depth_navigator import DepthNavigator
+
+    modes = modes or list(NAVIGATOR_MODES)
+    results = {}
+    for scene, depth_frames in inputs.items():
+        rgb = np.zeros(depth_frames[0].shape + (3,), dtype=np.uint8)
+        for mode in modes:
+            random.seed(seed)
+            with _quiet():
+                nav = DepthNavigator(**NAVIGATOR_MODES[mode])
+                results[f'navigator/{mode}/{scene}'] = measure(
+                    lambda depth: nav.get_navigation_command(rgb, depth), depth_frames,
+                    frames, warmup, track_allocations)
+    return results
+
+
+def run_face(image_paths, known_faces_dir='known-faces', frames=30, warmup=3, case='face/recognize_faces'):
+    """
+    Benchmark FaceRecognitionService.recognize_faces on real photos.
+
+    Args:
+        image_paths: Photo paths, or BGR frames (e.g. Recording.rgb_frames())
+
+    Returns:
+        dict: {case: measure() result}
+    """
+    import cv2
+    from smart_assistant import FaceRecognitionService
+
+    images = [p if isinstance(p, np.ndarray) else cv2.imread(str(p)) for p in image_paths]
+    images = [img for img in images if img is not None]
+    if not images:
+        raise ValueError("No readable images for the face benchmark")
+    service = FaceRecognitionService(known_faces_dir=known_faces_dir)
+    return {case: measure(service.recognize_faces, images, frames, warmup)}
+
+
+def run_llava(model_path, mmproj_path, image_paths=None, frames=5, warmup=1, seed=0):
+    """
+    Benchmark one LLaVA navigation call end to end (encode + prefill + decode).
+
+    Uses the given photos, or random-noise images when none are given.
+    Allocation tracking is off: the model allocates in C++ where
+    tracemalloc cannot see it.
+
+    Returns:
+        dict: {'llava/get_navigation_command': measure() result}
+    """
+    from PIL import Image
+    from llava_cpp_navigator import LLaVACppNavigator
+
+    if image_paths:
+        images = [Image.open(p).convert('RGB') for p in image_paths]
+    else:
+        rng = np.random.default_rng(seed)
+        images = [Image.fromarray(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+                  for _ in range(max(frames, 1))]
+    navigator = LLaVACppNavigator(model_path, mmproj_path)
+    try:
+        result = measure(navigator.get_navigation_command, images, frames, warmup,
+                         track_allocations=False)
+    finally:
+        navigator.cleanup()
+    return {'llava/get_navigation_command': result}
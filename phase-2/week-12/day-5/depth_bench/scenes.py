@@ -0,0 +1,177 @@
+"""
+Synthetic depth scenes
+Renders uint16 depth frames (mm, 0 = no data) the way the Oak-D sees
+them: Z depth along the optical axis from a pinhole camera mounted
+camera_height_m above a flat floor. Every generator takes a numpy
+Generator so a seed reproduces the exact same frames.
+"""
+import numpy as np
+
+from depth_zone_stats import MAX_VALID_MM
+from polar_histogram import OAKD_HFOV_DEG
+
+
+# 400P mono resolution, which is what the stereo node outputs
+DEFAULT_SHAPE = (400, 640)
+CAMERA_HEIGHT_M = 0.20
+# Far wall of "open" scenes, just outside the valid depth range
+FAR_M = 6.0
+
+
+class SceneCanvas:
+    """
+    Z-buffer for one frame. Surfaces are drawn with a per-pixel minimum,
+    so nearer surfaces hide farther ones.
+    """
+
+    def __init__(self, shape=DEFAULT_SHAPE, hfov_deg=OAKD_HFOV_DEG, camera_height_m=CAMERA_HEIGHT_M):
+        h, w = shape
+        fx = (w / 2) / np.tan(np.radians(hfov_deg / 2))
+        # Ray slopes: X (right) = Z * ray_x, Y (down) = Z * ray_y
+        self.ray_x = ((np.arange(w) + 0.5 - w / 2) / fx)[None, :]
+        self.ray_y = ((np.arange(h) + 0.5 - h / 2) / fx)[:, None]
+        self.camera_height_m = camera_height_m
+        self.z = np.full(shape, np.inf)
+
+    def floor(self):
+        """Flat floor under the camera."""
+        with np.errstate(divide='ignore'):
+            z = np.where(self.ray_y > 0, self.camera_height_m / self.ray_y, np.inf)
+        np.minimum(self.z, z, out=self.z)
+
+    def side_walls(self, half_width_m, offset_m=0.0):
+        """Two parallel walls along the driving direction."""
+        with np.errstate(divide='ignore'):
+            right = np.where(self.ray_x > 0, (half_width_m + offset_m) / self.ray_x, np.inf)
+            left = np.where(self.ray_x < 0, (half_width_m - offset_m) / -self.ray_x, np.inf)
+        np.minimum(self.z, np.minimum(left, right), out=self.z)
+
+    def front_wall(self, distance_m, gap=None):
+        """
+        Wall facing the camera.
+
+        Args:
+            distance_m: Distance to the wall
+            gap: Optional (left_m, right_m) opening, like a doorway
+        """
+        z = np.full(self.z.shape, float(distance_m))
+        if gap is not None:
+            x = self.ray_x * distance_m
+            z[:, ((x >= gap[0]) & (x <= gap[1]))[0]] = np.inf
+        np.minimum(self.z, z, out=self.z)
+
+    def box(self, x_m, distance_m, width_m, height_m):
+        """Front face of a box standing on the floor, centered at x_m."""
+        x = self.ray_x[0] * distance_m
+        y = self.ray_y[:, 0] * distance_m
+        cols = (x >= x_m - width_m / 2) & (x <= x_m + width_m / 2)
+        rows = (y <= self.camera_height_m) & (y >= self.camera_height_m - height_m)
+        face = self.z[np.ix_(rows, cols)]
+        self.z[np.ix_(rows, cols)] = np.minimum(face, distance_m)
+
+    def render(self):
+        """Depth in millimeters; nothing hit or out of range -> 0."""
+        mm = np.round(self.z * 1000)
+        mm[~np.isfinite(mm) | (mm >= np.iinfo(np.uint16).max)] = 0
+        return mm.astype(np.uint16)
+
+
+def _stereo_noise(depth, rng, rel_sigma=0.01, speckle=0.0, dropout=0.0):
+    """Depth-proportional noise, random speckles and dropped pixels."""
+    valid = depth > 0
+    d = depth.astype(np.float64)
+    # Stereo error grows with the square of the distance
+    d += rng.standard_normal(d.shape) * rel_sigma * d * (d / 1000.0)
+    if speckle:
+        hit = rng.random(d.shape) < speckle
+        d[hit] = rng.uniform(200, MAX_VALID_MM, np.count_nonzero(hit))
+    out = np.clip(np.round(d), 0, MAX_VALID_MM * 2).astype(np.uint16)
+    out[~valid] = 0
+    if dropout:
+        out[rng.random(d.shape) < dropout] = 0
+    return out
+
+
+def corridor(rng, shape=DEFAULT_SHAPE):
+    """Straight hallway, open ahead."""
+    canvas = SceneCanvas(shape)
+    canvas.floor()
+    canvas.side_walls(rng.uniform(0.5, 0.9), offset_m=rng.uniform(-0.2, 0.2))
+    canvas.front_wall(FAR_M)
+    return _stereo_noise(canvas.render(), rng)
+
+
+def doorway(rng, shape=DEFAULT_SHAPE):
+    """Wall ahead with a door-sized opening and a room behind it."""
+    canvas = SceneCanvas(shape)
+    canvas.floor()
+    center = rng.uniform(-0.6, 0.6)
+    canvas.front_wall(rng.uniform(1.0, 2.0), gap=(center - 0.4, center + 0.4))
+    canvas.front_wall(rng.uniform(3.0, 4.5))
+    return _stereo_noise(canvas.render(), rng)
+
+
+def wall(rng, shape=DEFAULT_SHAPE):
+    """Blank wall right in front of the rover."""
+    canvas = SceneCanvas(shape)
+    canvas.floor()
+    canvas.front_wall(rng.uniform(0.3, 0.7))
+    return _stereo_noise(canvas.render(), rng)
+
+
+def clutter(rng, shape=DEFAULT_SHAPE):
+    """Room with boxes, chairs and bins scattered around."""
+    canvas = SceneCanvas(shape)
+    canvas.floor()
+    canvas.side_walls(1.5)
+    canvas.front_wall(rng.uniform(3.0, 4.5))
+    for _ in range(rng.integers(6, 13)):
+        canvas.box(rng.uniform(-1.2, 1.2), rng.uniform(0.5, 3.0),
+                   rng.uniform(0.05, 0.5), rng.uniform(0.1, 0.8))
+    return _stereo_noise(canvas.render(), rng)
+
+
+def noisy(rng, shape=DEFAULT_SHAPE):
+    """Cluttered room with heavy stereo noise, speckles and dropouts."""
+    depth = clutter(rng, shape)
+    return _stereo_noise(depth, rng, rel_sigma=0.04, speckle=0.02, dropout=0.10)
+
+
+def invalid_heavy(rng, shape=DEFAULT_SHAPE):
+    """Corridor where most of the frame has no depth (glare, bare walls)."""
+    depth = corridor(rng, shape)
+    h, w = shape
+    # Knock out large blocks, then sprinkle single-pixel dropouts
+    for _ in range(rng.integers(8, 16)):
+        y, x = rng.integers(0, h), rng.integers(0, w)
+        depth[y:y + rng.integers(h // 8, h // 2), x:x + rng.integers(w // 8, w // 3)] = 0
+    depth[rng.random(shape) < 0.3] = 0
+    return depth
+
+
+SCENES = {
+    'corridor': corridor,
+    'doorway': doorway,
+    'wall': wall,
+    'clutter': clutter,
+    'noisy': noisy,
+    'invalid_heavy': invalid_heavy
+}
+
+
+def make_frames(scene, n_frames, shape=DEFAULT_SHAPE, seed=0):
+    """
+    Render a stack of varied frames of one scene.
+
+    Args:
+        scene: Name in SCENES
+        n_frames: Number of distinct frames
+        shape: (H, W) frame size
+        seed: RNG seed (same seed -> same frames)
+
+    Returns:
+        np.ndarray: (n_frames, H, W) uint16 depth in millimeters
+    """
+    rng = np.random.default_rng(seed)
+    generator = SCENES[scene]
+    return np.stack([generator(rng, shape) for _ in range(n_frames)])
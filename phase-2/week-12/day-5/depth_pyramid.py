@@ -0,0 +1,88 @@
+"""
+Min-pooled depth pyramid
+Each level keeps the NEAREST valid depth of every block, so thin
+obstacles (chair legs, poles) survive decimation. 0 (no data) never
+wins the minimum.
+"""
+import numpy as np
+
+
+def max_pool2(depth):
+    """
+    2x2 max pooling, used to drop single-pixel stereo speckles.
+
+    An isolated too-near pixel is replaced by its neighbours, while any
+    obstacle at least 3 pixels wide still fills a whole 2x2 block.
+    """
+    h, w = depth.shape
+    d = depth[:h - h % 2, :w - w % 2]
+    return np.maximum(np.maximum(d[0::2, 0::2], d[0::2, 1::2]),
+                      np.maximum(d[1::2, 0::2], d[1::2, 1::2]))
+
+
+def min_pool(depth, factor=2, despeckle=False):
+    """
+    Valid-aware min pooling over factor x factor blocks.
+
+    Rows/columns that do not fill a whole block are dropped. The two
+    axes are reduced one after the other, which is much cheaper than a
+    single 4D reduction.
+
+    Args:
+        depth: (H, W) uint16 depth in millimeters, 0 = no data
+        factor: Block size
+        despeckle: Apply max_pool2 first (factor must then be even)
+
+    Returns:
+        np.ndarray: (H // factor, W // factor) uint16, 0 where a block had no data
+    """
+    if despeckle:
+        depth = max_pool2(depth)
+        factor //= 2
+    h, w = depth.shape
+    h2, w2 = h // factor, w // factor
+    block = depth[:h2 * factor, :w2 * factor].astype(np.uint16, copy=False)
+    # uint16 wrap-around: 0 -> 65535 so missing data never wins, +1 wraps it back to 0
+    shifted = block - np.uint16(1)
+    rows = shifted.reshape(h2, factor, w2 * factor).min(axis=1)
+    pooled = rows.reshape(h2, w2, factor).min(axis=2)
+    pooled += np.uint16(1)
+    return pooled
+
+
+def count_pool(mask, factor):
+    """
+    Number of True pixels per factor x factor block (same blocks as min_pool).
+
+    min_pool says how near a block is but not how much data backs it:
+    with despeckling, a single valid pixel fills a whole block. Pooling
+    the full-resolution valid mask next to it keeps the real coverage.
+
+    Args:
+        mask: (H, W) bool, e.g. valid depth pixels
+        factor: Block size
+
+    Returns:
+        np.ndarray: (H // factor, W // factor) int64 counts
+    """
+    h, w = mask.shape
+    h2, w2 = h // factor, w // factor
+    block = mask[:h2 * factor, :w2 * factor]
+    return block.reshape(h2, factor, w2, factor).sum(axis=(1, 3))
+
+
+def min_pyramid(depth, levels=3):
+    """
+    Build a min-pooled pyramid.
+
+    Args:
+        depth: (H, W) depth in millimeters
+        levels: Number of 2x decimation steps
+
+    Returns:
+        list: [full_res, 1/2, 1/4, ...] with levels + 1 entries
+    """
+    pyramid = [depth]
+    for _ in range(levels):
+        pyramid.append(min_pool(pyramid[-1], 2))
+    return pyramid
@@ -0,0 +1,289 @@
+"""
+Zone statistics engine for depth strips
+Computes valid-pixel count, min and quantiles (median) for every zone
+in one vectorized pass - no per-zone masks, copies or sorts.
+"""
+import cv2
+import numpy as np
+
+
+# Same validity window DepthNavigator has always used (mm)
+MIN_VALID_MM = 1
+MAX_VALID_MM = 5000
+
+
+def fifths(width):
+    """Column edges for the classic 5 regions (far_left ... far_right)."""
+    return [0, width // 5, 2 * width // 5, 3 * width // 5, 4 * width // 5, width]
+
+
+class ZoneStatsEngine:
+    """
+    Per-zone depth statistics using a single histogram pass.
+
+    Every valid pixel is mapped to bin (zone * n_bins + depth) through a
+    precomputed column-to-zone table, then one np.bincount builds all
+    zone histograms at once. Count, min and any quantile fall out of the
+    cumulative histogram. Results match np.median / np.quantile exactly
+    for integer depth frames (uint16 from the Oak-D).
+    """
+
+    def __init__(self, zone_edges_fn=fifths, max_depth_mm=MAX_VALID_MM,
+                 min_depth_mm=MIN_VALID_MM, batch_bins_limit=250_000):
+        """
+        Args:
+            zone_edges_fn: Function width -> list of column edges (len = zones + 1)
+            max_depth_mm: Depths >= this are treated as invalid
+            min_depth_mm: Depths < this are treated as invalid (0 = no data)
+            batch_bins_limit: Max histogram size per bincount call in batch mode
+        """
+        self.zone_edges_fn = zone_edges_fn
+        self.max_depth_mm = int(max_depth_mm)
+        self.min_depth_mm = int(min_depth_mm)
+        self.n_bins = self.max_depth_mm + 1  # last bin collects invalid pixels
+        self.batch_bins_limit = batch_bins_limit
+
+        self._width = None
+        self.edges = None
+        self.n_zones = 0
+        self._col_offset = None
+
+    def _prepare(self, width):
+        """Build the column -> zone bin offset table (once per frame width)."""
+        if width == self._width:
+            return
+        edges = np.asarray(self.zone_edges_fn(width), dtype=np.int64)
+        if edges[0] != 0 or edges[-1] != width or np.any(np.diff(edges) <= 0):
+            raise ValueError(f"Invalid zone edges for width {width}: {edges.tolist()}")
+
+        zone_of_col = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+        self._col_offset = (zone_of_col * self.n_bins).astype(np.int32)
+        self.edges = edges
+        self.n_zones = len(edges) - 1
+        self._width = width
+
+    def _bin_index(self, depth):
+        """Map (..., H, W) depth to histogram bin indices; invalid -> dump bin."""
+        # Clamp first so too-far pixels land in the dump bin, then catch "no data"
+        d = np.minimum(depth, self.max_depth_mm).astype(np.int32)
+        d[d < self.min_depth_mm] = self.max_depth_mm
+        d += self._col_offset
+        return d
+
+    def _histograms(self, depth, n_frames):
+        """Return (n_frames, zones, bins) histograms for a (N, H, W) stack."""
+        per_frame = self.n_zones * self.n_bins
+        idx = self._bin_index(depth)
+        idx += (np.arange(n_frames, dtype=np.int32) * per_frame)[:, None, None]
+        hist = np.bincount(idx.ravel(), minlength=n_frames * per_frame)
+        return hist.reshape(n_frames, self.n_zones, self.n_bins)
+
+    def _stats_from_hist(self, hist, quantiles):
+        """
+        Derive count / min / quantiles from (N, Z, B) histograms.
+
+        The last bin holds invalid pixels and is dropped. All rank lookups
+        are done with one searchsorted on a flattened, row-offset cumsum.
+        """
+        valid = hist[..., :-1]
+        rows = valid.reshape(-1, valid.shape[-1])
+        cum = np.cumsum(rows, axis=1)
+        counts = cum[:, -1]
+
+        # Offset every row so the flattened cumsum is globally non-decreasing
+        stride = int(counts.max()) + 1 if counts.size else 1
+        row_off = np.arange(rows.shape[0], dtype=np.int64) * stride
+        flat = (cum + row_off[:, None]).ravel()
+        n_b = rows.shape[1]
+
+        def value_at_rank(rank):
+            # Depth value of the rank-th (0-based) smallest valid pixel
+            pos = np.searchsorted(flat, row_off + rank + 1, side='left')
+            return (pos - np.arange(rows.shape[0]) * n_b).astype(np.float64)
+
+        has = counts > 0
+        safe_counts = np.maximum(counts, 1)
+
+        out_shape = hist.shape[:-1]
+        result = {
+            'count': counts.reshape(out_shape),
+            'min': np.where(has, value_at_rank(np.zeros_like(counts)), 0.0).reshape(out_shape),
+        }
+
+        for q in quantiles:
+            # Linear interpolation, same as np.quantile's default method
+            pos = q * (safe_counts - 1)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, safe_counts - 1)
+            v_lo = value_at_rank(lo)
+            v_hi = value_at_rank(hi)
+            val = v_lo + (pos - lo) * (v_hi - v_lo)
+            result[q] = np.where(has, val, 0.0).reshape(out_shape)
+
+        return result
+
+    def compute(self, depth_strip, quantiles=(0.5,)):
+        """
+        Statistics for every zone of one depth strip.
+
+        Args:
+            depth_strip: (H, W) depth in millimeters
+            quantiles: Quantiles to compute (0.5 = median)
+
+        Returns:
+            dict: 'count', 'min' and one entry per quantile, each an array
+                  of shape (zones,). Zones without valid pixels get 0.
+        """
+        if depth_strip.ndim != 2:
+            raise ValueError(f"Expected (H, W) strip, got shape {depth_strip.shape}")
+        self._prepare(depth_strip.shape[1])
+        hist = self._histograms(depth_strip[None], 1)
+        stats = self._stats_from_hist(hist, quantiles)
+        return {k: v[0] for k, v in stats.items()}
+
+    def compute_batch(self, depth_strips, quantiles=(0.5,)):
+        """
+        Statistics for a stack of depth strips (replays, benchmarks).
+
+        Args:
+            depth_strips: (N, H, W) depth in millimeters
+            quantiles: Quantiles to compute (0.5 = median)
+
+        Returns:
+            dict: Same keys as compute(), each an array of shape (N, zones)
+        """
+        if depth_strips.ndim != 3:
+            raise ValueError(f"Expected (N, H, W) stack, got shape {depth_strips.shape}")
+        n = depth_strips.shape[0]
+        self._prepare(depth_strips.shape[2])
+
+        # Chunk so a single bincount never exceeds batch_bins_limit bins
+        per_frame = self.n_zones * self.n_bins
+        chunk = max(1, self.batch_bins_limit // per_frame)
+        parts = []
+        for start in range(0, n, chunk):
+            block = depth_strips[start:start + chunk]
+            hist = self._histograms(block, block.shape[0])
+            parts.append(self._stats_from_hist(hist, quantiles))
+
+        if not parts:
+            empty = np.zeros((0, self.n_zones))
+            return {k: empty for k in ('count', 'min', *quantiles)}
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def clearance_scores(medians, counts, min_valid_pixels=50, min_safe_mm=400, max_clear_mm=2000,
+                     out=None):
+    """
+    Vectorized version of DepthNavigator's linear clearance score.
+
+    400mm=0.3, 800mm=0.475, 2000mm+=1.0; below min_safe_mm or with too
+    few valid pixels the zone scores 0.
+
+    Args:
+        medians: Median depth per zone (any shape)
+        counts: Valid pixel count per zone (same shape)
+        out: Optional float64 array to write the scores into
+
+    Returns:
+        np.ndarray: Scores in [0, 1]
+    """
+    if out is not None:
+        np.subtract(medians, min_safe_mm, out=out)
+        out /= max_clear_mm - min_safe_mm
+        np.minimum(out, 1.0, out=out)
+        out *= 0.7
+        out += 0.3
+        out[(counts <= min_valid_pixels) | (medians < min_safe_mm)] = 0.0
+        return out
+    medians = np.asarray(medians, dtype=np.float64)
+    normalized = np.minimum((medians - min_safe_mm) / (max_clear_mm - min_safe_mm), 1.0)
+    scores = 0.3 + normalized * 0.7
+    ok = (np.asarray(counts) > min_valid_pixels) & (medians >= min_safe_mm)
+    return np.where(ok, scores, 0.0)
+
+
+class PreallocatedZoneStats:
+    """
+    Per-zone valid count and median without per-frame allocations.
+
+    Gives the same counts and medians as ZoneStatsEngine.compute(), but
+    each zone histogram is filled in place by cv2.calcHist (1mm bins over
+    the valid range, so invalid pixels are never counted) and ranks are
+    looked up in a preallocated cumulative histogram. Buffers are
+    allocated once per strip width. compute() returns arrays owned by the
+    engine, which the next call overwrites.
+    """
+
+    def __init__(self, zone_edges_fn=fifths, max_depth_mm=MAX_VALID_MM, min_depth_mm=MIN_VALID_MM):
+        """
+        Args:
+            zone_edges_fn: Function width -> list of column edges (len = zones + 1)
+            max_depth_mm: Depths >= this are treated as invalid
+            min_depth_mm: Depths < this are treated as invalid (0 = no data)
+        """
+        self.zone_edges_fn = zone_edges_fn
+        self.min_depth_mm = int(min_depth_mm)
+        self.n_bins = int(max_depth_mm) - self.min_depth_mm
+        # calcHist arguments, kept so no lists are built per call
+        self._channels = [0]
+        self._hist_size = [self.n_bins]
+        self._ranges = [self.min_depth_mm, int(max_depth_mm)]
+        self._image = [None]
+
+        self._width = None
+        self.edges = None
+        self.n_zones = 0
+
+    def _allocate(self, width):
+        edges = np.asarray(self.zone_edges_fn(width), dtype=np.int64)
+        if edges[0] != 0 or edges[-1] != width or np.any(np.diff(edges) <= 0):
+            raise ValueError(f"Invalid zone edges for width {width}: {edges.tolist()}")
+        self.edges = edges
+        self.n_zones = len(edges) - 1
+        self._zone_cols = [slice(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+        # float32 counts are exact up to 2^24 pixels per zone
+        self._hist = np.zeros((self.n_zones, self.n_bins, 1), dtype=np.float32)
+        self._cum = np.zeros((self.n_zones, self.n_bins), dtype=np.float32)
+        self._ranks = np.zeros(2, dtype=np.float32)
+        self.medians = np.zeros(self.n_zones)
+        self.counts = np.zeros(self.n_zones, dtype=np.int64)
+        self._width = width
+
+    def compute(self, depth_strip):
+        """
+        Valid count and median depth of every zone.
+
+        Args:
+            depth_strip: (H, W) uint16 depth in millimeters
+
+        Returns:
+            tuple: (medians, counts), each shape (zones,); zones without
+                   valid pixels get median 0
+        """
+        if depth_strip.shape[1] != self._width:
+            self._allocate(depth_strip.shape[1])
+
+        image = self._image
+        for i in range(self.n_zones):
+            image[0] = depth_strip[:, self._zone_cols[i]]
+            cv2.calcHist(image, self._channels, None, self._hist_size, self._ranges,
+                         hist=self._hist[i])
+        image[0] = None
+        np.cumsum(self._hist[:, :, 0], axis=1, out=self._cum)
+
+        ranks = self._ranks
+        for i in range(self.n_zones):
+            cum = self._cum[i]
+            n = int(cum[-1])
+            self.counts[i] = n
+            if n == 0:
+                self.medians[i] = 0.0
+                continue
+            # Middle ranks, same linear interpolation as np.median
+            ranks[0] = (n - 1) // 2
+            ranks[1] = n // 2
+            lo, hi = cum.searchsorted(ranks, side='right')
+            self.medians[i] = (lo + hi) / 2 + self.min_depth_mm
+
+        return self.medians, self.counts
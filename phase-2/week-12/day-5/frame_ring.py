@@ -0,0 +1,285 @@
+"""
+Preallocated frame ring shared between threads
+The capture thread fills RGB / depth slots in place instead of allocating
+new arrays and pushing tuples through a queue.Queue. Readers pin the
+newest slot and get read-only views plus a sequence number; the writer
+never touches a pinned slot, so views stay valid while they are held.
+
+Consumers with different needs subscribe with their own policy: reading
+never removes a frame, so a slow consumer cannot take frames away from
+a fast one, and every subscriber counts the frames it missed.
+"""
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+
+class RingFrame:
+    """Read-only views of one published slot (valid until the read context exits)."""
+
+    __slots__ = ('seq', 'timestamp', 'published_at', 'slot', '_views')
+
+    def __init__(self, views, slot=-1):
+        self.seq = -1
+        self.timestamp = 0.0
+        self.published_at = 0.0  # time.monotonic() when the writer published it
+        self.slot = slot
+        self._views = views
+
+    def __getitem__(self, name):
+        return self._views[name]
+
+    def __contains__(self, name):
+        return name in self._views
+
+
+class FrameSubscriber:
+    """
+    One consumer's cursor into a FrameRing.
+
+    Policies:
+        'every':  the next frame after the last one read, as long as the
+                  ring still holds it (else the oldest newer one); use for
+                  loops that must see every frame, like the navigator
+        'latest': the newest frame; use for slow consumers that only care
+                  about the current view, like LLaVA
+
+    dropped counts published frames this subscriber never got (for
+    'latest' that includes the ones it skipped on purpose).
+    """
+
+    POLICIES = ('every', 'latest')
+
+    def __init__(self, ring, name, policy='latest'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {self.POLICIES}")
+        self.ring = ring
+        self.name = name
+        self.policy = policy
+        self.last_seq = ring.seq  # frames published before subscribing are not drops
+        self.received = 0
+        self.dropped = 0
+        # Time the frames waited in the ring before this subscriber took them
+        self.last_wait_s = 0.0
+        self.total_wait_s = 0.0
+
+    def read(self, timeout=None):
+        """
+        Pin this subscriber's next frame for the duration of a with block.
+
+        Yields:
+            RingFrame, or None on timeout / after close()
+        """
+        return self.ring._read(self, self.last_seq, timeout)
+
+    def stats(self):
+        mean_wait_ms = self.total_wait_s / self.received * 1000 if self.received else 0.0
+        return {'policy': self.policy, 'received': self.received, 'dropped': self.dropped,
+                'mean_wait_ms': mean_wait_ms}
+
+
+class FrameRing:
+    """
+    Single-writer, multi-reader ring of preallocated frame slots.
+
+    Usage:
+        ring = FrameRing(slots=4)
+
+        # capture thread
+        with ring.write({'rgb': ((480, 640, 3), np.uint8), 'depth': ((480, 640), np.uint16)}) as bufs:
+            np.copyto(bufs['depth'], depth)
+
+        # consumer threads, one subscriber each
+        nav = ring.subscribe('nav', policy='every')
+        with nav.read(timeout=1.0) as frame:
+            if frame is not None:
+                use(frame['rgb'], frame['depth'])
+
+    The lock only guards slot bookkeeping (a few attribute updates per
+    frame), never a copy. With N slots the writer always finds a free
+    slot as long as fewer than N - 1 readers hold a frame at once;
+    otherwise the frame is dropped and counted in self.dropped.
+    """
+
+    def __init__(self, slots=4, allocator=None):
+        """
+        Args:
+            slots: Preallocated slots (newest + one per concurrent reader + one to write)
+            allocator: (shape, dtype) -> zeroed writable array, used instead of
+                       np.zeros (e.g. arrays in shared memory, see camera_daemon)
+        """
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.n_slots = slots
+        self.allocator = allocator or np.zeros
+        self.specs = None
+        self._buffers = []   # per slot: {name: writable array}
+        self._frames = []    # per slot: RingFrame with read-only views
+        self._readers = [0] * slots
+        self._latest = -1    # slot index of the newest published frame
+        self._seq = -1
+        self._closed = False
+        self._cond = threading.Condition()
+        self.published = 0
+        self.dropped = 0
+        self.subscribers = {}
+
+    @property
+    def seq(self):
+        """Sequence number of the newest published frame (-1 before the first)."""
+        return self._seq
+
+    def _allocate(self, specs):
+        buffers, frames = [], []
+        for slot in range(self.n_slots):
+            arrays = {name: self.allocator(shape, dtype) for name, (shape, dtype) in specs.items()}
+            views = {}
+            for name, arr in arrays.items():
+                view = arr.view()
+                view.flags.writeable = False
+                views[name] = view
+            buffers.append(arrays)
+            frames.append(RingFrame(views, slot))
+        # Readers still holding old slots keep their arrays alive through the views
+        self._buffers, self._frames = buffers, frames
+        self._readers = [0] * self.n_slots
+        self._latest = -1
+        self.specs = dict(specs)
+
+    @contextlib.contextmanager
+    def write(self, specs, timestamp=0.0):
+        """
+        Fill one slot in place and publish it when the block exits cleanly.
+
+        Args:
+            specs: {name: (shape, dtype)}; slots are (re)allocated when this
+                   changes (first frame, resolution change)
+            timestamp: Stored with the frame (e.g. device timestamp in seconds)
+
+        Yields:
+            dict: {name: writable array}, or None if every slot is pinned
+                  (the frame is dropped)
+        """
+        with self._cond:
+            if specs != self.specs:
+                self._allocate(specs)
+            slot = self._free_slot()
+            if slot is not None:
+                # The slot's old frame is gone from here on: no reader may pick it
+                # while it is overwritten (if the block raises it stays empty)
+                self._frames[slot].seq = -1
+        if slot is None:
+            self.dropped += 1
+            yield None
+            return
+
+        yield self._buffers[slot]
+
+        with self._cond:
+            self._seq += 1
+            frame = self._frames[slot]
+            frame.seq = self._seq
+            frame.timestamp = timestamp
+            frame.published_at = time.monotonic()
+            self._latest = slot
+            self.published += 1
+            self._cond.notify_all()
+
+    def can_write(self):
+        """False if write() would drop the next frame now (every slot pinned)."""
+        with self._cond:
+            return self.specs is None or self._free_slot() is not None
+
+    def _free_slot(self):
+        # Oldest unpinned slot that is not the newest frame
+        best = None
+        for i in range(self.n_slots):
+            if i == self._latest or self._readers[i]:
+                continue
+            if best is None or self._frames[i].seq < self._frames[best].seq:
+                best = i
+        return best
+
+    def subscribe(self, name, policy='latest'):
+        """
+        Register a consumer with its own cursor and drop counter.
+
+        Returns:
+            FrameSubscriber
+        """
+        with self._cond:
+            subscriber = FrameSubscriber(self, name, policy)
+            self.subscribers[name] = subscriber
+            return subscriber
+
+    def unsubscribe(self, name):
+        """Forget a consumer (frames it holds stay pinned until its read exits)."""
+        with self._cond:
+            self.subscribers.pop(name, None)
+
+    def stats(self):
+        """{'published', 'dropped' (all slots pinned), per-subscriber stats}"""
+        return {'published': self.published, 'dropped': self.dropped,
+                'subscribers': {name: sub.stats() for name, sub in self.subscribers.items()}}
+
+    def read(self, after_seq=-1, timeout=None):
+        """
+        Pin the newest frame for the duration of a with block (no subscriber).
+
+        Args:
+            after_seq: Wait for a frame newer than this sequence number
+            timeout: Seconds to wait (None = forever)
+
+        Yields:
+            RingFrame, or None on timeout / after close()
+        """
+        return self._read(None, after_seq, timeout)
+
+    def _latest_seq(self):
+        # Not self._seq: right after a reallocation no slot holds a frame yet
+        return self._frames[self._latest].seq if self._latest >= 0 else -1
+
+    def _pick_slot(self, subscriber, after_seq):
+        if subscriber is None or subscriber.policy == 'latest':
+            return self._latest
+        # 'every': the oldest frame still in the ring that is newer than after_seq
+        # (a slot being written has seq -1)
+        best = None
+        for i, frame in enumerate(self._frames):
+            if frame.seq > after_seq and (best is None or frame.seq < self._frames[best].seq):
+                best = i
+        return best
+
+    @contextlib.contextmanager
+    def _read(self, subscriber, after_seq, timeout):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self._latest_seq() > after_seq, timeout):
+                slot = None
+            else:
+                slot = None if self._closed else self._pick_slot(subscriber, after_seq)
+            if slot is not None:
+                self._readers[slot] += 1
+                frames, readers = self._frames, self._readers
+                if subscriber is not None:
+                    seq = frames[slot].seq
+                    subscriber.dropped += seq - after_seq - 1
+                    subscriber.last_seq = seq
+                    subscriber.received += 1
+                    subscriber.last_wait_s = time.monotonic() - frames[slot].published_at
+                    subscriber.total_wait_s += subscriber.last_wait_s
+        if slot is None:
+            yield None
+            return
+        try:
+            yield frames[slot]
+        finally:
+            with self._cond:
+                readers[slot] -= 1
+
+    def close(self):
+        """Wake up every waiting reader (they get None)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
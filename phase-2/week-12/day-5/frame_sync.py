@@ -0,0 +1,74 @@
+"""
+Host-side RGB / depth frame pairing
+The RGB preview and the stereo depth arrive on separate XLink queues, so
+two independent get() calls can return frames from different moments.
+FrameSynchronizer buffers the last few messages of each stream and
+pairs them by device sequence number and timestamp; the camera always
+takes the newest matched pair.
+"""
+from collections import deque
+
+
+def message_key(msg):
+    """(timestamp in seconds, sequence number) of a depthai message."""
+    return msg.getTimestamp().total_seconds(), msg.getSequenceNum()
+
+
+class FrameSynchronizer:
+    """
+    Small matching buffer for two streams.
+
+    A pair matches when the timestamps are within threshold_ms; among
+    candidates, the same sequence number wins (hardware-synced sensors),
+    then the smallest time difference. Once a pair is taken, everything
+    older in both buffers is dropped: it can never be returned anymore.
+    """
+
+    def __init__(self, streams=('rgb', 'depth'), threshold_ms=20.0, max_pending=8):
+        """
+        Args:
+            streams: Names of the two streams, in the order pairs are returned
+            threshold_ms: Largest timestamp difference of a matched pair
+            max_pending: Messages kept per stream while waiting for a partner
+        """
+        self.streams = tuple(streams)
+        self.threshold_s = threshold_ms / 1000.0
+        self._pending = {name: deque(maxlen=max_pending) for name in self.streams}
+
+    def add(self, stream, msg):
+        """Buffer one message (the oldest falls out when the buffer is full)."""
+        t, seq = message_key(msg)
+        self._pending[stream].append((t, seq, msg))
+
+    def newest_pair(self):
+        """
+        Take the newest matched pair.
+
+        Returns:
+            tuple: (first_msg, second_msg, skew_ms), or None if nothing matches yet
+        """
+        first, second = (self._pending[name] for name in self.streams)
+        for i in range(len(first) - 1, -1, -1):
+            t, seq, _ = first[i]
+            best = None
+            for j, (t2, seq2, _) in enumerate(second):
+                dt = abs(t2 - t)
+                if dt > self.threshold_s:
+                    continue
+                rank = (seq2 != seq, dt)
+                if best is None or rank < best[0]:
+                    best = (rank, j)
+            if best is not None:
+                j = best[1]
+                msg_a, msg_b = first[i][2], second[j][2]
+                skew_ms = (second[j][0] - t) * 1000.0
+                for _ in range(i + 1):
+                    first.popleft()
+                for _ in range(j + 1):
+                    second.popleft()
+                return msg_a, msg_b, skew_ms
+        return None
+
+    def clear(self):
+        for pending in self._pending.values():
+            pending.clear()
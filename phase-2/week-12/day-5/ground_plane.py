@@ -0,0 +1,223 @@
+"""
+Ground-plane model for full-frame obstacle detection
+Fits the floor once from depth frames of open floor (camera height and
+pitch), then classifies every pixel as floor / obstacle / overhang with
+per-row depth bands, so the whole frame can be analysed instead of the
+fixed middle strip.
+"""
+import json
+
+import numpy as np
+
+from depth_zone_stats import MIN_VALID_MM, MAX_VALID_MM
+from polar_histogram import OAKD_HFOV_DEG
+
+
+class GroundPlane:
+    """
+    Floor model of a camera with no roll.
+
+    A point at depth Z (along the optical axis) on image row v is at
+    height  h - Z * g(v)  above the floor, where g(v) = v_n*cos(pitch) +
+    sin(pitch) and v_n is the row's normalized image coordinate. Height
+    is monotonic in Z on every row, so the floor / obstacle / overhang
+    classes are three depth intervals per row. They are precomputed as
+    uint16 lookup tables (once per frame shape) and every frame is
+    classified with two comparisons per class. Invalid depth (0 or
+    >= MAX_VALID_MM) falls outside all intervals.
+    """
+
+    def __init__(self, camera_height_m=0.20, pitch_deg=0.0, hfov_deg=OAKD_HFOV_DEG,
+                 min_obstacle_height_m=0.05, max_obstacle_height_m=0.60):
+        """
+        Args:
+            camera_height_m: Camera height above the floor
+            pitch_deg: Downward tilt of the camera (negative = tilted up)
+            hfov_deg: Horizontal FOV of the depth frame (square pixels assumed)
+            min_obstacle_height_m: Anything lower is floor (bumps, cables, depth noise)
+            max_obstacle_height_m: Anything higher is an overhang the rover passes under
+        """
+        self.camera_height_m = camera_height_m
+        self.pitch_deg = pitch_deg
+        self.hfov_deg = hfov_deg
+        self.min_obstacle_height_m = min_obstacle_height_m
+        self.max_obstacle_height_m = max_obstacle_height_m
+        self.fit_rms_mm = None
+
+        self.shape = None
+        self.expected_floor_mm = None
+
+    def _prepare(self, shape):
+        """Per-row depth bands for one frame shape."""
+        if shape == self.shape:
+            return
+        h_px, w_px = shape
+        fy = (w_px / 2) / np.tan(np.radians(self.hfov_deg / 2))
+        v_n = (np.arange(h_px) + 0.5 - h_px / 2) / fy
+        pitch = np.radians(self.pitch_deg)
+        g = v_n * np.cos(pitch) + np.sin(pitch)
+        g[g == 0] = 1e-12  # exactly horizontal ray: height never changes
+
+        cam_h = self.camera_height_m
+        with np.errstate(divide='ignore'):
+            # Depth at which the row's ray reaches max / min obstacle height
+            z_top = (cam_h - self.max_obstacle_height_m) / g
+            z_low = (cam_h - self.min_obstacle_height_m) / g
+            self.expected_floor_mm = np.where(g > 0, cam_h / g * 1000, 0.0)
+
+        def to_mm(z):
+            return np.clip(np.rint(z * 1000), MIN_VALID_MM, MAX_VALID_MM).astype(np.uint16)[:, None]
+
+        near = to_mm(np.minimum(z_top, z_low))
+        far = to_mm(np.maximum(z_top, z_low))
+        start = np.full_like(near, MIN_VALID_MM)
+        end = np.full_like(near, MAX_VALID_MM)
+        # Rows looking down: near = high (overhang), far = low (floor); looking up it flips
+        down = (g > 0)[:, None]
+        self._obstacle = (near, far)
+        self._floor = (np.where(down, far, start), np.where(down, end, near))
+        self._overhang = (np.where(down, start, far), np.where(down, near, end))
+
+        self._floor_px = np.zeros(shape, dtype=bool)
+        self._obstacle_px = np.zeros(shape, dtype=bool)
+        self._overhang_px = np.zeros(shape, dtype=bool)
+        self._tmp = np.zeros(shape, dtype=bool)
+        self.shape = shape
+
+    def _band(self, depth, band, out):
+        lo, hi = band
+        np.greater_equal(depth, lo, out=out)
+        np.less(depth, hi, out=self._tmp)
+        out &= self._tmp
+        return out
+
+    def obstacle_mask(self, depth):
+        """
+        Pixels between min and max obstacle height.
+
+        Returns:
+            np.ndarray: (H, W) bool, reused by the next call
+        """
+        self._prepare(depth.shape)
+        return self._band(depth, self._obstacle, self._obstacle_px)
+
+    def classify(self, depth):
+        """
+        Split a depth frame into floor / obstacle / overhang.
+
+        Args:
+            depth: (H, W) depth in millimeters
+
+        Returns:
+            tuple: (floor, obstacle, overhang) bool masks, reused by the
+                   next call; invalid pixels are in none of them
+        """
+        self._prepare(depth.shape)
+        return (self._band(depth, self._floor, self._floor_px),
+                self._band(depth, self._obstacle, self._obstacle_px),
+                self._band(depth, self._overhang, self._overhang_px))
+
+    def fit(self, depth_frames, column_band=(0.3, 0.7), min_valid_fraction=0.5):
+        """
+        Calibrate camera height and pitch from frames of open floor.
+
+        Per row, the median depth over the central columns is taken; on
+        the floor 1/depth is linear in the row index. The line is seeded
+        on the bottom third of the frame (almost surely floor), then
+        refit on every row that agrees with it, so walls and furniture
+        near the horizon are ignored.
+
+        Args:
+            depth_frames: (H, W) or (N, H, W) depth in millimeters
+            column_band: Fraction of columns (left, right) to use
+            min_valid_fraction: Rows with fewer valid pixels are skipped
+
+        Returns:
+            GroundPlane: self
+        """
+        frames = np.asarray(depth_frames, dtype=np.float64)
+        if frames.ndim == 2:
+            frames = frames[None]
+        n, h_px, w_px = frames.shape
+        cols = frames[:, :, int(w_px * column_band[0]):int(w_px * column_band[1])]
+        per_row = cols.transpose(1, 0, 2).reshape(h_px, -1)
+        per_row[(per_row < MIN_VALID_MM) | (per_row >= MAX_VALID_MM)] = np.nan
+
+        enough = np.mean(~np.isnan(per_row), axis=1) >= min_valid_fraction
+        rows = np.flatnonzero(enough)
+        if rows.size == 0:
+            raise ValueError("No rows with enough valid depth to fit the floor")
+        inv_depth = 1000.0 / np.nanmedian(per_row[rows], axis=1)  # 1/m
+
+        use = rows >= h_px * 2 // 3
+        for _ in range(3):
+            if np.count_nonzero(use) < 10:
+                raise ValueError("Too few floor rows - calibrate on open floor")
+            a, b = np.polyfit(rows[use], inv_depth[use], 1)
+            residual = inv_depth - (a * rows + b)
+            spread = 1.4826 * np.median(np.abs(residual[use])) + 1e-4
+            use = np.abs(residual) < 3 * spread
+        if a <= 0:
+            raise ValueError("Fitted floor gets closer higher up in the image - not a floor")
+
+        # 1/Z = a*row + b  <=>  1/Z = (v_n*cos(pitch) + sin(pitch)) / h
+        fy = (w_px / 2) / np.tan(np.radians(self.hfov_deg / 2))
+        slope = a * fy
+        offset = a * (h_px / 2 - 0.5) + b
+        self.camera_height_m = float(1.0 / np.hypot(slope, offset))
+        self.pitch_deg = float(np.degrees(np.arctan2(offset, slope)))
+        fitted_mm = 1000.0 / (a * rows[use] + b)
+        measured_mm = 1000.0 / inv_depth[use]
+        self.fit_rms_mm = float(np.sqrt(np.mean((fitted_mm - measured_mm) ** 2)))
+        self.shape = None
+        return self
+
+    def to_dict(self):
+        return {
+            'camera_height_m': self.camera_height_m,
+            'pitch_deg': self.pitch_deg,
+            'hfov_deg': self.hfov_deg,
+            'min_obstacle_height_m': self.min_obstacle_height_m,
+            'max_obstacle_height_m': self.max_obstacle_height_m,
+            'fit_rms_mm': self.fit_rms_mm
+        }
+
+    def save(self, path):
+        """Store the calibration as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Load a calibration written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        fit_rms_mm = data.pop('fit_rms_mm', None)
+        plane = cls(**data)
+        plane.fit_rms_mm = fit_rms_mm
+        return plane
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Calibrate the floor model (rover on open floor)')
+    parser.add_argument('output', help='Calibration JSON to write')
+    parser.add_argument('--frames', type=int, default=30)
+    args = parser.parse_args()
+
+    from oakd_depth_navigator import OakDDepthCamera
+
+    camera = OakDDepthCamera(rgb=False)  # calibration only needs depth
+    camera.start()
+    try:
+        time.sleep(1.0)  # let auto exposure settle
+        frames = np.stack([camera.capture_frames()[1] for _ in range(args.frames)])
+    finally:
+        camera.close()
+
+    plane = GroundPlane().fit(frames)
+    plane.save(args.output)
+    print(f"[Ground] Camera height {plane.camera_height_m * 100:.1f}cm, pitch {plane.pitch_deg:+.1f}°, "
+          f"fit RMS {plane.fit_rms_mm:.0f}mm -> {args.output}")
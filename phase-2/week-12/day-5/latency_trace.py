@@ -0,0 +1,207 @@
+"""
+Photon-to-motor latency tracing
+Every frame the navigator acts on carries a trace: the device capture
+timestamp, when the capture thread published it into the FrameRing, when
+the navigator picked it up, when get_navigation_command() and the LLaVA
+arbitration finished, and when the motor command went out. Finished
+traces feed fixed-bin histograms per segment, so p50/p95/p99 of queueing
+time, compute time and total age at actuation are available at any time
+without keeping per-frame samples.
+
+Timestamps are host time.monotonic() seconds; DepthAI's getTimestamp()
+is already synced to that clock.
+"""
+import math
+import time
+
+import numpy as np
+
+from telemetry import get_telemetry
+
+
+# Trace points, in pipeline order
+STAGES = ('captured', 'published', 'read', 'navigated', 'arbitrated', 'actuated')
+STAGE_INDEX = {name: i for i, name in enumerate(STAGES)}
+
+# Histogram per segment: name -> (from stage, to stage)
+SEGMENTS = {
+    'transport': ('captured', 'published'),     # sensor -> XLink -> host copy into the ring
+    'queue': ('published', 'read'),             # waiting in the ring for the navigator
+    'compute': ('read', 'navigated'),           # DepthNavigator.get_navigation_command
+    'arbitration': ('navigated', 'arbitrated'), # LLaVA guidance vs depth command
+    'actuation': ('arbitrated', 'actuated'),    # costmap / emergency checks + motor write
+    'age': ('captured', 'actuated')             # total: frame age when the motors get it
+}
+
+
+class LatencyHistogram:
+    """
+    Log-spaced fixed-bin histogram of durations in ms.
+
+    20 bins per decade between min_ms and max_ms (~12% wide each), so
+    percentiles are good to a few percent at any scale; values outside
+    the range land in the first / last bin.
+    """
+
+    def __init__(self, min_ms=0.01, max_ms=10000.0, bins_per_decade=20):
+        self.min_ms = min_ms
+        self.bins_per_decade = bins_per_decade
+        n_bins = int(math.ceil(math.log10(max_ms / min_ms) * bins_per_decade))
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        if ms > self.min_ms:
+            i = min(int(math.log10(ms / self.min_ms) * self.bins_per_decade), len(self.counts) - 1)
+        else:
+            i = 0
+        self.counts[i] += 1
+        self.count += 1
+        self.total_ms += float(ms)
+        if ms > self.max_ms:
+            self.max_ms = float(ms)
+
+    def percentile(self, q):
+        """q-th percentile, interpolated (log scale) inside its bin (0 if empty)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        cumulative = np.cumsum(self.counts)
+        i = min(int(np.searchsorted(cumulative, rank)), len(self.counts) - 1)
+        below = cumulative[i] - self.counts[i]
+        fraction = (rank - below) / self.counts[i] if self.counts[i] else 1.0
+        value = self.min_ms * 10.0 ** ((i + fraction) / self.bins_per_decade)
+        return float(min(value, self.max_ms))
+
+    def summary(self):
+        mean = self.total_ms / self.count if self.count else 0.0
+        return {'count': self.count, 'mean_ms': mean, 'p50_ms': self.percentile(50),
+                'p95_ms': self.percentile(95), 'p99_ms': self.percentile(99), 'max_ms': self.max_ms}
+
+    def reset(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class LatencyTracer:
+    """
+    Per-frame trace of one control loop, from RingFrame to motor command.
+
+    Usage (in the navigation thread):
+        tracer = LatencyTracer()
+        with subscriber.read(timeout=1.0) as frame:
+            tracer.begin(frame)                  # captured / published / read
+            cmd = navigator.get_navigation_command(None, frame['depth'])
+            tracer.mark('navigated')
+        ... arbitration ...
+        tracer.mark('arbitrated')
+        rover._send(L, R)
+        tracer.actuate(label='forward')
+        print(tracer.format_report())
+
+    One trace is open at a time (the loop is single-threaded). A frame
+    whose loop iteration sends no motor command is counted in unactuated
+    when the next trace begins.
+    """
+
+    def __init__(self, report_interval=5.0):
+        """
+        Args:
+            report_interval: Seconds between 'nav.latency' console lines
+                             (every actuation is recorded either way)
+        """
+        self.histograms = {name: LatencyHistogram() for name in SEGMENTS}
+        self._segments = [(name, STAGE_INDEX[a], STAGE_INDEX[b]) for name, (a, b) in SEGMENTS.items()]
+        self._marks = [0.0] * len(STAGES)
+        self._open = False
+        self.seq = -1
+        self.actuated = 0
+        self.unactuated = 0
+        # Frames without a usable device timestamp (traced from publish time)
+        self.unclocked = 0
+
+        self.telemetry = get_telemetry()
+        self._event = self.telemetry.register(
+            'nav.latency', "[Latency] {label}: frame age {latency_ms:.1f}ms at the motors "
+                           "(compute {value:.1f}ms)", echo_interval=report_interval)
+
+    def begin(self, frame, now=None):
+        """
+        Open the trace of a frame the loop just pinned.
+
+        Args:
+            frame: RingFrame (timestamp = device capture time, published_at)
+            now: Read time (default: time.monotonic())
+        """
+        if self._open:
+            self.unactuated += 1
+        marks = self._marks
+        marks[STAGE_INDEX['read']] = time.monotonic() if now is None else now
+        published = frame.published_at or marks[STAGE_INDEX['read']]
+        captured = frame.timestamp
+        if not captured or captured > published:
+            # No device timestamp, or one from another clock (e.g. a recording)
+            captured = published
+            self.unclocked += 1
+        marks[STAGE_INDEX['captured']] = captured
+        marks[STAGE_INDEX['published']] = published
+        for stage in ('navigated', 'arbitrated', 'actuated'):
+            marks[STAGE_INDEX[stage]] = 0.0
+        self.seq = frame.seq
+        self._open = True
+
+    def mark(self, stage, now=None):
+        """Stamp a trace point ('navigated', 'arbitrated', ...)."""
+        if self._open:
+            self._marks[STAGE_INDEX[stage]] = time.monotonic() if now is None else now
+
+    def actuate(self, label='', now=None):
+        """
+        Close the trace: the motor command for this frame was just sent.
+
+        Stages the loop skipped (e.g. an emergency stop before arbitration)
+        take the time of the previous one.
+
+        Returns:
+            float: Frame age at actuation in ms, or None without an open trace
+        """
+        if not self._open:
+            return None
+        marks = self._marks
+        marks[STAGE_INDEX['actuated']] = time.monotonic() if now is None else now
+        for i in range(1, len(marks)):
+            if not marks[i]:
+                marks[i] = marks[i - 1]
+        for name, a, b in self._segments:
+            self.histograms[name].add((marks[b] - marks[a]) * 1000)
+        self._open = False
+        self.actuated += 1
+
+        age_ms = (marks[STAGE_INDEX['actuated']] - marks[STAGE_INDEX['captured']]) * 1000
+        compute_ms = (marks[STAGE_INDEX['navigated']] - marks[STAGE_INDEX['read']]) * 1000
+        self.telemetry.record(self._event, value=compute_ms, latency_ms=age_ms, count=self.seq, label=label)
+        return age_ms
+
+    def report(self):
+        """{segment: {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}}"""
+        return {name: hist.summary() for name, hist in self.histograms.items()}
+
+    def format_report(self):
+        """Table of the segment histograms, one line per segment."""
+        lines = [f"{'segment':<14}{'n':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name, s in self.report().items():
+            lines.append(f"{name:<14}{s['count']:>7}{s['mean_ms']:>9.1f}{s['p50_ms']:>9.1f}"
+                         f"{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}")
+        lines.append(f"{self.actuated} frames actuated, {self.unactuated} without a motor command, "
+                     f"{self.unclocked} without a device timestamp")
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Clear the histograms (e.g. after warm-up)."""
+        for hist in self.histograms.values():
+            hist.reset()
+        self.actuated = self.unactuated = self.unclocked = 0
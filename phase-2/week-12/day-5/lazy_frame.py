@@ -0,0 +1,211 @@
+"""
+Lazily converted camera frames
+The Oak-D preview arrives as planar RGB (3, H, W). getCvFrame() turns it
+into an interleaved BGR copy on every frame, although the depth navigator
+never looks at it and LLaVA wants RGB / JPEG anyway. A LazyFrame keeps
+whatever raw form the source has and converts on first use: BGR, RGB,
+PIL, downscaled and JPEG variants are each computed at most once per
+frame, and only if some consumer asks for them.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+
+def shrink(image, size):
+    """
+    Area-average image down to size (width, height), fast for big factors.
+
+    INTER_AREA is an order of magnitude faster for exact integer factors,
+    so shrink by the largest one first (cropping the few leftover edge
+    pixels), then resize the small remainder.
+    """
+    h, w = image.shape[:2]
+    factor = min(w // size[0], h // size[1])
+    if factor >= 2:
+        image = image[:h - h % factor, :w - w % factor]
+        image = cv2.resize(image, (image.shape[1] // factor, image.shape[0] // factor),
+                           interpolation=cv2.INTER_AREA)
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+class LazyFrame:
+    """
+    One RGB/depth pair, converted on demand with caching.
+
+    Usage:
+        frame = camera.capture()              # no RGB conversion yet
+        cmd = navigator.get_navigation_command(None, frame.depth)
+        jpeg = frame.jpeg(size=(336, 336))    # planar -> BGR -> resize -> JPEG, once
+
+    Conversions are thread-safe (the nav and LLaVA threads may share a
+    frame). Built from a FrameRing slot (from_ring), the frame and any
+    result that is still a view (bgr of a BGR slot) are only valid while
+    the slot is pinned; converted results are owned copies.
+    """
+
+    def __init__(self, depth=None, rgb_planar=None, bgr=None, timestamp=None, seq=-1, source=None):
+        """
+        Args:
+            depth: uint16 depth (mm), or None
+            rgb_planar: (3, H, W) uint8 RGB planes (the device's native layout)
+            bgr: (H, W, 3) uint8 BGR image, if the source has that instead
+            timestamp: Capture time in seconds (host clock)
+            seq: Frame sequence number, if any
+            source: Object the arrays point into, kept alive with the frame
+                    (e.g. the device messages)
+        """
+        self.depth = depth
+        self.rgb_planar = rgb_planar
+        self.timestamp = timestamp
+        self.seq = seq
+        self.conversions = 0  # conversions actually run, for profiling
+        self._source = source
+        self._cache = {} if bgr is None else {'bgr': bgr}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_messages(cls, rgb_msg, depth_msg, timestamp=None):
+        """Wrap device ImgFrames without converting them (views of the message data)."""
+        planar = bgr = None
+        if rgb_msg is not None:
+            import depthai as dai
+            frame_type = rgb_msg.getType()
+            if frame_type == dai.ImgFrame.Type.RGB888p:
+                planar = rgb_msg.getFrame()
+            elif frame_type == dai.ImgFrame.Type.BGR888p:
+                planar = rgb_msg.getFrame()[::-1]
+            else:
+                bgr = rgb_msg.getCvFrame()
+        return cls(depth=depth_msg.getFrame(), rgb_planar=planar, bgr=bgr, timestamp=timestamp,
+                   seq=depth_msg.getSequenceNum(), source=(rgb_msg, depth_msg))
+
+    @classmethod
+    def from_ring(cls, frame):
+        """Wrap a pinned RingFrame ('rgb_planar' or BGR 'rgb' slot, plus 'depth')."""
+        return cls(depth=frame['depth'] if 'depth' in frame else None,
+                   rgb_planar=frame['rgb_planar'] if 'rgb_planar' in frame else None,
+                   bgr=frame['rgb'] if 'rgb' in frame else None,
+                   timestamp=frame.timestamp, seq=frame.seq, source=frame)
+
+    @property
+    def has_rgb(self):
+        return self.rgb_planar is not None or 'bgr' in self._cache
+
+    def _get(self, key, convert):
+        value = self._cache.get(key)
+        if value is None:
+            with self._lock:
+                value = self._cache.get(key)
+                if value is None:
+                    value = self._cache[key] = convert()
+                    self.conversions += 1
+        return value
+
+    @property
+    def bgr(self):
+        """(H, W, 3) BGR image, as getCvFrame() returns it (None without RGB)."""
+        if not self.has_rgb:
+            return None
+        return self._get('bgr', lambda: np.ascontiguousarray(self.rgb_planar[::-1].transpose(1, 2, 0)))
+
+    @property
+    def rgb(self):
+        """(H, W, 3) RGB image (None without RGB)."""
+        if not self.has_rgb:
+            return None
+        if self.rgb_planar is not None:
+            return self._get('rgb', lambda: np.ascontiguousarray(self.rgb_planar.transpose(1, 2, 0)))
+        return self._get('rgb', lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB))
+
+    def resized(self, size):
+        """BGR image scaled to size (width, height), area interpolation."""
+        if not self.has_rgb:
+            return None
+        size = tuple(size)
+        if size == self.size:
+            return self.bgr
+        return self._get(('bgr', size), lambda: cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA))
+
+    def gray(self, size):
+        """
+        float32 grayscale thumbnail (mean of the channels, so the same for
+        RGB and BGR sources) scaled to size (width, height); for hashing.
+        """
+        if not self.has_rgb:
+            return None
+        size = tuple(size)
+
+        def convert():
+            if self.rgb_planar is not None:
+                # Per plane: no interleaving of the full frame needed
+                planes = [shrink(plane, size) for plane in self.rgb_planar]
+                return np.mean(planes, axis=0, dtype=np.float32)
+            return shrink(self.bgr, size).mean(axis=2, dtype=np.float32)
+        return self._get(('gray', size), convert)
+
+    @property
+    def size(self):
+        """(width, height) of the RGB image."""
+        if self.rgb_planar is not None:
+            return self.rgb_planar.shape[2], self.rgb_planar.shape[1]
+        if 'bgr' in self._cache:
+            return self._cache['bgr'].shape[1], self._cache['bgr'].shape[0]
+        return None
+
+    def pil(self, size=None):
+        """PIL RGB image, optionally scaled (needs Pillow)."""
+        if not self.has_rgb:
+            return None
+        from PIL import Image
+        key = ('pil', None if size is None else tuple(size))
+
+        def convert():
+            if size is None:
+                return Image.fromarray(self.rgb)
+            return Image.fromarray(cv2.cvtColor(self.resized(size), cv2.COLOR_BGR2RGB))
+        return self._get(key, convert)
+
+    def jpeg(self, quality=75, size=None):
+        """
+        JPEG bytes of the RGB image, optionally scaled first.
+
+        quality 75 is PIL's default, what the LLaVA path used to send.
+        """
+        if not self.has_rgb:
+            return None
+        image_size = None if size is None else tuple(size)
+
+        def encode():
+            image = self.bgr if image_size is None else self.resized(image_size)
+            ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            return data.tobytes()
+        return self._get(('jpeg', quality, image_size), encode)
+
+    def ppm(self, size=None):
+        """
+        Binary PPM (P6) of the RGB image, optionally scaled first.
+
+        That is the raw RGB bytes behind a ~15 byte header: no compression,
+        yet any stb_image / OpenCV / PIL decoder (e.g. llama.cpp's CLIP
+        loader) accepts it.
+        """
+        if not self.has_rgb:
+            return None
+        image_size = None if size is None else tuple(size)
+
+        def encode():
+            if image_size is None or image_size == self.size:
+                pixels = self.rgb
+            else:
+                pixels = cv2.resize(self.rgb, image_size, interpolation=cv2.INTER_AREA)
+            h, w = pixels.shape[:2]
+            return b'P6\n%d %d\n255\n' % (w, h) + pixels.tobytes()
+        return self._get(('ppm', image_size), encode)
+
+    def cached(self):
+        """Conversions computed so far (keys), e.g. to check what consumers used."""
+        return list(self._cache)
@@ -0,0 +1,190 @@
+"""
+Local 2D occupancy costmap
+Rolling, robot-centred grid updated from depth frames. Pixels are
+projected with a cached per-pixel ray table (no per-frame trig), cells
+decay over time, and the grid remembers obstacles that have just left
+the camera's field of view.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from depth_zone_stats import MIN_VALID_MM, MAX_VALID_MM
+from polar_histogram import OAKD_HFOV_DEG
+
+
+class LocalCostmap:
+    """
+    Fixed-size occupancy grid around the rover, updated in place.
+
+    Layout is a top-down map: row 0 is the far front, the rover sits in
+    the center cell facing "up", columns grow to the right. Values are
+    occupancy evidence in [0, 1]; >= occupied_threshold means obstacle.
+    """
+
+    def __init__(self, size_m=4.0, resolution_m=0.05, hfov_deg=OAKD_HFOV_DEG,
+                 camera_height_m=0.20, min_obstacle_height_m=0.05, max_obstacle_height_m=0.60,
+                 pixel_stride=4, hit_weight=0.35, half_life_s=2.0, occupied_threshold=0.5):
+        """
+        Args:
+            size_m: Side length of the square grid
+            resolution_m: Cell size
+            hfov_deg: Horizontal FOV of the depth frame
+            camera_height_m: Camera height above the floor
+            min_obstacle_height_m: Points lower than this are floor
+            max_obstacle_height_m: Points higher than this are overhangs the rover passes under
+            pixel_stride: Use every Nth pixel in both directions
+            hit_weight: Evidence added per projected point
+            half_life_s: Seconds for unrefreshed evidence to halve, independent
+                         of the frame rate; a saturated cell stays occupied
+                         about this long after it was last seen
+            occupied_threshold: Evidence needed to call a cell occupied
+        """
+        self.resolution_m = resolution_m
+        self.n_cells = int(round(size_m / resolution_m))
+        self.center = self.n_cells // 2
+        self.hfov_deg = hfov_deg
+        self.camera_height_m = camera_height_m
+        self.min_obstacle_height_m = min_obstacle_height_m
+        self.max_obstacle_height_m = max_obstacle_height_m
+        self.pixel_stride = pixel_stride
+        self.hit_weight = hit_weight
+        self.half_life_s = half_life_s
+        self.occupied_threshold = occupied_threshold
+
+        self.grid = np.zeros((self.n_cells, self.n_cells), dtype=np.float32)
+        self._scratch = np.zeros_like(self.grid)
+
+        # Motion not yet applied because it is smaller than one cell
+        self._pending_forward_m = 0.0
+        self._pending_turn_rad = 0.0
+
+        self._last_update = None  # time.monotonic() of the last update, for dt
+
+        self._frame_shape = None
+        self._ray_x = None
+        self._ray_y = None
+
+    def _prepare(self, shape):
+        """Cache per-pixel ray factors (once per frame shape)."""
+        if shape == self._frame_shape:
+            return
+        h, w = shape
+        s = self.pixel_stride
+        fx = (w / 2) / np.tan(np.radians(self.hfov_deg / 2))
+        fy = fx  # square pixels
+        u = np.arange(0, w, s, dtype=np.float32) + 0.5 - w / 2
+        v = np.arange(0, h, s, dtype=np.float32) + 0.5 - h / 2
+        # X (right) = Z * ray_x, Y (down) = Z * ray_y
+        self._ray_x = np.broadcast_to(u / fx, (len(v), len(u))).copy()
+        self._ray_y = np.broadcast_to((v / fy)[:, None], (len(v), len(u))).copy()
+        self._frame_shape = shape
+
+    def update(self, depth_frame, dt=None):
+        """
+        Decay the grid and add evidence from one depth frame.
+
+        Args:
+            depth_frame: (H, W) depth in millimeters
+            dt: Seconds since the previous update (default: measured with
+                time.monotonic(); the first update does not decay)
+        """
+        now = time.monotonic()
+        if dt is None:
+            dt = 0.0 if self._last_update is None else now - self._last_update
+        self._last_update = now
+        self._prepare(depth_frame.shape)
+        s = self.pixel_stride
+        depth = depth_frame[::s, ::s]
+
+        z = depth.astype(np.float32) * 0.001
+        lateral = z * self._ray_x
+        height = self.camera_height_m - z * self._ray_y
+
+        keep = ((depth >= MIN_VALID_MM) & (depth < MAX_VALID_MM) &
+                (height >= self.min_obstacle_height_m) & (height <= self.max_obstacle_height_m))
+
+        rows = self.center - np.floor(z[keep] / self.resolution_m).astype(np.int64)
+        cols = self.center + np.floor(lateral[keep] / self.resolution_m).astype(np.int64)
+        inside = (rows >= 0) & (cols >= 0) & (cols < self.n_cells)
+
+        if dt > 0:
+            self.grid *= np.float32(0.5 ** (dt / self.half_life_s))
+        hits = np.bincount(rows[inside] * self.n_cells + cols[inside], minlength=self.grid.size)
+        self.grid += (hits.reshape(self.grid.shape) * self.hit_weight).astype(np.float32)
+        np.minimum(self.grid, 1.0, out=self.grid)
+
+    def move(self, forward_m, turn_rad):
+        """
+        Shift the grid for rover motion (dead reckoning).
+
+        Motion is accumulated until it moves the grid edge by at least one
+        cell, so many small steps do not get lost to rounding.
+
+        Args:
+            forward_m: Distance driven forward since the last call
+            turn_rad: Rotation since the last call, positive = left (CCW)
+        """
+        self._pending_forward_m += forward_m
+        self._pending_turn_rad += turn_rad
+        edge_shift = abs(self._pending_turn_rad) * self.center
+        if abs(self._pending_forward_m) < self.resolution_m and edge_shift < 1.0:
+            return
+
+        c = float(self.center)
+        # The world turns opposite to the rover and slides back as it drives forward
+        m = cv2.getRotationMatrix2D((c, c), -np.degrees(self._pending_turn_rad), 1.0)
+        m[1, 2] += self._pending_forward_m / self.resolution_m
+        self._scratch = cv2.warpAffine(self.grid, m, (self.n_cells, self.n_cells), dst=self._scratch,
+                                       flags=cv2.INTER_NEAREST, borderMode=cv2.BORDER_CONSTANT,
+                                       borderValue=0)
+        self.grid, self._scratch = self._scratch, self.grid
+
+        self._pending_forward_m = 0.0
+        self._pending_turn_rad = 0.0
+
+    def nearest_obstacle_m(self, width_m=0.30, max_range_m=1.5, lateral_offset_m=0.0):
+        """
+        Distance to the closest occupied cell in a straight corridor ahead.
+
+        Args:
+            width_m: Corridor width (about the rover width)
+            max_range_m: How far ahead to look
+            lateral_offset_m: Corridor center offset, positive = right
+
+        Returns:
+            float or None: Distance in meters, None if the corridor is free
+        """
+        res = self.resolution_m
+        half = int(np.ceil(width_m / 2 / res))
+        mid = self.center + int(round(lateral_offset_m / res))
+        top = max(self.center - int(np.ceil(max_range_m / res)), 0)
+        corridor = self.grid[top:self.center + 1, max(mid - half, 0):mid + half + 1]
+
+        occupied_rows = np.flatnonzero((corridor >= self.occupied_threshold).any(axis=1))
+        if occupied_rows.size == 0:
+            return None
+        # Last occupied row is the one closest to the rover
+        return (self.center - (top + occupied_rows[-1])) * res
+
+    def side_occupancy(self, depth_m=0.6):
+        """
+        Occupied cell count beside the rover (left, right), including
+        areas the camera can no longer see.
+
+        Args:
+            depth_m: How far in front of / behind the rover to look
+
+        Returns:
+            tuple: (left_count, right_count)
+        """
+        n = int(np.ceil(depth_m / self.resolution_m))
+        band = self.grid[max(self.center - n, 0):self.center + n + 1] >= self.occupied_threshold
+        return int(band[:, :self.center].sum()), int(band[:, self.center + 1:].sum())
+
+    def reset(self):
+        """Clear all evidence (e.g. after the rover was picked up)."""
+        self.grid.fill(0.0)
+        self._pending_forward_m = 0.0
+        self._pending_turn_rad = 0.0
@@ -0,0 +1,112 @@
+"""
+Reusable navigation command
+A read-only mapping with the same keys as the dict DepthNavigator has
+always returned, so existing consumers (cmd['action'], cmd.get(...),
+dict(cmd, ...)) keep working. The navigator refills one instance every
+frame instead of building dicts and f-strings.
+"""
+from collections.abc import Mapping
+
+
+class ZoneScores(Mapping):
+    """Name -> score view over a reused scores array."""
+
+    __slots__ = ('_names', '_index', '_values')
+
+    def __init__(self, names, values):
+        """
+        Args:
+            names: Zone names, in array order
+            values: (zones,) float array, updated in place by the owner
+        """
+        self._names = tuple(names)
+        self._index = {name: i for i, name in enumerate(self._names)}
+        self._values = values
+
+    def __getitem__(self, name):
+        return float(self._values[self._index[name]])
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class NavCommand(Mapping):
+    """
+    One navigation command, overwritten by the next frame.
+
+    'reasoning' is only formatted when it is read: the template and the
+    center / left / right / best scores it needs are stored instead.
+    Call to_dict() to keep a command past the next frame.
+    """
+
+    __slots__ = ('action', 'speed', 'distance', 'center', 'left', 'right', 'best',
+                 '_template', '_scores')
+
+    KEYS = ('action', 'speed', 'distance', 'reasoning', 'scores')
+
+    def __init__(self, scores):
+        """
+        Args:
+            scores: ZoneScores view exposed as cmd['scores']
+        """
+        self.action = None
+        self.speed = None
+        self.distance = 0.0
+        self.center = self.left = self.right = self.best = 0.0
+        self._template = ''
+        self._scores = scores
+
+    def set(self, action, speed, distance, template, center, left, right, best=0.0):
+        """
+        Overwrite all fields.
+
+        Args:
+            template: str.format template using {c}, {l}, {r}, {b} (percent ints)
+        """
+        self.action = action
+        self.speed = speed
+        self.distance = distance
+        self._template = template
+        self.center = center
+        self.left = left
+        self.right = right
+        self.best = best
+        return self
+
+    @property
+    def reasoning(self):
+        return self._template.format(c=int(self.center * 100), l=int(self.left * 100),
+                                     r=int(self.right * 100), b=int(self.best * 100))
+
+    @property
+    def scores(self):
+        return self._scores
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def to_dict(self):
+        """Detached copy in the classic dict format."""
+        d = dict(self)
+        d['scores'] = dict(self._scores)
+        return d
+
+    def __repr__(self):
+        return f"NavCommand({self.to_dict()!r})"
@@ -0,0 +1,266 @@
+"""
+Declarative Oak-D pipeline builder
+A PipelineSpec lists the host streams a consumer reads ('rgb', 'depth',
+'detections') plus resolution, FPS and queue sizes; build_pipeline()
+creates only the nodes and XLinkOuts those streams need. A depth-only
+navigator no longer ships the RGB preview over USB just to drop it.
+bandwidth() estimates the XLink traffic of a configuration before a
+device is opened.
+"""
+import os
+from datetime import timedelta
+
+import depthai as dai
+
+
+STREAMS = ('rgb', 'depth', 'detections')
+
+# Mono sensor resolution (rows) -> (enum name, width, height)
+MONO_RESOLUTIONS = {
+    400: ('THE_400_P', 640, 400),
+    480: ('THE_480_P', 640, 480),
+    720: ('THE_720_P', 1280, 720),
+    800: ('THE_800_P', 1280, 800)
+}
+
+# On-device stereo median filter options (dai.MedianFilter members)
+MEDIAN_FILTERS = {
+    'off': 'MEDIAN_OFF',
+    '3x3': 'KERNEL_3x3',
+    '5x5': 'KERNEL_5x5',
+    '7x7': 'KERNEL_7x7'
+}
+
+DEFAULT_DETECTION_BLOB = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      "models", "yolov8n_coco_640x352.blob")
+# A spatial detections message with a handful of objects, roughly
+DETECTION_MSG_BYTES = 2048
+# Sustained XLink throughput seen in practice (MB/s)
+USB2_MB_S = 35.0
+USB3_MB_S = 350.0
+
+
+class PipelineSpec:
+    """
+    What a consumer wants from the Oak-D.
+
+    Usage:
+        spec = PipelineSpec(streams=('depth',), mono_resolution=400, fps=30)
+        print(spec.describe())
+        pipeline = build_pipeline(spec)
+        device = dai.Device(pipeline)
+        queues = open_queues(device, spec)   # {'depth': DataOutputQueue}
+    """
+
+    def __init__(self, streams=('rgb', 'depth'), preview_size=(640, 480), fps=30.0,
+                 mono_resolution=400, queue_size=4, align_depth_to_rgb=True,
+                 depth_output_size=None, median_filter=None, sync=False, sync_threshold_ms=20.0,
+                 detection_blob=DEFAULT_DETECTION_BLOB):
+        """
+        Args:
+            streams: Host streams to create, any of STREAMS
+            preview_size: RGB preview (width, height); also the detector input
+            fps: Frame rate of every sensor
+            mono_resolution: Stereo sensor rows, a key of MONO_RESOLUTIONS
+            queue_size: Host queue length per stream (non-blocking)
+            align_depth_to_rgb: Warp depth into the RGB camera's view
+            depth_output_size: (width, height) to scale the depth output to
+                               (None = mono resolution)
+            median_filter: 'off', '3x3', '5x5' or '7x7' to override the preset's
+                           stereo median filter (None = preset default)
+            sync: Pair 'rgb' and 'depth' on device into one 'sync' stream
+            sync_threshold_ms: Largest RGB/depth timestamp difference of a pair
+            detection_blob: YOLOv8 blob for the 'detections' stream
+        """
+        unknown = set(streams) - set(STREAMS)
+        if unknown:
+            raise ValueError(f"Unknown streams {sorted(unknown)}, expected any of {STREAMS}")
+        if mono_resolution not in MONO_RESOLUTIONS:
+            raise ValueError(f"mono_resolution must be one of {sorted(MONO_RESOLUTIONS)}")
+        if sync and not {'rgb', 'depth'} <= set(streams):
+            raise ValueError("sync needs both the 'rgb' and 'depth' streams")
+        self.streams = tuple(name for name in STREAMS if name in streams)
+        self.preview_size = tuple(preview_size)
+        self.fps = fps
+        self.mono_resolution = mono_resolution
+        self.queue_size = queue_size
+        self.align_depth_to_rgb = align_depth_to_rgb
+        self.depth_output_size = tuple(depth_output_size) if depth_output_size else None
+        self.median_filter = median_filter
+        self.sync = sync
+        self.sync_threshold_ms = sync_threshold_ms
+        self.detection_blob = detection_blob
+
+    def replace(self, **changes):
+        """Copy with some arguments changed."""
+        args = dict(vars(self))
+        args.update(changes)
+        return PipelineSpec(**args)
+
+    @property
+    def needs_color_camera(self):
+        return 'rgb' in self.streams or 'detections' in self.streams
+
+    @property
+    def needs_stereo(self):
+        return 'depth' in self.streams or 'detections' in self.streams
+
+    @property
+    def depth_size(self):
+        """(width, height) of the depth output."""
+        if self.depth_output_size:
+            return self.depth_output_size
+        _, w, h = MONO_RESOLUTIONS[self.mono_resolution]
+        return w, h
+
+    @property
+    def queue_names(self):
+        """Host queues build_pipeline() creates."""
+        names = ['sync'] if self.sync else [name for name in ('rgb', 'depth') if name in self.streams]
+        if 'detections' in self.streams:
+            names.append('detections')
+        return names
+
+    def bandwidth(self):
+        """
+        Expected device -> host XLink traffic.
+
+        Returns:
+            dict: {stream: MB/s} for every host stream plus 'total'
+        """
+        w, h = self.preview_size
+        dw, dh = self.depth_size
+        per_frame = {
+            'rgb': w * h * 3,           # planar uint8 preview
+            'depth': dw * dh * 2,       # uint16 mm
+            'detections': DETECTION_MSG_BYTES
+        }
+        rates = {name: per_frame[name] * self.fps / 1e6 for name in self.streams}
+        rates['total'] = sum(rates.values())
+        return rates
+
+    def describe(self):
+        """One line: streams, sizes and bandwidth against USB2/USB3."""
+        rates = self.bandwidth()
+        parts = []
+        for name in self.streams:
+            if name == 'rgb':
+                size = f"{self.preview_size[0]}x{self.preview_size[1]}"
+            elif name == 'depth':
+                size = f"{self.depth_size[0]}x{self.depth_size[1]}"
+            else:
+                size = 'msg'
+            parts.append(f"{name} {size} {rates[name]:.1f}")
+        total = rates['total']
+        return (f"{' + '.join(parts)} = {total:.1f} MB/s @ {self.fps:g} FPS "
+                f"({total / USB2_MB_S:.0%} of USB2, {total / USB3_MB_S:.0%} of USB3)")
+
+
+def _stereo_preset():
+    # Best available preset - the names changed between depthai versions
+    for name in ('HIGH_ACCURACY', 'FAST_ACCURACY', 'DEFAULT'):
+        if hasattr(dai.node.StereoDepth.PresetMode, name):
+            return getattr(dai.node.StereoDepth.PresetMode, name)
+    return None
+
+
+def build_pipeline(spec):
+    """
+    Create a dai.Pipeline with exactly the nodes spec's streams need.
+
+    Raises:
+        FileNotFoundError: 'detections' requested but the blob is missing
+        RuntimeError: spec.sync on a depthai without the Sync node
+    """
+    if 'detections' in spec.streams and not os.path.exists(spec.detection_blob):
+        raise FileNotFoundError(f"YOLOv8 model not found at {spec.detection_blob}")
+    if spec.sync and not hasattr(dai.node, 'Sync'):
+        raise RuntimeError("This depthai has no Sync node (needs >= 2.24); pair frames on the host")
+
+    pipeline = dai.Pipeline()
+    cam_rgb = stereo = None
+
+    if spec.needs_color_camera:
+        cam_rgb = pipeline.create(dai.node.ColorCamera)
+        cam_rgb.setPreviewSize(*spec.preview_size)
+        cam_rgb.setInterleaved(False)
+        cam_rgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.RGB)
+        cam_rgb.setFps(spec.fps)
+
+    if spec.needs_stereo:
+        resolution = getattr(dai.MonoCameraProperties.SensorResolution,
+                             MONO_RESOLUTIONS[spec.mono_resolution][0])
+        mono_left = pipeline.create(dai.node.MonoCamera)
+        mono_right = pipeline.create(dai.node.MonoCamera)
+        for mono, socket in ((mono_left, dai.CameraBoardSocket.LEFT), (mono_right, dai.CameraBoardSocket.RIGHT)):
+            mono.setResolution(resolution)
+            mono.setBoardSocket(socket)
+            mono.setFps(spec.fps)
+
+        stereo = pipeline.create(dai.node.StereoDepth)
+        preset = _stereo_preset()
+        if preset is not None:
+            stereo.setDefaultProfilePreset(preset)
+        if spec.median_filter is not None:
+            stereo.initialConfig.setMedianFilter(getattr(dai.MedianFilter, MEDIAN_FILTERS[spec.median_filter]))
+        if spec.align_depth_to_rgb:
+            # Spatial detection needs depth in the RGB camera's view
+            stereo.setDepthAlign(dai.CameraBoardSocket.RGB)
+        if spec.depth_output_size:
+            stereo.setOutputSize(*spec.depth_output_size)
+        stereo.setLeftRightCheck(True)
+        stereo.setExtendedDisparity(False)
+        stereo.setSubpixel(False)
+        mono_left.out.link(stereo.left)
+        mono_right.out.link(stereo.right)
+
+    def xout(name, output):
+        node = pipeline.create(dai.node.XLinkOut)
+        node.setStreamName(name)
+        output.link(node.input)
+
+    if spec.sync:
+        # One message group per matched pair instead of two streams
+        sync = pipeline.create(dai.node.Sync)
+        sync.setSyncThreshold(timedelta(milliseconds=spec.sync_threshold_ms))
+        cam_rgb.preview.link(sync.inputs["rgb"])
+        stereo.depth.link(sync.inputs["depth"])
+        xout("sync", sync.out)
+    else:
+        if 'rgb' in spec.streams:
+            xout("rgb", cam_rgb.preview)
+        if 'depth' in spec.streams:
+            xout("depth", stereo.depth)
+
+    if 'detections' in spec.streams:
+        det = pipeline.create(dai.node.YoloSpatialDetectionNetwork)
+        det.setBlobPath(spec.detection_blob)
+        det.setConfidenceThreshold(0.4)
+        det.setNumClasses(80)  # COCO has 80 classes
+        det.setCoordinateSize(4)
+        det.setIouThreshold(0.5)
+        det.setDepthLowerThreshold(100)  # 100mm minimum
+        det.setDepthUpperThreshold(4000)  # 4m maximum
+        det.input.setBlocking(False)
+        cam_rgb.preview.link(det.input)
+        stereo.depth.link(det.inputDepth)
+        xout("detections", det.out)
+
+    return pipeline
+
+
+def open_queues(device, spec):
+    """{queue name: non-blocking output queue} for spec.queue_names."""
+    return {name: device.getOutputQueue(name=name, maxSize=spec.queue_size, blocking=False)
+            for name in spec.queue_names}
+
+
+if __name__ == '__main__':
+    # Bandwidth of the configurations the rover scripts use
+    for label, spec in (
+            ('navigator, depth only', PipelineSpec(streams=('depth',))),
+            ('navigator + LLaVA', PipelineSpec()),
+            ('person following', PipelineSpec(streams=('rgb', 'depth', 'detections'))),
+            ('detections only', PipelineSpec(streams=('detections',))),
+            ('720P depth', PipelineSpec(streams=('depth',), mono_resolution=720))):
+        print(f"{label:<24}{spec.describe()}")
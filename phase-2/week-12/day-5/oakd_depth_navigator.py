@@ -7,6 +7,31 @@ import depthai as dai
 import cv2
 import numpy as np
 import random
+import time
+
+from depth_zone_stats import MAX_VALID_MM, MIN_VALID_MM, ZoneStatsEngine, PreallocatedZoneStats, clearance_scores, fifths
+from polar_histogram import PolarHistogram
+from clearance_maps import ClearanceMaps
+from temporal_fusion import TemporalDepthFusion
+from depth_pyramid import count_pool, min_pool
+from frame_sync import FrameSynchronizer, message_key
+from lazy_frame import LazyFrame
+from oak_pipeline import PipelineSpec, build_pipeline, open_queues
+from nav_command import NavCommand, ZoneScores
+from telemetry import get_telemetry
+
+
+ZONE_NAMES = ('far_left', 'left', 'center', 'right', 'far_right')
+TURN_ACTIONS = ('left', 'right')
+
+# Reasoning templates: {c}, {l}, {r} = center / left / right score and
+# {b} = best safe side, all in percent
+REASON_EXPLORE = 'No safe path (C={c}% L={l}% R={r}%) - exploring'
+REASON_FORWARD = 'Forward safe & competitive (C={c}% ≥ 85% of best={b}%)'
+REASON_LEFT_CLEARER = 'Left much clearer (L={l}% >> C={c}%)'
+REASON_RIGHT_CLEARER = 'Right much clearer (R={r}% >> C={c}%)'
+REASON_EVADE_LEFT = 'Center blocked (C={c}%), evading left (L={l}%)'
+REASON_EVADE_RIGHT = 'Center blocked (C={c}%), evading right (R={r}%)'
 
 
 class OakDDepthCamera:
@@ -14,133 +39,230 @@ class OakDDepthCamera:
     Oak-D camera with stereo depth for 3D perception and person detection.
     """
     
-    def __init__(self, resolution=(640, 480), enable_person_detection=False):
+    def __init__(self, resolution=(640, 480), enable_person_detection=False, median_filter=None,
+                 sync_frames=False, sync_threshold_ms=20.0, sync_timeout_s=1.0, rgb=True, fps=30.0):
+        """
+        Args:
+            resolution: RGB preview size (width, height)
+            enable_person_detection: Run YOLOv8 spatial detection on device
+            median_filter: 'off', '3x3', '5x5' or '7x7' to override the preset's
+                           stereo median filter (use 'off' with host temporal fusion)
+            sync_frames: capture_frames() returns the newest timestamp-matched
+                         RGB/depth pair (device Sync node if this depthai has one,
+                         host-side matching otherwise) instead of two independent get()s
+            sync_threshold_ms: Largest RGB/depth timestamp difference of a pair
+            sync_timeout_s: capture_frames() raises TimeoutError if no pair
+                            matches for this long (a stalled stream)
+            rgb: Stream the RGB preview to the host. Depth-only consumers pass
+                 False: capture_frames() then returns (None, depth_frame)
+            fps: Sensor frame rate
+        """
+        if sync_frames and not rgb:
+            raise ValueError("sync_frames pairs RGB with depth, it needs rgb=True")
         self.resolution = resolution
         self.device = None
         self.rgb_queue = None
         self.depth_queue = None
+        self.sync_queue = None
         self.detection_queue = None
         self.pipeline = None
         self.enable_person_detection = enable_person_detection
+        self.median_filter = median_filter
+        self.rgb = rgb
+        self.fps = fps
+        self.spec = None
+        # None (independent get()s), 'device' or 'host' - decided in start()
+        self.sync_mode = None
+        self.sync_frames = sync_frames
+        self.sync_threshold_ms = sync_threshold_ms
+        self.sync_timeout_s = sync_timeout_s
+        self.synchronizer = None
+        # Frames never returned in a pair, per stream (from sequence number gaps)
+        self.discarded = {'rgb': 0, 'depth': 0}
+        self.last_skew_ms = 0.0
+        # Device timestamp (s, host clock) of the last depth frame returned
+        self.last_timestamp = None
+        self._last_seq = {}
+        self.telemetry = get_telemetry()
+        self._person_event = self.telemetry.register(
+            'camera.person', "[Oak-D] 👤 Detected {count} person(s), nearest {value:.2f}m", echo_interval=1.0)
+        self._detect_error_event = self.telemetry.register(
+            'camera.detect_error', "[Oak-D] ⚠️  Detection error: {note}", echo_interval=1.0)
+        self._discard_event = self.telemetry.register('camera.sync_discard')
+        
+    def pipeline_spec(self, device_sync=None):
+        """
+        PipelineSpec for this camera's settings.
         
+        Args:
+            device_sync: Pair frames with the device Sync node (default: if
+                         sync_frames and this depthai has one)
+        """
+        if device_sync is None:
+            device_sync = self.sync_frames and hasattr(dai.node, 'Sync')
+        streams = ['depth']
+        if self.rgb:
+            streams.insert(0, 'rgb')
+        if self.enable_person_detection:
+            streams.append('detections')
+        return PipelineSpec(streams=streams, preview_size=self.resolution, fps=self.fps,
+                            median_filter=self.median_filter, sync=device_sync,
+                            sync_threshold_ms=self.sync_threshold_ms)
+    
     def start(self):
-        """Start camera with RGB and depth streams, and optionally person detection."""
+        """Start camera with depth, the RGB preview if wanted, and optionally person detection."""
         if self.device is None:
-            self.pipeline = dai.Pipeline()
-            
-            # RGB Camera
-            camRgb = self.pipeline.create(dai.node.ColorCamera)
-            camRgb.setPreviewSize(self.resolution[0], self.resolution[1])
-            camRgb.setInterleaved(False)
-            camRgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.RGB)
-            
-            # Stereo Depth
-            monoLeft = self.pipeline.create(dai.node.MonoCamera)
-            monoRight = self.pipeline.create(dai.node.MonoCamera)
-            stereo = self.pipeline.create(dai.node.StereoDepth)
-            
-            monoLeft.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-            monoLeft.setBoardSocket(dai.CameraBoardSocket.LEFT)
-            monoRight.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-            monoRight.setBoardSocket(dai.CameraBoardSocket.RIGHT)
-            
-            # Stereo config - use best available preset
-            # Try different preset modes based on depthai version
-            if hasattr(dai.node.StereoDepth.PresetMode, 'HIGH_ACCURACY'):
-                stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.HIGH_ACCURACY)
-            elif hasattr(dai.node.StereoDepth.PresetMode, 'FAST_ACCURACY'):
-                stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.FAST_ACCURACY)
-            else:
-                stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.DEFAULT)
-            
-            # Align depth to RGB camera for spatial detection (fixes warning)
-            stereo.setDepthAlign(dai.CameraBoardSocket.RGB)
-            stereo.setLeftRightCheck(True)
-            stereo.setExtendedDisparity(False)
-            stereo.setSubpixel(False)
-            
-            # Link cameras to stereo
-            monoLeft.out.link(stereo.left)
-            monoRight.out.link(stereo.right)
-            
-            # RGB output
-            xout_rgb = self.pipeline.create(dai.node.XLinkOut)
-            xout_rgb.setStreamName("rgb")
-            camRgb.preview.link(xout_rgb.input)
-            
-            # Depth output
-            xout_depth = self.pipeline.create(dai.node.XLinkOut)
-            xout_depth.setStreamName("depth")
-            stereo.depth.link(xout_depth.input)
-            
-            # Person Detection (YOLOv8 Spatial)
-            if self.enable_person_detection:
-                try:
-                    import os
-                    
-                    # Use YOLOv8 model from capstone (proven to work!)
-                    blob_path = os.path.join(os.path.dirname(__file__), "models", "yolov8n_coco_640x352.blob")
-                    
-                    if not os.path.exists(blob_path):
-                        print(f"[Oak-D] ⚠️  YOLOv8 model not found at {blob_path}")
-                        print("[Oak-D] Continuing without person detection...")
-                        self.enable_person_detection = False
-                    else:
-                        # Create YOLOv8 Spatial Detection Network (with depth)
-                        detectionNetwork = self.pipeline.create(dai.node.YoloSpatialDetectionNetwork)
-                        detectionNetwork.setBlobPath(blob_path)
-                        detectionNetwork.setConfidenceThreshold(0.4)
-                        detectionNetwork.setNumClasses(80)  # COCO has 80 classes
-                        detectionNetwork.setCoordinateSize(4)
-                        detectionNetwork.setIouThreshold(0.5)
-                        detectionNetwork.setDepthLowerThreshold(100)  # 100mm minimum
-                        detectionNetwork.setDepthUpperThreshold(4000)  # 4m maximum
-                        detectionNetwork.input.setBlocking(False)
-                        
-                        # Link RGB camera and depth to detection network
-                        camRgb.preview.link(detectionNetwork.input)
-                        stereo.depth.link(detectionNetwork.inputDepth)
-                        
-                        # Detection output
-                        xout_detection = self.pipeline.create(dai.node.XLinkOut)
-                        xout_detection.setStreamName("detections")
-                        detectionNetwork.out.link(xout_detection.input)
-                        
-                        print(f"[Oak-D] ✅ YOLOv8 person detection enabled (spatial + depth)")
-                    
-                except Exception as e:
-                    print(f"[Oak-D] ⚠️  Could not load person detection: {e}")
-                    print("[Oak-D] Continuing without person detection...")
-                    self.enable_person_detection = False
+            spec = self.pipeline_spec()
+            try:
+                self.pipeline = build_pipeline(spec)
+            except FileNotFoundError as e:
+                print(f"[Oak-D] ⚠️  {e}")
+                print("[Oak-D] Continuing without person detection...")
+                self.enable_person_detection = False
+                spec = self.pipeline_spec()
+                self.pipeline = build_pipeline(spec)
+            self.spec = spec
+            if self.sync_frames:
+                self.sync_mode = 'device' if spec.sync else 'host'
             
             # Start device
             self.device = dai.Device(self.pipeline)
-            self.rgb_queue = self.device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-            self.depth_queue = self.device.getOutputQueue(name="depth", maxSize=4, blocking=False)
+            queues = open_queues(self.device, spec)
+            self.rgb_queue = queues.get('rgb')
+            self.depth_queue = queues.get('depth')
+            self.sync_queue = queues.get('sync')
+            self.detection_queue = queues.get('detections')
+            if self.sync_mode == 'host':
+                self.synchronizer = FrameSynchronizer(threshold_ms=self.sync_threshold_ms)
+            if self.sync_mode is not None:
+                print(f"[Oak-D] RGB/depth pairs synchronized on {self.sync_mode} "
+                      f"(max skew {self.sync_threshold_ms:.0f}ms)")
+            print(f"[Oak-D] XLink: {spec.describe()}")
             
             if self.enable_person_detection:
-                self.detection_queue = self.device.getOutputQueue(name="detections", maxSize=4, blocking=False)
                 print("[Oak-D] Camera started with stereo depth + person detection")
             else:
                 print("[Oak-D Depth] Camera started with stereo depth")
     
+    def capture(self):
+        """
+        Capture the next RGB/depth pair without converting it.
+        
+        With sync_frames, the pair is the newest one whose timestamps match
+        and frames skipped on the way are counted in self.discarded.
+        
+        Returns:
+            LazyFrame: depth plus the RGB preview in its device layout; BGR,
+                       RGB, PIL, resized and JPEG versions are made on first use
+        """
+        rgb_msg, depth_msg = self._capture_messages()
+        return LazyFrame.from_messages(rgb_msg, depth_msg, self.last_timestamp)
+    
     def capture_frames(self):
         """
-        Capture both RGB and depth frames.
+        Capture both RGB and depth frames (see capture()).
         
         Returns:
-            tuple: (rgb_frame, depth_frame) as numpy arrays
+            tuple: (rgb_frame, depth_frame) as numpy arrays (rgb_frame is
+                   None for a depth-only camera)
         """
-        if self.rgb_queue is None or self.depth_queue is None:
-            raise RuntimeError("Camera not started")
+        frame = self.capture()
+        return frame.bgr, frame.depth
+    
+    def capture_into(self, ring):
+        """
+        Capture RGB and depth straight into a preallocated FrameRing slot.
+        
+        Same pairing as capture(), but depth and the planar RGB preview are
+        copied from the message buffers as they are (plain memcpy, no
+        conversion), so no per-frame arrays are allocated on the host.
+        Readers wrap the slot in LazyFrame.from_ring() to get BGR / RGB / JPEG.
         
-        rgb_msg = self.rgb_queue.get()
-        depth_msg = self.depth_queue.get()
+        Args:
+            ring: FrameRing with 'rgb_planar' (3, H, W) uint8 and 'depth' (H, W)
+                  uint16 slots ('depth' only for a depth-only camera; BGR 'rgb'
+                  for previews that are not planar)
         
-        rgb_frame = rgb_msg.getCvFrame()
-        depth_frame = depth_msg.getFrame()
+        Returns:
+            int: Ring sequence number of the new frame, or None if it was dropped
+        """
+        frame = self.capture()
+        arrays = {'depth': frame.depth}
+        if frame.rgb_planar is not None:
+            arrays['rgb_planar'] = frame.rgb_planar
+        elif frame.has_rgb:
+            arrays['rgb'] = frame.bgr
+        specs = {name: (arr.shape, arr.dtype) for name, arr in arrays.items()}
         
-        return rgb_frame, depth_frame
+        with ring.write(specs, timestamp=self.last_timestamp) as slot:
+            if slot is None:
+                return None
+            for name, arr in arrays.items():
+                np.copyto(slot[name], arr)
+        return ring.seq
+    
+    def skip_frame(self):
+        """
+        Take the next RGB/depth pair off the device queues without converting it.
+        
+        Keeps the queues draining at the sensor rate when no consumer could
+        read a new frame (see CapturePacer).
+        """
+        self._capture_messages()
+    
+    def _capture_messages(self):
+        if self.sync_mode is not None:
+            rgb_msg, depth_msg = self._capture_synced()
+        else:
+            if self.depth_queue is None:
+                raise RuntimeError("Camera not started")
+            rgb_msg = self.rgb_queue.get() if self.rgb_queue is not None else None
+            depth_msg = self.depth_queue.get()
+        self.last_timestamp = depth_msg.getTimestamp().total_seconds()
+        return rgb_msg, depth_msg
+    
+    def _capture_synced(self):
+        """Newest matched (rgb_msg, depth_msg), polling without blocking on either stream."""
+        if self.sync_queue is None and self.synchronizer is None:
+            raise RuntimeError("Camera not started")
+        
+        deadline = time.monotonic() + self.sync_timeout_s
+        while True:
+            if self.sync_mode == 'device':
+                groups = self.sync_queue.tryGetAll()
+                pair = (groups[-1]["rgb"], groups[-1]["depth"]) if groups else None
+            else:
+                for msg in self.rgb_queue.tryGetAll():
+                    self.synchronizer.add('rgb', msg)
+                for msg in self.depth_queue.tryGetAll():
+                    self.synchronizer.add('depth', msg)
+                pair = self.synchronizer.newest_pair()
+                pair = pair[:2] if pair else None
+            if pair is not None:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No RGB/depth pair within {self.sync_timeout_s}s "
+                                   f"(discarded so far: {self.discarded})")
+            time.sleep(0.002)
+        
+        rgb_msg, depth_msg = pair
+        rgb_t, _ = message_key(rgb_msg)
+        depth_t, _ = message_key(depth_msg)
+        self.last_skew_ms = (depth_t - rgb_t) * 1000.0
+        self._count_discards('rgb', rgb_msg)
+        self._count_discards('depth', depth_msg)
+        return rgb_msg, depth_msg
+    
+    def _count_discards(self, stream, msg):
+        # Sequence numbers are consecutive per stream on device, so a gap is
+        # every frame dropped in between: XLink queue overflow, Sync node or
+        # host buffer eviction, or an older pair skipped for a newer one
+        seq = msg.getSequenceNum()
+        last = self._last_seq.get(stream)
+        if last is not None and seq > last + 1:
+            self.discarded[stream] += seq - last - 1
+            self.telemetry.increment(self._discard_event, seq - last - 1)
+        self._last_seq[stream] = seq
     
     def detect_person(self, debug=False):
         """
@@ -206,12 +328,14 @@ class OakDDepthCamera:
                     })
             
             if detections:
-                print(f"[Oak-D] 👤 Detected {len(detections)} person(s)")
+                depths = [d['depth'] for d in detections if d['depth']]
+                self.telemetry.record(self._person_event, count=len(detections),
+                                      value=min(depths) / 1000 if depths else 0.0)
             elif debug:
                 print("[Oak-D Debug] No person detections in this frame")
             
         except Exception as e:
-            print(f"[Oak-D] ⚠️  Detection error: {e}")
+            self.telemetry.record(self._detect_error_event, label=type(e).__name__, note=str(e))
         
         return detections
     
@@ -243,6 +367,12 @@ class OakDDepthCamera:
             self.device = None
             self.rgb_queue = None
             self.depth_queue = None
+            self.sync_queue = None
+            self.detection_queue = None
+            self.synchronizer = None
+            self._last_seq.clear()
+        if self.sync_mode is not None:
+            print(f"[Oak-D Depth] Frames discarded for sync: {self.discarded}")
         print("[Oak-D Depth] Camera closed")
 
 
@@ -252,22 +382,85 @@ class DepthNavigator:
     Simple and effective - reacts early to obstacles!
     """
     
-    def __init__(self, safe_distance_mm=800):
+    # Headings within this cone are driven as 'forward' with steering bias
+    FORWARD_CONE_DEG = 10.0
+    # SAFETY THRESHOLD: Minimum clearance required to consider an action safe
+    SAFETY_THRESHOLD = 0.35  # 35% minimum - allows navigation in tight spaces
+    # Coarse mode: zones scoring this far above the threshold skip full-res refinement
+    COARSE_MARGIN = 0.10
+    # Coarse mode: valid full-res pixels a zone needs (clearance_scores' full-res cutoff)
+    COARSE_MIN_VALID_PIXELS = 50
+    # Coarse mode: evade immediately if this share of center cells is too close
+    EARLY_EXIT_NEAR_FRACTION = 0.20
+    # Ground-plane mode: a zone is blocked by obstacles covering this share of its pixels...
+    GROUND_MIN_OBSTACLE_FRACTION = 0.005
+    # ...at the depth of their nearest 10% (robust nearest distance)
+    GROUND_OBSTACLE_QUANTILE = 0.1
+    # Ground-plane mode: zones with less valid depth than this are unknown (score 0)
+    GROUND_MIN_VALID_FRACTION = 0.05
+    
+    def __init__(self, safe_distance_mm=800, n_sectors=None, build_clearance_maps=False,
+                 temporal_window=None, coarse_factor=None, preallocate=False,
+                 ground_plane=None, ground_stride=2):
         """
         Args:
             safe_distance_mm: Minimum safe distance to obstacles in millimeters
+            n_sectors: If set, use an N-sector polar histogram (e.g. 32 or 64)
+                       instead of the fixed 5 regions
+            build_clearance_maps: Build integral-image clearance maps every frame
+                                  so other checks can query ROIs in O(1)
+            temporal_window: If set, fuse the analysis strip over the last K frames
+                             (denoises stereo without the on-device median filter)
+            coarse_factor: If set (even, e.g. 8), decide on a min-pooled strip first and
+                           only refine unclear zones at full resolution
+            preallocate: Steady-state mode for the 5-zone path: reuse scratch buffers and
+                         return one reused NavCommand (reasoning formatted on access).
+                         Copy with to_dict() to keep a command past the next frame.
+            ground_plane: Calibrated GroundPlane; if set, the whole frame (every
+                          ground_stride-th row/column) is analysed with floor and
+                          overhang pixels classified away, instead of the middle strip
+            ground_stride: Subsampling of the frame in ground-plane mode
         """
+        if preallocate and (n_sectors or coarse_factor):
+            raise ValueError("preallocate is only supported with the 5-zone scoring")
+        if ground_plane is not None and (n_sectors or coarse_factor or preallocate):
+            raise ValueError("ground_plane is only supported with the 5-zone scoring")
         self.safe_distance_mm = safe_distance_mm
         # CRITICAL: Set early warning distance to 1.5x safe distance
         # This gives the rover time to react BEFORE hitting obstacles
         self.warning_distance_mm = int(safe_distance_mm * 1.5)
         self.blocked_distance_mm = int(safe_distance_mm * 0.75)
+        self.zone_stats = ZoneStatsEngine()
+        self.polar = PolarHistogram(n_sectors=n_sectors) if n_sectors else None
+        # Latest frame's integral maps (near = closer than blocked distance)
+        self.clearance_maps = ClearanceMaps(near_mm=self.blocked_distance_mm) if build_clearance_maps else None
+        self.fusion = TemporalDepthFusion(window=temporal_window) if temporal_window else None
+        self.coarse_factor = coarse_factor
+        self.ground_plane = ground_plane
+        self.ground_stride = ground_stride
+        if coarse_factor:
+            self.coarse_stats = ZoneStatsEngine()
+            # Single-zone engine for refining one region at full resolution
+            self.refine_stats = ZoneStatsEngine(zone_edges_fn=lambda width: [0, width])
+        self.preallocate = preallocate
+        if preallocate:
+            self.zone_medians = PreallocatedZoneStats()
+            self._zone_scores = np.zeros(len(ZONE_NAMES))
+            self._command = NavCommand(ZoneScores(ZONE_NAMES, self._zone_scores))
+        self.telemetry = get_telemetry()
+        # One record per frame; the console gets at most one line per second
+        self._decision_event = self.telemetry.register(
+            'nav.decision', "[DepthNav] Scores: C={s2:.0%} L={s1:.0%} R={s3:.0%} -> {action} ({latency_ms:.1f}ms)",
+            echo_interval=1.0)
         print(f"[DepthNav] Initialized (safe: {safe_distance_mm}mm, warning: {self.warning_distance_mm}mm)")
     
     def get_navigation_command(self, rgb_frame, depth_frame):
         """
         Analyze depth map to find safest direction.
         
+        Every decision is written to telemetry (action, zone scores,
+        compute time); nothing is printed from here.
+        
         Args:
             rgb_frame: RGB image (not used but available)
             depth_frame: Depth map in millimeters
@@ -275,132 +468,286 @@ class DepthNavigator:
         Returns:
             dict: Navigation command
         """
+        t0 = time.perf_counter()
+        cmd = self._navigation_command(depth_frame)
+        if self.preallocate:
+            scores = self._zone_scores
+        else:
+            scores = [cmd['scores'][name] for name in ZONE_NAMES]
+        self.telemetry.record(self._decision_event, action=cmd['action'], value=cmd['distance'],
+                              latency_ms=(time.perf_counter() - t0) * 1000, scores=scores,
+                              flags=1 if 'early_exit' in cmd else 0)
+        return cmd
+    
+    def _navigation_command(self, depth_frame):
         h, w = depth_frame.shape
         
-        # SIMPLIFIED ROBUST APPROACH: Analyze horizontal middle strip only
-        # This is where obstacles at robot height appear
-        strip_top = int(h * 0.35)  # Middle strip
-        strip_bottom = int(h * 0.65)
-        depth_strip = depth_frame[strip_top:strip_bottom, :]
-        
-        # Divide into 5 vertical regions
-        regions = {
-            'far_left': depth_strip[:, :w//5],
-            'left': depth_strip[:, w//5:2*w//5],
-            'center': depth_strip[:, 2*w//5:3*w//5],
-            'right': depth_strip[:, 3*w//5:4*w//5],
-            'far_right': depth_strip[:, 4*w//5:]
-        }
+        if self.clearance_maps is not None:
+            self.clearance_maps.build(depth_frame)
         
-        # Calculate clearance scores for each region
-        scores = {}
-        debug_info = {}
+        if self.ground_plane is not None:
+            # Whole frame (subsampled): the floor model removes floor and overhang
+            # pixels, so low obstacles below the strip are seen too
+            depth_strip = depth_frame[::self.ground_stride, ::self.ground_stride]
+        else:
+            # SIMPLIFIED ROBUST APPROACH: Analyze horizontal middle strip only
+            # This is where obstacles at robot height appear
+            strip_top = int(h * 0.35)  # Middle strip
+            strip_bottom = int(h * 0.65)
+            depth_strip = depth_frame[strip_top:strip_bottom, :]
         
-        for name, region in regions.items():
-            # Filter out invalid depth values (0 or very large)
-            valid_depths = region[(region > 0) & (region < 5000)]
-            
-            if len(valid_depths) > 50:  # Need enough valid pixels
-                # SIMPLE WORKING APPROACH: Use median distance
-                median_dist = np.median(valid_depths)
-                
-                # SIMPLE LINEAR SCORING (like real robots do):
-                # Just normalize distance to 0-1 score
-                # Anything > 400mm is usable, prefer farther
-                
-                MIN_SAFE = 400   # Absolute minimum (real collision risk)
-                MAX_CLEAR = 2000  # Fully clear
-                
-                if median_dist < MIN_SAFE:
-                    # Really blocked
-                    scores[name] = 0.0
-                else:
-                    # Linear score: 400mm=0.3, 800mm=0.6, 1200mm=0.75, 2000mm+=1.0
-                    normalized = (median_dist - MIN_SAFE) / (MAX_CLEAR - MIN_SAFE)
-                    scores[name] = 0.3 + min(normalized, 1.0) * 0.7
-                
-                debug_info[name] = {'median': int(median_dist), 'count': len(valid_depths)}
-            else:
-                scores[name] = 0.0
-                debug_info[name] = {'avg': 0, 'min': 0, 'count': len(valid_depths)}
+        if self.fusion is not None:
+            depth_strip = self.fusion.update(depth_strip)
         
-        # --- SAFETY-FIRST DECISION LOGIC (VFH-inspired) ---
-        # Step 1: SAFETY FILTER - only consider actions above minimum safety threshold
-        # Step 2: Among safe actions, prefer forward with moderate bias
+        if self.polar is not None:
+            return self._polar_command(depth_strip)
+        
+        if self.preallocate:
+            return self._steady_command(depth_strip)
+        
+        if self.coarse_factor:
+            scores, early_exit = self._coarse_to_fine_scores(depth_strip)
+            if early_exit is not None:
+                return early_exit
+        elif self.ground_plane is not None:
+            scores = self._ground_plane_scores(depth_strip)
+        else:
+            # Divide into 5 vertical regions and get per-zone stats in ONE pass
+            # (no per-region masks, copies or np.median sorts)
+            stats = self.zone_stats.compute(depth_strip)
+            zone_scores = clearance_scores(stats[0.5], stats['count'])
+            scores = dict(zip(ZONE_NAMES, zone_scores.tolist()))
         
         center_score = scores.get('center', 0.0)
         left_score = max(scores.get('left', 0), scores.get('far_left', 0))
         right_score = max(scores.get('right', 0), scores.get('far_right', 0))
         
-        # SAFETY THRESHOLD: Minimum clearance required to consider an action safe
-        SAFETY_THRESHOLD = 0.35  # 35% minimum - allows navigation in tight spaces
+        action, template, best_side = self._decide(center_score, left_score, right_score)
+        reasoning = template.format(c=int(center_score*100), l=int(left_score*100),
+                                    r=int(right_score*100), b=int(best_side*100))
+        
+        # Determine speed based on clearance - BE VERY CAUTIOUS
+        current_path_score = center_score if action == 'forward' else max(left_score, right_score)
+        speed, distance = self._speed_for(current_path_score)
+        
+        return {
+            'action': action,
+            'speed': speed,
+            'distance': distance,
+            'reasoning': reasoning,
+            'scores': scores  # Return 5-zone scores for LLaVA
+        }
+    
+    def _steady_command(self, depth_strip):
+        """
+        5-zone command without per-frame allocations (preallocate mode).
+        
+        Same decision as the dict path; fills and returns the reused
+        NavCommand.
+        """
+        medians, counts = self.zone_medians.compute(depth_strip)
+        s = clearance_scores(medians, counts, out=self._zone_scores)
+        
+        # ZONE_NAMES order: far_left, left, center, right, far_right
+        center_score = float(s[2])
+        left_score = float(max(s[1], s[0]))
+        right_score = float(max(s[3], s[4]))
+        
+        action, template, best_side = self._decide(center_score, left_score, right_score)
+        speed, distance = self._speed_for(center_score if action == 'forward' else max(left_score, right_score))
+        
+        return self._command.set(action, speed, distance, template,
+                                 center_score, left_score, right_score, best_side)
+    
+    def _decide(self, center_score, left_score, right_score):
+        """
+        Pick an action from the center / best-left / best-right scores.
+        
+        Returns:
+            tuple: (action, reasoning template, best safe side score)
+        """
+        # --- SAFETY-FIRST DECISION LOGIC (VFH-inspired) ---
+        # Step 1: SAFETY FILTER - only consider actions above minimum safety threshold
+        # Step 2: Among safe actions, prefer forward with moderate bias
+        SAFETY_THRESHOLD = self.SAFETY_THRESHOLD
+        
+        # Safe side scores (0 = not safe)
+        safe_left = left_score if left_score >= SAFETY_THRESHOLD else 0.0
+        safe_right = right_score if right_score >= SAFETY_THRESHOLD else 0.0
         
-        # Filter safe actions
-        safe_actions = {}
         if center_score >= SAFETY_THRESHOLD:
-            safe_actions['forward'] = center_score
-        if left_score >= SAFETY_THRESHOLD:
-            safe_actions['left'] = left_score
-        if right_score >= SAFETY_THRESHOLD:
-            safe_actions['right'] = right_score
-        
-        # Make decision
-        if not safe_actions:
-            # NO SAFE PATHS - must turn to find exit
-            action = random.choice(['left', 'right'])
-            reasoning = f'No safe path (C={int(center_score*100)}% L={int(left_score*100)}% R={int(right_score*100)}%) - exploring'
-            
-        elif 'forward' in safe_actions:
             # Forward is safe - prefer it with moderate bias
-            forward_score = safe_actions['forward']
-            best_side = max(safe_actions.get('left', 0), safe_actions.get('right', 0))
+            best_side = max(safe_left, safe_right)
             
             # Go forward if it's competitive (within 85% of best side)
-            if forward_score >= best_side * 0.85:
-                action = 'forward'
-                reasoning = f'Forward safe & competitive (C={int(forward_score*100)}% ≥ 85% of best={int(best_side*100)}%)'
-            else:
-                # Side is significantly better - take it
-                if safe_actions.get('left', 0) > safe_actions.get('right', 0):
-                    action = 'left'
-                    reasoning = f'Left much clearer (L={int(left_score*100)}% >> C={int(forward_score*100)}%)'
-                else:
-                    action = 'right'
-                    reasoning = f'Right much clearer (R={int(right_score*100)}% >> C={int(forward_score*100)}%)'
-        else:
-            # Forward not safe - choose best side
-            if safe_actions.get('left', 0) > safe_actions.get('right', 0):
-                action = 'left'
-                reasoning = f'Center blocked (C={int(center_score*100)}%), evading left (L={int(left_score*100)}%)'
+            if center_score >= best_side * 0.85:
+                return 'forward', REASON_FORWARD, best_side
+            # Side is significantly better - take it
+            if safe_left > safe_right:
+                return 'left', REASON_LEFT_CLEARER, best_side
+            return 'right', REASON_RIGHT_CLEARER, best_side
+        
+        if not safe_left and not safe_right:
+            # NO SAFE PATHS - must turn to find exit
+            return random.choice(TURN_ACTIONS), REASON_EXPLORE, 0.0
+        
+        # Forward not safe - choose best side
+        if safe_left > safe_right:
+            return 'left', REASON_EVADE_LEFT, 0.0
+        return 'right', REASON_EVADE_RIGHT, 0.0
+    
+    def _ground_plane_scores(self, depth):
+        """
+        Zone scores from obstacle pixels only (ground-plane mode).
+        
+        A zone's distance is the robust nearest distance of its obstacle
+        pixels, or fully clear if it has (almost) none. Zones without
+        enough valid depth at all score 0, like in the strip analysis.
+        """
+        # Strided view -> contiguous copy makes the mask comparisons ~3x faster
+        depth = np.ascontiguousarray(depth)
+        floor, obstacle, overhang = self.ground_plane.classify(depth)
+        valid_cols = np.count_nonzero(floor | obstacle | overhang, axis=0)
+        
+        edges = fifths(depth.shape[1])
+        zone_px = np.diff(edges) * depth.shape[0]
+        valid = np.add.reduceat(valid_cols, edges[:-1])
+        distance = np.full(len(ZONE_NAMES), float(MAX_VALID_MM))
+        for i in range(len(ZONE_NAMES)):
+            cols = slice(edges[i], edges[i + 1])
+            # Obstacle pixels are usually few, so take them out instead of histogramming
+            near = depth[:, cols][obstacle[:, cols]]
+            if near.size >= zone_px[i] * self.GROUND_MIN_OBSTACLE_FRACTION:
+                distance[i] = np.quantile(near, self.GROUND_OBSTACLE_QUANTILE)
+        
+        zone_scores = clearance_scores(distance, valid,
+                                       min_valid_pixels=int(zone_px.min() * self.GROUND_MIN_VALID_FRACTION))
+        return dict(zip(ZONE_NAMES, zone_scores.tolist()))
+    
+    def _coarse_to_fine_scores(self, depth_strip):
+        """
+        Zone scores from a min-pooled strip, refined only where unclear.
+        
+        Min pooling keeps the nearest depth of each block, so a zone that
+        is clearly safe at coarse level will not look worse at full
+        resolution and is taken as is. That only holds where the blocks
+        are backed by data: despeckling lets one valid pixel fill a block,
+        so each zone's coverage is the count of valid full-resolution
+        pixels, with the same cutoff as the full-resolution path. Zones
+        below it score 0 at coarse level and are re-scored at full
+        resolution like every other unclear zone. If the coarse center is
+        well covered and already crowded with near cells, an evasive
+        command is returned at once.
+        
+        Returns:
+            tuple: (scores dict, early-exit command or None)
+        """
+        f = self.coarse_factor
+        # Despeckle first so one noisy pixel cannot blank a whole block
+        coarse = min_pool(depth_strip, f, despeckle=True)
+        stats = self.coarse_stats.compute(coarse)
+        # Valid full-res pixels per zone, the coverage the coarse median stands for
+        edges = self.coarse_stats.edges
+        block_valid = count_pool((depth_strip >= MIN_VALID_MM) & (depth_strip < MAX_VALID_MM), f)
+        zone_valid = np.add.reduceat(block_valid.sum(axis=0), edges[:-1])
+        coarse_scores = clearance_scores(stats[0.5], zone_valid, min_valid_pixels=self.COARSE_MIN_VALID_PIXELS)
+        
+        # EARLY EXIT: something right in front of the rover
+        center = coarse[:, edges[2]:edges[3]]
+        center_valid = np.count_nonzero(center) - np.count_nonzero(center >= 5000)
+        center_near = np.count_nonzero((center > 0) & (center < self.blocked_distance_mm))
+        if (zone_valid[2] > self.COARSE_MIN_VALID_PIXELS and center_valid
+                and center_near / center_valid >= self.EARLY_EXIT_NEAR_FRACTION):
+            scores = dict(zip(ZONE_NAMES, coarse_scores.tolist()))
+            left = max(scores['left'], scores['far_left'])
+            right = max(scores['right'], scores['far_right'])
+            action = 'left' if left > right else 'right'
+            return scores, {
+                'action': action,
+                'speed': 'slow',
+                'distance': 0.15,
+                'reasoning': f'Obstacle < {self.blocked_distance_mm}mm ahead (coarse), evading {action}',
+                'scores': scores,
+                'early_exit': True
+            }
+        
+        # Refine only the zones the coarse level cannot vouch for
+        full_edges = self.zone_stats.zone_edges_fn(depth_strip.shape[1])
+        scores = {}
+        for i, name in enumerate(ZONE_NAMES):
+            if coarse_scores[i] >= self.SAFETY_THRESHOLD + self.COARSE_MARGIN:
+                scores[name] = float(coarse_scores[i])
             else:
-                action = 'right'
-                reasoning = f'Center blocked (C={int(center_score*100)}%), evading right (R={int(right_score*100)}%)'
+                zone = self.refine_stats.compute(depth_strip[:, full_edges[i]:full_edges[i + 1]])
+                scores[name] = float(clearance_scores(zone[0.5], zone['count'])[0])
+        return scores, None
+    
+    def _polar_command(self, depth_strip):
+        """
+        Navigation command from the N-sector polar histogram.
         
-        # Determine speed based on clearance - BE VERY CAUTIOUS
-        current_path_score = center_score if action == 'forward' else max(left_score, right_score)
+        The heading comes from the best free valley of the sector means.
+        'scores' holds the classic 5-zone values (median + valid-pixel
+        cutoff, same as the default path), so LLaVA arbitration and the
+        emergency stop see the numbers they see without --sectors.
+        """
+        profile = self.polar.compute(depth_strip)
+        heading, path_score = self.polar.pick_heading(profile['sector_scores'])
+        stats = self.zone_stats.compute(depth_strip)
+        scores = dict(zip(ZONE_NAMES, clearance_scores(stats[0.5], stats['count']).tolist()))
+        half_fov = self.polar.hfov_deg / 2
         
-        if current_path_score > 0.8:
-            speed = 'slow'  # Always go slow for safety
-            distance = 0.3
-        elif current_path_score > 0.6:
-            speed = 'slow'
-            distance = 0.2
+        if heading is None:
+            # No gap wide enough - turn to find exit
+            action = random.choice(['left', 'right'])
+            bias = 0.0
+            reasoning = f'No gap >= {self.polar.min_gap_deg:.0f}° in {self.polar.n_sectors} sectors - exploring'
+        elif abs(heading) <= self.FORWARD_CONE_DEG:
+            action = 'forward'
+            bias = heading / half_fov
+            reasoning = f'Gap ahead at {heading:+.1f}° (clearance {int(path_score*100)}%)'
         else:
-            speed = 'slow'
-            distance = 0.15
+            action = 'left' if heading < 0 else 'right'
+            bias = 0.0
+            reasoning = f'Best gap at {heading:+.1f}°, turning {action} (clearance {int(path_score*100)}%)'
         
-        # Debug: show decision reasoning occasionally
-        if random.random() < 0.15:  # 15% of the time
-            print(f"[DepthNav] Scores: C={int(center_score*100)}% L={int(scores.get('left',0)*100)}% R={int(scores.get('right',0)*100)}% -> {action.upper()}")
+        speed, distance = self._speed_for(path_score)
         
         return {
             'action': action,
             'speed': speed,
             'distance': distance,
             'reasoning': reasoning,
-            'scores': scores  # Return 5-zone scores for LLaVA
+            'scores': scores,
+            'heading_deg': heading,
+            'steering_bias': bias,
+            'sector_scores': profile['sector_scores']
         }
     
+    def _speed_for(self, path_score):
+        """Speed and step distance for the chosen path - BE VERY CAUTIOUS."""
+        if path_score > 0.8:
+            return 'slow', 0.3  # Always go slow for safety
+        elif path_score > 0.6:
+            return 'slow', 0.2
+        else:
+            return 'slow', 0.15
+    
+    def score_batch(self, depth_frames):
+        """
+        Zone scores for a stack of depth frames in one call (replay/benchmark).
+        
+        Args:
+            depth_frames: (N, H, W) depth maps in millimeters
+            
+        Returns:
+            np.ndarray: (N, 5) clearance scores, columns in ZONE_NAMES order
+        """
+        h = depth_frames.shape[1]
+        strips = depth_frames[:, int(h * 0.35):int(h * 0.65), :]
+        stats = self.zone_stats.compute_batch(strips)
+        return clearance_scores(stats[0.5], stats['count'])
+    
     # !!! rotate_and_scan FUNCTION REMOVED !!!
     # It conflicted with _capture_thread
     
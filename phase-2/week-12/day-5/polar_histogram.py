@@ -0,0 +1,166 @@
+"""
+Polar histogram (VFH-style) clearance engine
+Splits the camera field of view into N angular sectors and builds a
+clearance profile for all of them with a few column reductions.
+"""
+import numpy as np
+
+from depth_zone_stats import MIN_VALID_MM, MAX_VALID_MM
+
+
+# Oak-D color camera horizontal FOV (depth is aligned to RGB)
+OAKD_HFOV_DEG = 69.0
+
+
+class PolarHistogram:
+    """
+    N-sector clearance profile from a depth strip.
+
+    Each pixel gets the same linear clearance score DepthNavigator uses
+    (0 below 400mm, 0.3 at 400mm up to 1.0 at 2000mm+) through a depth
+    lookup table. Scores and valid counts are summed per column, then
+    np.add.reduceat over a precomputed column-to-sector table gives the
+    mean score of every sector in one call. The classic 5-zone scores
+    (zone medians) are not derived from this; DepthNavigator computes them
+    with ZoneStatsEngine as in the default mode.
+    """
+
+    def __init__(self, n_sectors=32, hfov_deg=OAKD_HFOV_DEG, min_valid_fraction=0.05,
+                 safety_threshold=0.35, min_gap_deg=12.0, smoothing=3):
+        """
+        Args:
+            n_sectors: Number of angular sectors across the FOV (e.g. 32 or 64)
+            hfov_deg: Horizontal field of view of the depth frame
+            min_valid_fraction: Sectors with fewer valid pixels count as blocked
+            safety_threshold: Minimum sector score to be considered free
+            min_gap_deg: Narrowest opening (degrees) the rover fits through
+            smoothing: Moving-average window over sectors (1 = off)
+        """
+        self.n_sectors = n_sectors
+        self.hfov_deg = hfov_deg
+        self.min_valid_fraction = min_valid_fraction
+        self.safety_threshold = safety_threshold
+        self.min_gap_deg = min_gap_deg
+        self.smoothing = smoothing
+        self.sector_width_deg = hfov_deg / n_sectors
+        # Sector center angles, negative = left of center
+        self.sector_angles = (np.arange(n_sectors) + 0.5) * self.sector_width_deg - hfov_deg / 2
+
+        # Depth (mm) -> clearance score lookup, invalid depths score 0
+        d = np.arange(MAX_VALID_MM + 1, dtype=np.float32)
+        lut = 0.3 + np.minimum((d - 400) / (2000 - 400), 1.0) * 0.7
+        lut[d < 400] = 0.0
+        lut[(d < MIN_VALID_MM) | (d >= MAX_VALID_MM)] = 0.0
+        self._score_lut = lut.astype(np.float32)
+
+        self._width = None
+        self.col_sector = None
+        self._sector_starts = None
+
+    def _prepare(self, width):
+        """Precompute the column -> sector table (once per frame width)."""
+        if width == self._width:
+            return
+        # Pinhole model: column angle = atan((u - cx) / fx)
+        fx = (width / 2) / np.tan(np.radians(self.hfov_deg / 2))
+        u = np.arange(width) + 0.5 - width / 2
+        angles = np.degrees(np.arctan(u / fx))
+        col_sector = np.floor((angles + self.hfov_deg / 2) / self.sector_width_deg).astype(np.int64)
+        col_sector = np.clip(col_sector, 0, self.n_sectors - 1)
+
+        starts = np.searchsorted(col_sector, np.arange(self.n_sectors))
+        if np.any(np.diff(np.append(starts, width)) <= 0):
+            raise ValueError(f"{self.n_sectors} sectors is too many for a {width}px wide frame")
+
+        self.col_sector = col_sector
+        self._sector_starts = starts
+        self._width = width
+
+    def compute(self, depth_strip):
+        """
+        Clearance profile for one depth strip.
+
+        Args:
+            depth_strip: (H, W) depth in millimeters
+
+        Returns:
+            dict:
+                'sector_scores': (n_sectors,) mean clearance score per sector
+                'sector_min_mm': (n_sectors,) nearest valid depth per sector (0 = none)
+        """
+        self._prepare(depth_strip.shape[1])
+
+        rows = depth_strip.shape[0]
+        clamped = np.minimum(depth_strip, MAX_VALID_MM).astype(np.uint16, copy=False)
+        score_px = np.take(self._score_lut, clamped)
+        invalid = (clamped < MIN_VALID_MM) | (clamped == MAX_VALID_MM)
+
+        col_score = score_px.sum(axis=0, dtype=np.float64)
+        col_valid = rows - np.count_nonzero(invalid, axis=0)
+        # uint16 wrap-around sends 0 (no data) to 65535 so it never wins the min
+        col_min = (clamped - np.uint16(1)).min(axis=0).astype(np.int64) + 1
+
+        sector_scores = self._mean_scores(col_score, col_valid, self._sector_starts, rows)
+
+        sector_min = np.minimum.reduceat(col_min, self._sector_starts)
+        sector_min[sector_min >= MAX_VALID_MM] = 0
+
+        return {
+            'sector_scores': sector_scores,
+            'sector_min_mm': sector_min
+        }
+
+    def _mean_scores(self, col_score, col_valid, starts, rows):
+        """Mean score per column group; too few valid pixels -> blocked (0)."""
+        score_sum = np.add.reduceat(col_score, starts)
+        valid_sum = np.add.reduceat(col_valid, starts)
+        n_px = np.diff(np.append(starts, len(col_score))) * rows
+        mean = score_sum / np.maximum(valid_sum, 1)
+        return np.where(valid_sum >= n_px * self.min_valid_fraction, mean, 0.0)
+
+    def pick_heading(self, sector_scores):
+        """
+        Choose a heading from the sector profile (VFH valley selection).
+
+        Free sectors are grouped into valleys; valleys narrower than
+        min_gap_deg are ignored. The heading is the point of a valley
+        closest to straight ahead, kept half a gap away from its edges.
+
+        Args:
+            sector_scores: (n_sectors,) clearance scores
+
+        Returns:
+            tuple: (heading_deg, valley_score) or (None, 0.0) if no opening
+        """
+        scores = sector_scores
+        if self.smoothing > 1:
+            kernel = np.ones(self.smoothing) / self.smoothing
+            # Pad with 0 so the FOV edges look blocked rather than free
+            scores = np.convolve(np.pad(scores, self.smoothing // 2), kernel, mode='valid')
+
+        free = scores >= self.safety_threshold
+        if not free.any():
+            return None, 0.0
+
+        # Valley boundaries: indices where free switches on / off
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], free.astype(np.int8), [0]))))
+        begins, ends = edges[0::2], edges[1::2]
+
+        min_sectors = max(1, int(np.ceil(self.min_gap_deg / self.sector_width_deg)))
+        half_gap = self.min_gap_deg / 2
+
+        best = None
+        for b, e in zip(begins, ends):
+            if e - b < min_sectors:
+                continue
+            left_deg = b * self.sector_width_deg - self.hfov_deg / 2 + half_gap
+            right_deg = e * self.sector_width_deg - self.hfov_deg / 2 - half_gap
+            heading = float(np.clip(0.0, left_deg, right_deg))
+            valley_score = float(scores[b:e].mean())
+            key = (abs(heading), -valley_score)
+            if best is None or key < best[0]:
+                best = (key, heading, valley_score)
+
+        if best is None:
+            return None, 0.0
+        return best[1], best[2]
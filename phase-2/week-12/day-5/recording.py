@@ -0,0 +1,392 @@
+"""
+Record-and-replay for the Oak-D
+Recorder writes synchronized RGB, depth and person detections into a
+directory of fixed-size raw chunks plus a per-frame timestamp index;
+every chunk can be opened with np.memmap, so nothing is decoded on
+replay. ReplayCamera serves a recording through the OakDDepthCamera
+interface (start / capture_frames / capture_into / skip_frame /
+detect_person / close), at recorded speed or as fast as possible.
+
+Layout of a recording directory:
+    meta.json        shapes, dtypes, chunk size, camera settings
+    index.bin        INDEX_DTYPE per frame (timestamp, chunk, row, detections)
+    detections.bin   DETECTION_DTYPE per person detection
+    00000.rgb        (n, H, W, 3) uint8 BGR, n <= chunk_frames
+    00000.depth      (n, H, W) uint16 depth in mm
+    ...
+index.bin is appended per frame, so a recording cut short by a crash
+still replays up to its last complete frame.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from lazy_frame import LazyFrame
+
+
+FORMAT_VERSION = 1
+INDEX_DTYPE = np.dtype([
+    ('t', '<f8'), ('chunk', '<u4'), ('row', '<u4'), ('det_start', '<u4'), ('det_count', '<u4')
+])
+DETECTION_DTYPE = np.dtype([
+    ('frame', '<u4'), ('confidence', '<f4'), ('bbox', '<f4', (4,)), ('depth_mm', '<f4')
+])
+STREAMS = {'rgb': np.uint8, 'depth': np.uint16}
+
+
+class Recorder:
+    """
+    Append-only writer for one recording.
+
+    Usage:
+        with Recorder('runs/hallway', camera_info={'median_filter': '5x5'}) as rec:
+            rec.write(rgb, depth, timestamp, camera.detect_person())
+    """
+
+    def __init__(self, path, chunk_frames=300, camera_info=None):
+        """
+        Args:
+            path: Recording directory (created; must not hold a recording yet)
+            chunk_frames: Frames per chunk file (300 = 10s at 30 FPS)
+            camera_info: Free-form settings stored in meta.json
+        """
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            raise FileExistsError(f"{path} already holds a recording")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.camera_info = camera_info or {}
+        self.shapes = None
+        self.n_frames = 0
+        self.n_detections = 0
+        self._chunk = -1
+        self._chunk_rows = 0
+        self._files = {}
+        self._index = open(os.path.join(path, 'index.bin'), 'ab')
+        self._detections = open(os.path.join(path, 'detections.bin'), 'ab')
+
+    def write(self, rgb, depth, timestamp=None, detections=()):
+        """
+        Append one frame.
+
+        Args:
+            rgb: (H, W, 3) uint8 BGR frame
+            depth: (H, W) uint16 depth in mm
+            timestamp: Seconds (device timestamp if known, else time.monotonic())
+            detections: detect_person() result for this frame
+        """
+        if self.shapes is None:
+            self.shapes = {'rgb': rgb.shape, 'depth': depth.shape}
+            self._write_meta()
+        elif rgb.shape != self.shapes['rgb'] or depth.shape != self.shapes['depth']:
+            raise ValueError(f"Frame shape changed mid-recording: rgb {rgb.shape}, depth {depth.shape}, "
+                             f"expected {self.shapes}")
+        if self._chunk < 0 or self._chunk_rows == self.chunk_frames:
+            self._next_chunk()
+
+        np.ascontiguousarray(rgb, dtype=np.uint8).tofile(self._files['rgb'])
+        np.ascontiguousarray(depth, dtype=np.uint16).tofile(self._files['depth'])
+
+        if detections:
+            dets = np.zeros(len(detections), dtype=DETECTION_DTYPE)
+            for i, det in enumerate(detections):
+                depth_mm = det.get('depth')
+                dets[i] = (self.n_frames, det['confidence'], det['bbox'],
+                           np.nan if depth_mm is None else depth_mm)
+            dets.tofile(self._detections)
+
+        entry = np.array([(time.monotonic() if timestamp is None else timestamp, self._chunk,
+                           self._chunk_rows, self.n_detections, len(detections))], dtype=INDEX_DTYPE)
+        entry.tofile(self._index)
+        self.n_detections += len(detections)
+        self._chunk_rows += 1
+        self.n_frames += 1
+
+    def _next_chunk(self):
+        self._close_chunk()
+        self._chunk += 1
+        self._chunk_rows = 0
+        self._files = {name: open(self._chunk_path(self.path, self._chunk, name), 'wb')
+                       for name in STREAMS}
+
+    def _close_chunk(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        # Index last: a frame only counts once its pixels are on disk
+        self._detections.flush()
+        self._index.flush()
+
+    @staticmethod
+    def _chunk_path(path, chunk, stream):
+        return os.path.join(path, f"{chunk:05d}.{stream}")
+
+    def _write_meta(self):
+        meta = {
+            'version': FORMAT_VERSION,
+            'chunk_frames': self.chunk_frames,
+            'shapes': {name: list(shape) for name, shape in self.shapes.items()},
+            'dtypes': {name: np.dtype(dtype).str for name, dtype in STREAMS.items()},
+            'camera': self.camera_info
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def close(self):
+        self._close_chunk()
+        self._index.close()
+        self._detections.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """
+    Read-only, memory-mapped view of a recording.
+
+    frame(i) returns views straight into the chunk files, so opening an
+    hour of footage costs nothing until pixels are touched.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {self.meta.get('version')}")
+        self.path = path
+        self.shapes = {name: tuple(shape) for name, shape in self.meta['shapes'].items()}
+        self.index = self._load(os.path.join(path, 'index.bin'), INDEX_DTYPE)
+        self.detections = self._load(os.path.join(path, 'detections.bin'), DETECTION_DTYPE)
+        self._chunks = {}
+        if len(self.index):
+            # After a crash the index can be ahead of the pixels of the last chunk
+            last = int(self.index['chunk'][-1])
+            rows = min(self._chunk_rows(last, stream) for stream in STREAMS)
+            self.index = self.index[(self.index['chunk'] != last) | (self.index['row'] < rows)]
+
+    @staticmethod
+    def _load(path, dtype):
+        # Whole records only (the last one may be half-written)
+        n = os.path.getsize(path) // dtype.itemsize
+        return np.fromfile(path, dtype=dtype, count=n)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def timestamps(self):
+        return self.index['t']
+
+    @property
+    def duration_s(self):
+        return float(self.index['t'][-1] - self.index['t'][0]) if len(self) > 1 else 0.0
+
+    def _chunk_rows(self, chunk, stream):
+        frame_bytes = int(np.prod(self.shapes[stream])) * np.dtype(STREAMS[stream]).itemsize
+        return os.path.getsize(Recorder._chunk_path(self.path, chunk, stream)) // frame_bytes
+
+    def _chunk(self, chunk, stream):
+        key = (chunk, stream)
+        mm = self._chunks.get(key)
+        if mm is None:
+            rows = self._chunk_rows(chunk, stream)
+            mm = np.memmap(Recorder._chunk_path(self.path, chunk, stream), dtype=STREAMS[stream],
+                           mode='r', shape=(rows,) + self.shapes[stream])
+            self._chunks[key] = mm
+        return mm
+
+    def frame(self, i):
+        """(rgb, depth) read-only views of frame i."""
+        entry = self.index[i]
+        chunk, row = int(entry['chunk']), int(entry['row'])
+        return self._chunk(chunk, 'rgb')[row], self._chunk(chunk, 'depth')[row]
+
+    def frame_detections(self, i):
+        """Frame i's detections in the detect_person() format."""
+        entry = self.index[i]
+        start = int(entry['det_start'])
+        dets = []
+        for det in self.detections[start:start + int(entry['det_count'])]:
+            x, y, w, h = (float(v) for v in det['bbox'])
+            depth_mm = float(det['depth_mm'])
+            dets.append({
+                'bbox': (x, y, w, h),
+                'confidence': float(det['confidence']),
+                'center': (x + w / 2, y + h / 2),
+                'depth': None if np.isnan(depth_mm) else depth_mm
+            })
+        return dets
+
+    def depth_frames(self, start=0, stop=None):
+        """List of depth views (e.g. benchmark inputs)."""
+        return [self.frame(i)[1] for i in range(start, len(self) if stop is None else stop)]
+
+    def rgb_frames(self, start=0, stop=None):
+        return [self.frame(i)[0] for i in range(start, len(self) if stop is None else stop)]
+
+
+class ReplayCamera:
+    """
+    Drop-in stand-in for OakDDepthCamera that plays a recording.
+
+    With realtime=True, capture_frames() waits until the frame's recorded
+    time has come (relative to start()); otherwise frames are returned
+    as fast as they are asked for. Frames are read-only memmap views.
+    """
+
+    def __init__(self, path, realtime=True, loop=False, speed=1.0):
+        """
+        Args:
+            path: Recording directory
+            realtime: Pace frames by their recorded timestamps
+            loop: Start over at the end instead of raising EOFError
+            speed: Playback speed factor for realtime mode
+        """
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.speed = speed
+        self.recording = None
+        self.position = 0   # next frame to return
+        self.current = -1   # frame returned last (detect_person() answers for it)
+        self.enable_person_detection = False
+        # Host time (time.monotonic()) the frame returned last was "captured" at
+        self.last_timestamp = None
+        self._t0_wall = None
+        self._t0_rec = None
+
+    def start(self):
+        if self.recording is None:
+            self.recording = Recording(self.path)
+            if len(self.recording) == 0:
+                raise ValueError(f"{self.path} holds no frames")
+            self.enable_person_detection = bool(self.recording.meta['camera'].get('person_detection'))
+            print(f"[Replay] {self.path}: {len(self.recording)} frames, "
+                  f"{self.recording.duration_s:.1f}s ({'realtime' if self.realtime else 'max speed'})")
+        self.position = 0
+        self._t0_wall = None
+
+    def _next_index(self):
+        if self.recording is None:
+            raise RuntimeError("Camera not started")
+        if self.position >= len(self.recording):
+            if not self.loop:
+                raise EOFError("Recording finished")
+            self.position = 0
+            self._t0_wall = None
+        i = self.position
+        self.position += 1
+
+        if self.realtime:
+            t_rec = float(self.recording.timestamps[i])
+            if self._t0_wall is None:
+                self._t0_wall, self._t0_rec = time.monotonic(), t_rec
+            due = self._t0_wall + (t_rec - self._t0_rec) / self.speed
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_timestamp = due
+        else:
+            self.last_timestamp = time.monotonic()
+        self.current = i
+        return i
+
+    def capture(self):
+        """
+        Next recorded frame as a LazyFrame over the read-only views (see
+        OakDDepthCamera.capture).
+
+        Raises:
+            EOFError: At the end of a non-looping recording
+        """
+        i = self._next_index()
+        rgb, depth = self.recording.frame(i)
+        return LazyFrame(depth=depth, bgr=rgb, timestamp=self.last_timestamp, seq=i)
+
+    def capture_frames(self):
+        """
+        Next recorded (rgb_frame, depth_frame), as read-only views.
+
+        Raises:
+            EOFError: At the end of a non-looping recording
+        """
+        i = self._next_index()
+        return self.recording.frame(i)
+
+    def capture_into(self, ring):
+        """Copy the next recorded frame into a FrameRing slot (see OakDDepthCamera.capture_into)."""
+        i = self._next_index()
+        rgb, depth = self.recording.frame(i)
+        specs = {'rgb': (rgb.shape, np.uint8), 'depth': (depth.shape, np.uint16)}
+        # Replayed capture time, not the recorded one: keeps ring timestamps
+        # on the host clock like the live camera's (latency tracing)
+        with ring.write(specs, timestamp=self.last_timestamp) as slot:
+            if slot is None:
+                return None
+            np.copyto(slot['rgb'], rgb)
+            np.copyto(slot['depth'], depth)
+        return ring.seq
+
+    def skip_frame(self):
+        """Advance past the next frame (keeps realtime pacing)."""
+        self._next_index()
+
+    def detect_person(self, debug=False):
+        """Recorded person detections of the frame returned last."""
+        if not self.enable_person_detection or self.current < 0:
+            return []
+        detections = self.recording.frame_detections(self.current)
+        if debug:
+            print(f"[Replay Debug] Frame {self.current}: {len(detections)} person detection(s)")
+        return detections
+
+    def get_person_direction(self, person_bbox):
+        """Same thirds rule as OakDDepthCamera.get_person_direction."""
+        x, y, w, h = person_bbox
+        center_x = x + w / 2
+        if center_x < 0.33:
+            return 'left'
+        elif center_x > 0.67:
+            return 'right'
+        return 'center'
+
+    def close(self):
+        self.recording = None
+        print("[Replay] Camera closed")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Record Oak-D RGB, depth and person detections')
+    parser.add_argument('output', help='Recording directory to create')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to record')
+    parser.add_argument('--chunk-frames', type=int, default=300)
+    parser.add_argument('--person-detection', action='store_true')
+    parser.add_argument('--median-filter', choices=['off', '3x3', '5x5', '7x7'], default=None)
+    parser.add_argument('--sync-frames', action='store_true',
+                        help='Record timestamp-matched RGB/depth pairs only')
+    args = parser.parse_args()
+
+    from oakd_depth_navigator import OakDDepthCamera
+
+    camera = OakDDepthCamera(enable_person_detection=args.person_detection,
+                             median_filter=args.median_filter, sync_frames=args.sync_frames)
+    camera.start()
+    info = {'resolution': list(camera.resolution), 'median_filter': args.median_filter,
+            'person_detection': camera.enable_person_detection, 'sync_frames': args.sync_frames}
+    try:
+        with Recorder(args.output, args.chunk_frames, info) as recorder:
+            end = time.monotonic() + args.duration
+            while time.monotonic() < end:
+                rgb, depth = camera.capture_frames()
+                recorder.write(rgb, depth, camera.last_timestamp, camera.detect_person())
+            print(f"[Record] {recorder.n_frames} frames, {recorder.n_detections} detections -> {args.output}")
+    finally:
+        camera.close()
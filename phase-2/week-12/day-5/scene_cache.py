@@ -0,0 +1,164 @@
+"""
+Perceptual-hash cache for VLM scene queries
+A parked or slowly moving rover sends nearly the same frame to LLaVA
+every interval, and each query costs seconds of CLIP + generation. The
+cache keys frames by a 64-bit difference hash of a downscaled grayscale
+thumbnail: frames within a few bits (Hamming distance) count as the same
+scene. Per scene it keeps the CLIP embedding (reused for any prompt) and
+the parsed answer per prompt, with a TTL so guidance cannot go stale and
+LRU eviction to bound memory.
+"""
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from lazy_frame import shrink
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash: hash_size x hash_size bits, each "is this pixel
+    brighter than its right neighbour" on a (hash_size + 1) x hash_size
+    grayscale thumbnail. Robust to noise, exposure drift and JPEG
+    artifacts; changes when objects move.
+
+    Args:
+        image: LazyFrame or (H, W[, 3]) uint8 array (RGB or BGR)
+
+    Returns:
+        int: hash_size ** 2 bit hash
+    """
+    size = (hash_size + 1, hash_size)
+    if hasattr(image, 'gray'):
+        gray = image.gray(size)
+    else:
+        gray = shrink(image, size)
+        if gray.ndim == 3:
+            gray = gray.mean(axis=2)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class _Scene:
+    __slots__ = ('phash', 'created', 'embedding', 'responses')
+
+    def __init__(self, phash, created):
+        self.phash = phash
+        self.created = created
+        self.embedding = None
+        self.responses = {}  # prompt -> parsed answer
+
+
+class SceneCache:
+    """
+    LRU of recently seen scenes with their CLIP embedding and answers.
+
+    Usage:
+        cache = SceneCache()
+        phash = cache.hash(frame)
+        guidance = cache.response(phash, prompt)
+        if guidance is None:
+            guidance = ask_llava(frame, prompt)
+            cache.put_response(phash, prompt, guidance)
+        print(cache.stats())
+
+    Not thread-safe: meant for the one thread that talks to the model.
+    """
+
+    def __init__(self, max_entries=32, max_distance=5, ttl_s=30.0, hash_size=8):
+        """
+        Args:
+            max_entries: Scenes kept before the least recently used is evicted
+            max_distance: Largest Hamming distance (of hash_size ** 2 bits)
+                          between two frames of the same scene
+            ttl_s: Seconds a scene's embedding and answers stay valid
+            hash_size: Hash grid side (8 = 64-bit hash)
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl_s = ttl_s
+        self.hash_size = hash_size
+        self._scenes = OrderedDict()  # phash -> _Scene, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def hash(self, image):
+        """Perceptual hash of a frame (see dhash)."""
+        return dhash(image, self.hash_size)
+
+    def _find(self, phash, now):
+        best, best_distance = None, self.max_distance + 1
+        for scene in list(self._scenes.values()):
+            if now - scene.created > self.ttl_s:
+                self._drop(scene)
+                self.expired += 1
+                continue
+            distance = hamming(phash, scene.phash)
+            if distance < best_distance:
+                best, best_distance = scene, distance
+        if best is not None:
+            self._scenes.move_to_end(best.phash)
+        return best
+
+    def _scene(self, phash, now):
+        # The matching scene, or a new one (evicting the least recently used)
+        scene = self._find(phash, now)
+        if scene is None:
+            scene = self._scenes[phash] = _Scene(phash, now)
+            while len(self._scenes) > self.max_entries:
+                self._drop(next(iter(self._scenes.values())))
+                self.evicted += 1
+        return scene
+
+    def _drop(self, scene):
+        # Only the cache's reference goes: an embedding encode() already handed
+        # out stays valid, and is freed (ImageEmbedding.__del__) with the last one
+        del self._scenes[scene.phash]
+        scene.embedding = None
+
+    def response(self, phash, prompt):
+        """Cached answer to prompt for this scene, or None (counted as hit / miss)."""
+        scene = self._find(phash, time.monotonic())
+        answer = scene.responses.get(prompt) if scene is not None else None
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def put_response(self, phash, prompt, answer):
+        self._scene(phash, time.monotonic()).responses[prompt] = answer
+
+    def embedding(self, phash):
+        """Cached CLIP embedding of this scene, or None."""
+        scene = self._find(phash, time.monotonic())
+        embedding = scene.embedding if scene is not None else None
+        if embedding is None:
+            self.embedding_misses += 1
+        else:
+            self.embedding_hits += 1
+        return embedding
+
+    def put_embedding(self, phash, embedding):
+        """Keep an embedding (released on eviction / expiry, never freed under a caller)."""
+        self._scene(phash, time.monotonic()).embedding = embedding
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'scenes': len(self._scenes), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'embedding_hits': self.embedding_hits, 'embedding_misses': self.embedding_misses,
+                'expired': self.expired, 'evicted': self.evicted}
+
+    def clear(self):
+        for scene in list(self._scenes.values()):
+            self._drop(scene)
@@ -0,0 +1,147 @@
+"""
+Scene-change-triggered VLM scheduling
+Asking LLaVA every fixed N seconds wastes the GPU while the rover sits in
+front of the same wall and misses the moment it turns into a new room.
+SceneChangeTrigger keeps a cheap change score instead: how far a small
+grayscale thumbnail and a small depth thumbnail have drifted from the
+frame LLaVA last analysed, plus how often the depth navigator switched
+action since then. LLaVA runs when the score crosses a threshold, never
+more often than min_interval and at least every max_interval.
+"""
+import threading
+import time
+
+import numpy as np
+
+from lazy_frame import shrink
+
+
+class SceneChangeTrigger:
+    """
+    Decides when the newest frame is worth a LLaVA query.
+
+    Usage (LLaVA thread):
+        trigger = SceneChangeTrigger(min_interval=2.0, max_interval=15.0)
+        while running:
+            with subscriber.read(timeout=0) as frame:
+                if frame is not None and trigger.update(LazyFrame.from_ring(frame)):
+                    image = llava.encode(...)
+            ...
+            time.sleep(trigger.poll_interval)
+
+    and in the navigation thread, per command: trigger.note_action(action)
+
+    The score is measured against the last triggered frame, not the
+    previous one, so a slow turn adds up until it counts as a new scene.
+    """
+
+    def __init__(self, threshold=0.25, min_interval=2.0, max_interval=15.0, size=(32, 24),
+                 depth_change=0.15, action_weight=0.15, poll_interval=0.2):
+        """
+        Args:
+            threshold: Change score that triggers a query (0 = same scene,
+                       ~1 = everything changed)
+            min_interval: Seconds between queries at least, however busy the scene
+            max_interval: Seconds between queries at most, however static the scene
+            size: (width, height) of the thumbnails compared
+            depth_change: Relative depth change that counts a thumbnail cell as changed
+            action_weight: Score added per navigator action change (e.g. forward -> left)
+            poll_interval: Suggested sleep between update() calls
+        """
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.size = tuple(size)
+        self.depth_change = depth_change
+        self.action_weight = action_weight
+        self.poll_interval = poll_interval
+
+        self._gray = None    # thumbnails of the last triggered frame
+        self._depth = None
+        self._last_trigger = None
+        self._last_action = None
+        self._action_changes = 0
+        self._lock = threading.Lock()  # note_action comes from the navigation thread
+
+        self.score = 0.0     # of the last evaluated frame
+        self.last_reason = None
+        self.last_score = 0.0
+        self.evaluated = 0   # frames scored (not those within min_interval)
+        self.triggers = {'first': 0, 'change': 0, 'timeout': 0}
+
+    def note_action(self, action):
+        """Navigator command of the current frame; a change of action adds to the score."""
+        with self._lock:
+            if self._last_action is not None and action != self._last_action:
+                self._action_changes += 1
+            self._last_action = action
+
+    def _depth_thumbnail(self, depth):
+        # Mean of the valid (non-zero) pixels per cell; 0 where a cell has none
+        valid = shrink((depth > 0).astype(np.float32), self.size)
+        total = shrink(depth.astype(np.float32), self.size)
+        return np.divide(total, valid, out=np.zeros_like(total), where=valid > 0.5)
+
+    def measure(self, frame):
+        """
+        Change score of a LazyFrame against the last triggered frame.
+
+        Returns:
+            (score, gray, depth): score and the thumbnails it was computed from
+        """
+        gray = frame.gray(self.size) if frame.has_rgb else None
+        depth = self._depth_thumbnail(frame.depth) if frame.depth is not None else None
+        parts = []
+        if gray is not None and self._gray is not None:
+            # Mean absolute brightness change, scaled so ~25 gray levels = 1
+            parts.append(min(float(np.mean(np.abs(gray - self._gray))) / 25.0, 1.0))
+        if depth is not None and self._depth is not None:
+            # Share of cells whose distance changed by more than depth_change,
+            # or that became (in)valid
+            both = (depth > 0) & (self._depth > 0)
+            changed = np.abs(depth - self._depth) > self.depth_change * np.maximum(self._depth, 1.0)
+            parts.append(float(np.mean((changed & both) | ((depth > 0) != (self._depth > 0)))))
+        with self._lock:
+            actions = self._action_changes * self.action_weight
+        score = (max(parts) if parts else 0.0) + actions
+        return score, gray, depth
+
+    def update(self, frame, now=None):
+        """
+        Score a new frame and decide whether to query LLaVA on it.
+
+        When it returns True, the frame becomes the new reference.
+
+        Args:
+            frame: LazyFrame (RGB and/or depth)
+            now: time.monotonic() override
+
+        Returns:
+            bool: Query now
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = None if self._last_trigger is None else now - self._last_trigger
+        if elapsed is not None and elapsed < self.min_interval:
+            return False
+        self.evaluated += 1
+        self.score, gray, depth = self.measure(frame)
+        if elapsed is None:
+            reason = 'first'
+        elif self.score >= self.threshold:
+            reason = 'change'
+        elif elapsed >= self.max_interval:
+            reason = 'timeout'
+        else:
+            return False
+        self._gray, self._depth = gray, depth
+        self._last_trigger = now
+        with self._lock:
+            self._action_changes = 0
+        self.triggers[reason] += 1
+        self.last_reason = reason
+        self.last_score = self.score
+        return True
+
+    def stats(self):
+        return {'evaluated': self.evaluated, 'triggers': sum(self.triggers.values()),
+                **self.triggers, 'score': self.score}
@@ -0,0 +1,341 @@
+"""
+Structured telemetry ring buffer
+Hot loops write fixed-size binary records (struct.pack_into a
+preallocated bytearray) instead of printing. A background flusher turns
+selected events into console lines - rate limited per event, using the
+record timestamps so the same stream always prints the same lines - and
+can append the raw records to a file. dump() writes the full history on
+demand.
+"""
+import json
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+# One record = 48 bytes: time, sequence, event id, action code, flags,
+# label id, value, count, latency, 5 zone scores
+RECORD = struct.Struct('<dIHBBiffi5f')
+RECORD_DTYPE = np.dtype([
+    ('t', '<f8'), ('seq', '<u4'), ('event', '<u2'), ('action', 'u1'), ('flags', 'u1'),
+    ('label', '<i4'), ('value', '<f4'), ('latency_ms', '<f4'), ('count', '<i4'),
+    ('scores', '<f4', (5,))
+])
+assert RECORD.size == RECORD_DTYPE.itemsize
+
+ACTIONS = ('', 'forward', 'left', 'right', 'backward', 'stop')
+ACTION_CODES = {name: i for i, name in enumerate(ACTIONS)}
+NO_SCORES = (0.0,) * 5
+
+
+class Telemetry:
+    """
+    In-memory ring of binary records plus per-event counters.
+
+    Usage:
+        tm = get_telemetry()
+        DECISION = tm.register('nav.decision', '[DepthNav] {action} C={s2:.0%}', echo_interval=1.0)
+        tm.record(DECISION, action='forward', scores=scores, latency_ms=dt)
+
+    record() only packs numbers into the ring under a lock: no string
+    formatting, no I/O. Event templates are formatted by the flusher
+    thread (or dump()) with the fields action, value, count, latency_ms,
+    label, note and s0..s4 (zone scores).
+    """
+
+    def __init__(self, capacity=16384):
+        """
+        Args:
+            capacity: Records kept in memory (48 bytes each)
+        """
+        self.capacity = capacity
+        self._ring = bytearray(RECORD.size * capacity)
+        # Optional free text per slot (already-built strings only)
+        self._notes = [None] * capacity
+        self._seq = 0
+        self._lock = threading.Lock()
+
+        self._events = []  # (name, template, echo_interval)
+        self._event_ids = {}
+        self.counts = []  # per event id
+        self._labels = ['']
+        self._label_ids = {'': 0}
+
+        self._flusher = None
+        self._stop = threading.Event()
+        self._flushed_seq = 0
+        self._flush_path = None
+        self._flush_file = None
+        self._echo_last_t = {}
+        self._echo_suppressed = {}
+        self.dropped = 0  # records overwritten before the flusher saw them
+        self.out = sys.stdout
+
+    # --- Registration -------------------------------------------------
+
+    def register(self, name, template=None, echo_interval=None):
+        """
+        Declare an event type (idempotent).
+
+        Args:
+            name: Dotted event name, e.g. 'nav.decision'
+            template: Console line for this event (format fields, see class doc)
+            echo_interval: Print at most one line per this many seconds
+                           (0 = every record, None = never echo)
+
+        Returns:
+            int: Event id for record() / increment()
+        """
+        with self._lock:
+            if name in self._event_ids:
+                event = self._event_ids[name]
+                if template is not None:
+                    self._events[event] = (name, template, echo_interval)
+                return event
+            event = len(self._events)
+            self._events.append((name, template, echo_interval))
+            self._event_ids[name] = event
+            self.counts.append(0)
+            return event
+
+    def label(self, text):
+        """
+        Id for a short, repeating string (person name, error type).
+
+        Labels are never freed - do not use them for free text.
+        """
+        label_id = self._label_ids.get(text)
+        if label_id is None:
+            with self._lock:
+                label_id = self._label_ids.setdefault(text, len(self._labels))
+                if label_id == len(self._labels):
+                    self._labels.append(text)
+        return label_id
+
+    # --- Hot path -----------------------------------------------------
+
+    def record(self, event, action=None, value=0.0, count=0, latency_ms=0.0,
+               scores=None, label=None, note=None, flags=0):
+        """
+        Append one record (overwrites the oldest when the ring is full).
+
+        Args:
+            event: Id from register()
+            action: Action name from ACTIONS
+            value: Any float (clearance, depth in m, ...)
+            count: Any int (detections, dropped frames, ...)
+            latency_ms: Timing attached to the event
+            scores: 5 zone scores (sequence or array)
+            label: Short repeating string, stored as a label id
+            note: Already-built string kept in memory only (not in flushed files)
+            flags: Free bit field
+        """
+        label_id = self.label(label) if label else 0
+        with self._lock:
+            seq = self._seq
+            slot = seq % self.capacity
+            RECORD.pack_into(self._ring, slot * RECORD.size, time.monotonic(), seq & 0xFFFFFFFF,
+                             event, ACTION_CODES.get(action, 0) if action else 0, flags, label_id,
+                             value, latency_ms, count, *(NO_SCORES if scores is None else scores))
+            self._notes[slot] = note
+            self._seq = seq + 1
+            self.counts[event] += 1
+
+    def increment(self, event, n=1):
+        """Bump an event counter without writing a record."""
+        with self._lock:
+            self.counts[event] += n
+
+    # --- Reading ------------------------------------------------------
+
+    def records(self, since_seq=0):
+        """
+        Copy of the records still in the ring, oldest first.
+
+        Args:
+            since_seq: Only records with a sequence number >= this
+
+        Returns:
+            tuple: (structured array with RECORD_DTYPE, list of notes)
+        """
+        recs, notes, _ = self._read(since_seq)
+        return recs, notes
+
+    def _read(self, since_seq):
+        with self._lock:
+            end = self._seq
+            start = max(since_seq, end - self.capacity, 0)
+            idx = np.arange(start, end) % self.capacity
+            recs = np.frombuffer(self._ring, dtype=RECORD_DTYPE)[idx]
+            notes = [self._notes[i] for i in idx]
+        return recs, notes, end
+
+    def last(self, event):
+        """Most recent record of an event still in the ring, or None."""
+        recs, notes = self.records()
+        hits = np.flatnonzero(recs['event'] == event)
+        if hits.size == 0:
+            return None
+        return self._as_dict(recs[hits[-1]], notes[hits[-1]])
+
+    def counters(self):
+        """{event name: records + increments so far}"""
+        with self._lock:
+            return {name: self.counts[i] for i, (name, _, _) in enumerate(self._events)}
+
+    def _as_dict(self, rec, note):
+        scores = rec['scores']
+        return {
+            't': float(rec['t']),
+            'seq': int(rec['seq']),
+            'event': self._events[rec['event']][0],
+            'action': ACTIONS[rec['action']] if rec['action'] < len(ACTIONS) else '?',
+            'value': float(rec['value']),
+            'count': int(rec['count']),
+            'latency_ms': float(rec['latency_ms']),
+            'label': self._labels[rec['label']] if rec['label'] < len(self._labels) else '?',
+            'note': note or '',
+            's0': float(scores[0]), 's1': float(scores[1]), 's2': float(scores[2]),
+            's3': float(scores[3]), 's4': float(scores[4])
+        }
+
+    def format_record(self, rec, note=None):
+        """One human-readable line for a record."""
+        fields = self._as_dict(rec, note)
+        template = self._events[rec['event']][1]
+        if template:
+            try:
+                return template.format(**fields)
+            except (KeyError, ValueError, IndexError):
+                pass
+        return (f"{fields['event']} action={fields['action']} value={fields['value']:.3f} "
+                f"count={fields['count']} latency={fields['latency_ms']:.2f}ms {fields['note']}")
+
+    def dump(self, path=None):
+        """
+        Write the whole in-memory history.
+
+        Args:
+            path: '.bin' -> raw records (+ '.json' event/label table),
+                  any other path -> text, None -> self.out
+        """
+        recs, notes = self.records()
+        if path is not None and str(path).endswith('.bin'):
+            recs.tofile(str(path))
+            self._write_tables(str(path))
+            return
+        lines = [f"{rec['t']:.3f} #{rec['seq']} {self.format_record(rec, note)}"
+                 for rec, note in zip(recs, notes)]
+        counters = ', '.join(f"{k}={v}" for k, v in self.counters().items())
+        lines.append(f"[Telemetry] counters: {counters} dropped={self.dropped}")
+        if path is None:
+            print('\n'.join(lines), file=self.out)
+        else:
+            with open(path, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def _write_tables(self, path):
+        with open(path + '.json', 'w') as f:
+            json.dump({'events': [name for name, _, _ in self._events],
+                       'labels': self._labels, 'actions': list(ACTIONS)}, f)
+
+    # --- Background flusher -------------------------------------------
+
+    def start_flusher(self, interval=0.5, path=None):
+        """
+        Start the background thread that echoes events and appends to path.
+
+        Args:
+            interval: Seconds between flushes
+            path: Optional file that receives every record in binary
+                  (read back with load_records())
+        """
+        if self._flusher is not None:
+            return
+        self._flush_path = path
+        if path is not None:
+            self._flush_file = open(path, 'ab')
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(interval,), daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        """Flush what is left and stop the thread."""
+        if self._flusher is None:
+            return
+        self._stop.set()
+        self._flusher.join()
+        self._flusher = None
+        self.flush()
+        if self._flush_file is not None:
+            self._flush_file.close()
+            self._write_tables(self._flush_path)
+            self._flush_file = None
+
+    def _flush_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:  # never let telemetry kill the robot
+                print(f"[Telemetry] Flush error: {e}", file=self.out)
+
+    def flush(self):
+        """Echo and persist records written since the last flush."""
+        recs, notes, end = self._read(self._flushed_seq)
+        self.dropped += end - self._flushed_seq - len(recs)
+        self._flushed_seq = end
+        if len(recs) == 0:
+            return
+
+        if self._flush_file is not None:
+            self._flush_file.write(recs.tobytes())
+            self._flush_file.flush()
+
+        lines = []
+        for rec, note in zip(recs, notes):
+            event = int(rec['event'])
+            _, template, echo_interval = self._events[event]
+            if echo_interval is None:
+                continue
+            last_t = self._echo_last_t.get(event)
+            if last_t is not None and rec['t'] - last_t < echo_interval:
+                self._echo_suppressed[event] = self._echo_suppressed.get(event, 0) + 1
+                continue
+            self._echo_last_t[event] = rec['t']
+            line = self.format_record(rec, note)
+            suppressed = self._echo_suppressed.pop(event, 0)
+            if suppressed:
+                line += f"  (+{suppressed} more)"
+            lines.append(line)
+        if lines:
+            print('\n'.join(lines), file=self.out)
+
+
+def load_records(path):
+    """
+    Read a flushed / dumped '.bin' file.
+
+    Returns:
+        tuple: (structured array with RECORD_DTYPE, table dict with
+                'events', 'labels' and 'actions' name lists)
+    """
+    recs = np.fromfile(path, dtype=RECORD_DTYPE)
+    with open(str(path) + '.json') as f:
+        tables = json.load(f)
+    return recs, tables
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Process-wide Telemetry instance shared by camera, navigator and threads."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Telemetry()
+        return _default
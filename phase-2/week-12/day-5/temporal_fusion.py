@@ -0,0 +1,141 @@
+"""
+Temporal depth fusion
+Keeps the last K depth frames in a preallocated uint16 ring buffer and
+updates per-pixel statistics incrementally, so stereo noise is removed
+on the host instead of with the expensive on-device median filter.
+"""
+import numpy as np
+
+from depth_zone_stats import MIN_VALID_MM, MAX_VALID_MM
+
+
+class TemporalDepthFusion:
+    """
+    Incremental per-pixel fusion over a sliding window of K frames.
+
+    Per pixel it tracks:
+        - valid count in the window (add new frame, subtract evicted one)
+        - window minimum (only re-scanned where the evicted frame held it)
+        - EMA of valid depth (invalid readings hold the previous value)
+
+    The fused frame is the EMA wherever the pixel was valid in at least
+    min_hits of the last K frames, else 0 (no data). All buffers are
+    allocated once per frame shape; update() returns a view of a reused
+    output buffer, so copy it if you need to keep it past the next call.
+    """
+
+    def __init__(self, window=4, ema_alpha=0.5, min_hits=2):
+        """
+        Args:
+            window: Number of frames K kept in the ring buffer
+            ema_alpha: EMA weight of the newest frame (1.0 = no smoothing)
+            min_hits: Valid readings needed within the window to report a pixel
+        """
+        if not 1 <= min_hits <= window:
+            raise ValueError(f"min_hits must be in 1..{window}, got {min_hits}")
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self.min_hits = min_hits
+        self.shape = None
+        self.frames_seen = 0
+
+    def _allocate(self, shape):
+        k = self.window
+        # Ring holds (depth - 1) in uint16: invalid pixels (0) wrap to 65535,
+        # so the window minimum is a plain np.min over the ring
+        self._ring = np.full((k,) + shape, 65535, dtype=np.uint16)
+        self._count = np.zeros(shape, dtype=np.uint8)
+        self._min_m1 = np.full(shape, 65535, dtype=np.uint16)
+        self._ema = np.zeros(shape, dtype=np.float32)
+        self._clean = np.zeros(shape, dtype=np.uint16)
+        self._new_m1 = np.zeros(shape, dtype=np.uint16)
+        self._delta = np.zeros(shape, dtype=np.float32)
+        self._out = np.zeros(shape, dtype=np.uint16)
+        # Boolean scratch masks, so update() allocates nothing per frame
+        self._new_valid = np.zeros(shape, dtype=bool)
+        self._old_valid = np.zeros(shape, dtype=bool)
+        self._evicted = np.zeros(shape, dtype=bool)
+        self._had_data = np.zeros(shape, dtype=bool)
+        self._mask = np.zeros(shape, dtype=bool)
+        self._head = 0
+        self.shape = shape
+        self.frames_seen = 0
+
+    def reset(self):
+        """Forget all history (e.g. after a fast turn or a camera restart)."""
+        if self.shape is not None:
+            self._allocate(self.shape)
+
+    def update(self, depth):
+        """
+        Push one depth frame and return the fused frame.
+
+        Args:
+            depth: (H, W) depth in millimeters (frame or strip)
+
+        Returns:
+            np.ndarray: (H, W) uint16 fused depth, 0 where unreliable
+        """
+        if depth.shape != self.shape:
+            self._allocate(depth.shape)
+
+        clean = self._clean
+        new_valid = self._new_valid
+        mask = self._mask
+        np.copyto(clean, depth, casting='unsafe')
+        np.less(clean, MIN_VALID_MM, out=mask)
+        np.greater_equal(clean, MAX_VALID_MM, out=new_valid)
+        np.logical_or(mask, new_valid, out=mask)
+        np.copyto(clean, 0, where=mask)
+        np.not_equal(clean, 0, out=new_valid)
+        new_m1 = self._new_m1
+        np.subtract(clean, np.uint16(1), out=new_m1)
+
+        slot = self._ring[self._head]
+        full = self.frames_seen >= self.window
+        if full:
+            # Evict the oldest frame from the running stats
+            old_valid = self._old_valid
+            evicted_min = self._evicted
+            np.not_equal(slot, 65535, out=old_valid)
+            np.equal(slot, self._min_m1, out=evicted_min)
+            evicted_min &= old_valid
+            self._count -= old_valid
+        had_data = np.not_equal(self._count, 0, out=self._had_data)
+
+        slot[...] = new_m1
+        self._count += new_valid
+        np.minimum(self._min_m1, new_m1, out=self._min_m1)
+        if full:
+            # Only pixels whose minimum just left the window (and was not
+            # matched or beaten by the new reading) need a re-scan
+            rescan = np.greater(new_m1, self._min_m1, out=mask)
+            rescan &= evicted_min
+            n_rescan = np.count_nonzero(rescan)
+            if n_rescan > rescan.size // 8:
+                np.min(self._ring, axis=0, out=self._min_m1)
+            elif n_rescan:
+                self._min_m1[rescan] = self._ring[:, rescan].min(axis=0)
+
+        # EMA over valid readings, first reading initialises the pixel
+        np.subtract(clean, self._ema, out=self._delta)
+        self._delta *= new_valid
+        self._delta *= self.ema_alpha
+        self._ema += self._delta
+        np.copyto(self._ema, clean, where=np.greater(new_valid, had_data, out=mask))
+
+        self._head = (self._head + 1) % self.window
+        self.frames_seen += 1
+
+        self._out.fill(0)
+        np.copyto(self._out, self._ema, casting='unsafe',
+                  where=np.greater_equal(self._count, self.min_hits, out=mask))
+        return self._out
+
+    def valid_count(self):
+        """Per-pixel number of valid readings in the window (uint8)."""
+        return self._count
+
+    def min_frame(self):
+        """Nearest valid depth per pixel over the window, 0 where none."""
+        return self._min_m1 + np.uint16(1)
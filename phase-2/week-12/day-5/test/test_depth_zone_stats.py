@@ -0,0 +1,103 @@
+# test/test_depth_zone_stats.py
+# Hardware-free checks: zone statistics against plain numpy on synthetic depth
+# Run: python -m pytest test/ (or python test/test_depth_zone_stats.py)
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from depth_zone_stats import (MAX_VALID_MM, MIN_VALID_MM, PreallocatedZoneStats, ZoneStatsEngine,
+                              clearance_scores, fifths)
+
+
+def make_strip(rng, shape=(96, 643)):
+    """Random depth with holes (0) and out-of-range readings mixed in."""
+    depth = rng.integers(200, 6000, shape).astype(np.uint16)
+    depth[rng.random(shape) < 0.2] = 0
+    return depth
+
+
+def reference_stats(depth):
+    """Per-fifth count / min / median of the valid pixels, the slow way."""
+    edges = fifths(depth.shape[1])
+    counts, mins, medians = [], [], []
+    for a, b in zip(edges[:-1], edges[1:]):
+        zone = depth[:, a:b]
+        valid = zone[(zone >= MIN_VALID_MM) & (zone < MAX_VALID_MM)]
+        counts.append(valid.size)
+        mins.append(valid.min() if valid.size else 0)
+        medians.append(np.median(valid) if valid.size else 0.0)
+    return np.array(counts), np.array(mins), np.array(medians)
+
+
+def test_compute_matches_numpy():
+    rng = np.random.default_rng(0)
+    engine = ZoneStatsEngine()
+    # Odd and even pixel counts: np.median averages the two middle values
+    for shape in ((96, 643), (95, 640), (1, 5)):
+        depth = make_strip(rng, shape)
+        stats = engine.compute(depth)
+        counts, mins, medians = reference_stats(depth)
+        assert np.array_equal(stats['count'], counts)
+        assert np.array_equal(stats['min'], mins)
+        assert np.array_equal(stats[0.5], medians)
+
+
+def test_quantiles_match_numpy():
+    rng = np.random.default_rng(1)
+    depth = make_strip(rng)
+    stats = ZoneStatsEngine().compute(depth, quantiles=(0.1, 0.9))
+    edges = fifths(depth.shape[1])
+    for i, (a, b) in enumerate(zip(edges[:-1], edges[1:])):
+        zone = depth[:, a:b]
+        valid = zone[(zone >= MIN_VALID_MM) & (zone < MAX_VALID_MM)]
+        assert np.isclose(stats[0.1][i], np.quantile(valid, 0.1))
+        assert np.isclose(stats[0.9][i], np.quantile(valid, 0.9))
+
+
+def test_empty_zone():
+    depth = make_strip(np.random.default_rng(2))
+    depth[:, :depth.shape[1] // 5] = 0
+    stats = ZoneStatsEngine().compute(depth)
+    assert stats['count'][0] == 0 and stats[0.5][0] == 0 and stats['min'][0] == 0
+
+
+def test_batch_matches_single_frames():
+    rng = np.random.default_rng(3)
+    strips = np.stack([make_strip(rng) for _ in range(4)])
+    engine = ZoneStatsEngine()
+    batch = engine.compute_batch(strips)
+    for i, strip in enumerate(strips):
+        single = engine.compute(strip)
+        for key in ('count', 'min', 0.5):
+            assert np.array_equal(batch[key][i], single[key])
+
+
+def test_preallocated_matches_engine():
+    rng = np.random.default_rng(4)
+    engine, prealloc = ZoneStatsEngine(), PreallocatedZoneStats()
+    for shape in ((96, 643), (95, 640)):
+        depth = make_strip(rng, shape)
+        stats = engine.compute(depth)
+        medians, counts = prealloc.compute(depth)
+        assert np.array_equal(counts, stats['count'])
+        assert np.array_equal(medians, stats[0.5])
+
+
+def test_clearance_scores():
+    medians = np.array([300.0, 400.0, 1200.0, 2000.0, 4000.0])
+    counts = np.array([100, 100, 100, 100, 50])
+    scores = clearance_scores(medians, counts)
+    assert np.allclose(scores, [0.0, 0.3, 0.65, 1.0, 0.0])  # last: too few valid pixels
+    out = np.zeros(5)
+    assert np.allclose(clearance_scores(medians, counts, out=out), scores)
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,161 @@
+# test/test_frame_ring.py
+# Hardware-free checks: subscriber policies, pinning and a writer/reader stress run
+# Run: python -m pytest test/ (or python test/test_frame_ring.py)
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_ring import FrameRing
+
+SPECS = {'depth': ((120, 160), np.uint16)}
+
+
+def publish(ring, value):
+    with ring.write(SPECS, timestamp=value) as bufs:
+        if bufs is not None:
+            bufs['depth'].fill(value)
+    return bufs is not None
+
+
+def test_every_and_latest():
+    ring = FrameRing(slots=4)
+    every = ring.subscribe('nav', policy='every')
+    latest = ring.subscribe('llava', policy='latest')
+    for value in range(3):
+        publish(ring, value)
+
+    for value in range(3):
+        with every.read(timeout=0) as frame:
+            assert frame.seq == value and (frame['depth'] == value).all()
+    with every.read(timeout=0) as frame:
+        assert frame is None  # nothing new
+    with latest.read(timeout=0) as frame:
+        assert frame.seq == 2 and frame.timestamp == 2
+    assert every.dropped == 0 and every.received == 3
+    assert latest.dropped == 2 and latest.received == 1
+
+    # 'every' falls behind further than the ring holds: the gap is counted
+    for value in range(3, 10):
+        publish(ring, value)
+    with every.read(timeout=0) as frame:
+        assert frame.seq == 6  # the 4 slots hold the newest 4 frames
+    assert every.dropped == 3
+
+
+def test_views_are_read_only():
+    ring = FrameRing(slots=2)
+    publish(ring, 1)
+    with ring.read(timeout=0) as frame:
+        assert not frame['depth'].flags.writeable
+
+
+def test_pinned_slot_is_not_overwritten():
+    ring = FrameRing(slots=3)
+    publish(ring, 1)
+    with ring.read(timeout=0) as held:
+        for value in range(2, 10):
+            assert publish(ring, value)
+        assert held.seq == 0 and (held['depth'] == 1).all()
+
+    # Every slot pinned or the newest: the frame is dropped, not written over
+    ring = FrameRing(slots=2)
+    publish(ring, 1)
+    with ring.read(timeout=0):
+        assert publish(ring, 2)
+        with ring.read(timeout=0) as held:
+            assert not ring.can_write()
+            assert not publish(ring, 3)
+            assert (held['depth'] == 2).all()
+    assert ring.dropped == 1
+
+
+def test_failed_write_is_not_published():
+    ring = FrameRing(slots=3)
+    every = ring.subscribe('nav', policy='every')
+    publish(ring, 1)
+    try:
+        with ring.write(SPECS) as bufs:
+            bufs['depth'].fill(99)
+            raise RuntimeError("camera timed out")
+    except RuntimeError:
+        pass
+    assert ring.seq == 0 and ring.published == 1
+    with every.read(timeout=0) as frame:
+        assert frame.seq == 0 and (frame['depth'] == 1).all()
+    with every.read(timeout=0) as frame:
+        assert frame is None
+
+
+def test_close_wakes_readers():
+    ring = FrameRing(slots=2)
+    result = []
+
+    def reader():
+        with ring.read(timeout=5.0) as frame:
+            result.append(frame)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.05)
+    ring.close()
+    thread.join(timeout=1.0)
+    assert result == [None]
+
+
+def test_stress_no_torn_or_reordered_frames():
+    """A fast writer against a lagging 'every' reader and a 'latest' reader."""
+    ring = FrameRing(slots=3)
+    n_frames = 2000
+    specs = {'depth': ((240, 320), np.uint16)}
+    subs = [ring.subscribe('nav', policy='every'), ring.subscribe('llava', policy='latest')]
+    errors = []
+
+    def writer():
+        for _ in range(n_frames):
+            with ring.write(specs) as bufs:
+                if bufs is not None:
+                    # The single writer knows the seq this frame will get
+                    bufs['depth'].fill((ring.seq + 1) % 65536)
+        ring.close()
+
+    def reader(sub, lag_s):
+        last = -1
+        while True:
+            with sub.read(timeout=2.0) as frame:
+                if frame is None:
+                    return
+                depth = frame['depth']
+                expected = frame.seq % 65536
+                if depth[0, 0] != expected or not (depth == expected).all():
+                    errors.append(f"{sub.name}: torn frame {frame.seq}")
+                if frame.seq <= last:
+                    errors.append(f"{sub.name}: {frame.seq} after {last}")
+                last = frame.seq
+                if lag_s and frame.seq % 7 == 0:
+                    time.sleep(lag_s)
+
+    threads = [threading.Thread(target=reader, args=(subs[0], 0.001)),
+               threading.Thread(target=reader, args=(subs[1], 0.0)),
+               threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30.0)
+    assert not errors, errors[:5]
+    assert ring.published + ring.dropped == n_frames
+    for sub in subs:
+        assert sub.received > 0
+        assert sub.received + sub.dropped == sub.last_seq + 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,113 @@
+# test/test_recording.py
+# Hardware-free checks: record / replay round trip on synthetic frames
+# Run: python -m pytest test/ (or python test/test_recording.py)
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_ring import FrameRing
+from recording import INDEX_DTYPE, Recorder, Recording, ReplayCamera
+
+N_FRAMES = 7
+CHUNK_FRAMES = 3  # 3 chunks, the last one partly filled
+
+
+def synthetic_frame(i, shape=(12, 16)):
+    rgb = np.full(shape + (3,), i, dtype=np.uint8)
+    rgb[..., 1] = np.arange(shape[1], dtype=np.uint8)
+    depth = np.full(shape, 1000 + i * 10, dtype=np.uint16)
+    return rgb, depth
+
+
+def synthetic_detections(i):
+    """None on odd frames, one or two people (one without depth) on even ones."""
+    if i % 2:
+        return []
+    dets = [{'bbox': (0.1, 0.2, 0.3, 0.4), 'confidence': 0.9, 'depth': 1500.0 + i}]
+    if i % 4 == 2:
+        dets.append({'bbox': (0.5, 0.5, 0.1, 0.1), 'confidence': 0.6, 'depth': None})
+    return dets
+
+
+def record(path, n_frames=N_FRAMES):
+    with Recorder(path, chunk_frames=CHUNK_FRAMES, camera_info={'person_detection': True}) as rec:
+        for i in range(n_frames):
+            rgb, depth = synthetic_frame(i)
+            rec.write(rgb, depth, timestamp=10.0 + i / 30, detections=synthetic_detections(i))
+    return path
+
+
+def test_round_trip_across_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = Recording(record(os.path.join(tmp, 'run')))
+        assert len(recording) == N_FRAMES
+        assert np.allclose(recording.timestamps, 10.0 + np.arange(N_FRAMES) / 30)
+        for i in range(N_FRAMES):
+            rgb, depth = recording.frame(i)
+            expected_rgb, expected_depth = synthetic_frame(i)
+            assert np.array_equal(rgb, expected_rgb) and np.array_equal(depth, expected_depth)
+            dets = recording.frame_detections(i)
+            expected = synthetic_detections(i)
+            assert len(dets) == len(expected)
+            for det, exp in zip(dets, expected):
+                assert np.allclose(det['bbox'], exp['bbox'])
+                assert np.isclose(det['confidence'], exp['confidence'])
+                assert det['depth'] == exp['depth']
+
+
+def test_cut_short_recording():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = record(os.path.join(tmp, 'run'))
+        # Half an index record after the last complete frame
+        with open(os.path.join(path, 'index.bin'), 'ab') as f:
+            f.write(b'\x01' * (INDEX_DTYPE.itemsize // 2))
+        assert len(Recording(path)) == N_FRAMES
+
+        # Index ahead of the pixels: the last frame's depth never hit the disk
+        last_depth = os.path.join(path, '00002.depth')
+        os.truncate(last_depth, os.path.getsize(last_depth) - synthetic_frame(0)[1].nbytes)
+        recording = Recording(path)
+        assert len(recording) == N_FRAMES - 1
+        assert np.array_equal(recording.frame(N_FRAMES - 2)[1], synthetic_frame(N_FRAMES - 2)[1])
+
+
+def test_replay_into_ring():
+    with tempfile.TemporaryDirectory() as tmp:
+        camera = ReplayCamera(record(os.path.join(tmp, 'run')), realtime=False)
+        camera.start()
+        ring = FrameRing(slots=3)
+        nav = ring.subscribe('nav', policy='every')
+        for i in range(N_FRAMES):
+            assert camera.capture_into(ring) == i
+            with nav.read(timeout=0) as frame:
+                assert np.array_equal(frame['depth'], synthetic_frame(i)[1])
+                assert frame.timestamp == camera.last_timestamp
+            assert len(camera.detect_person()) == len(synthetic_detections(i))
+        try:
+            camera.capture_into(ring)
+            assert False, "expected EOFError at the end of the recording"
+        except EOFError:
+            pass
+        camera.close()
+
+
+def test_replay_loops():
+    with tempfile.TemporaryDirectory() as tmp:
+        camera = ReplayCamera(record(os.path.join(tmp, 'run')), realtime=False, loop=True)
+        camera.start()
+        depths = [camera.capture_frames()[1][0, 0] for _ in range(N_FRAMES + 2)]
+        assert depths[N_FRAMES:] == depths[:2]
+        assert camera.capture().seq == 2
+        camera.close()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
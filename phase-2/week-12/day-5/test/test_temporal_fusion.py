@@ -0,0 +1,91 @@
+# test/test_temporal_fusion.py
+# Hardware-free checks: incremental fusion against a naive sliding window
+# Run: python -m pytest test/ (or python test/test_temporal_fusion.py)
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from depth_zone_stats import MAX_VALID_MM, MIN_VALID_MM
+from temporal_fusion import TemporalDepthFusion
+
+
+def noisy_frames(rng, n, shape=(24, 32)):
+    """Depth around a fixed scene with dropouts and out-of-range speckles."""
+    scene = rng.integers(500, 4000, shape)
+    frames = []
+    for _ in range(n):
+        depth = (scene + rng.integers(-60, 60, shape)).astype(np.uint16)
+        depth[rng.random(shape) < 0.3] = 0
+        depth[rng.random(shape) < 0.05] = 6000
+        frames.append(depth)
+    return frames
+
+
+class NaiveFusion:
+    """The same statistics recomputed from the full window every frame."""
+
+    def __init__(self, window, ema_alpha, min_hits):
+        self.window, self.ema_alpha, self.min_hits = window, ema_alpha, min_hits
+        self.history = []
+        self.ema = None
+
+    def update(self, depth):
+        clean = np.where((depth >= MIN_VALID_MM) & (depth < MAX_VALID_MM), depth, 0).astype(np.uint16)
+        valid = clean != 0
+        if self.ema is None:
+            self.ema = np.zeros(depth.shape, dtype=np.float32)
+        # A pixel with no reading left in the window restarts its EMA
+        kept = self.history[-(self.window - 1):] if self.window > 1 else []
+        had_data = np.any([h != 0 for h in kept], axis=0) if kept else np.zeros(depth.shape, bool)
+        delta = clean.astype(np.float32) - self.ema
+        delta *= valid
+        delta *= self.ema_alpha
+        self.ema += delta
+        restart = valid & ~had_data
+        self.ema[restart] = clean[restart]
+
+        self.history = kept + [clean]
+        stack = np.stack(self.history)
+        self.count = np.count_nonzero(stack, axis=0)
+        self.min = np.where(self.count > 0, np.where(stack > 0, stack, 65535).min(axis=0), 0)
+        return np.where(self.count >= self.min_hits, self.ema, 0).astype(np.uint16)
+
+
+def test_matches_naive_window():
+    rng = np.random.default_rng(0)
+    for window, alpha, min_hits in ((4, 0.5, 2), (3, 1.0, 1), (5, 0.3, 5)):
+        fusion = TemporalDepthFusion(window=window, ema_alpha=alpha, min_hits=min_hits)
+        naive = NaiveFusion(window, alpha, min_hits)
+        for depth in noisy_frames(rng, 20):
+            out = fusion.update(depth)
+            expected = naive.update(depth)
+            assert np.array_equal(fusion.valid_count(), naive.count)
+            assert np.array_equal(fusion.min_frame(), naive.min)
+            assert np.array_equal(out, expected)
+
+
+def test_static_scene_passes_through():
+    depth = np.full((8, 8), 1500, dtype=np.uint16)
+    fusion = TemporalDepthFusion(window=4, min_hits=2)
+    assert not fusion.update(depth).any()  # one reading is not enough yet
+    assert np.array_equal(fusion.update(depth), depth)
+
+
+def test_reset_and_shape_change():
+    fusion = TemporalDepthFusion(window=3, min_hits=1)
+    fusion.update(np.full((4, 4), 1000, dtype=np.uint16))
+    fusion.reset()
+    assert fusion.frames_seen == 0 and not fusion.valid_count().any()
+    out = fusion.update(np.full((2, 6), 2000, dtype=np.uint16))
+    assert out.shape == (2, 6) and (out == 2000).all()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -1,10 +1,12 @@
+import asyncio
 import depthai as dai
 import cv2
 import numpy as np
-import threading
 import time
 import os
 from modules.vision_face import FaceRecognition
+from telemetry import get_telemetry
+from async_camera import AsyncOakCamera
 
 MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "yolov8n_coco_640x352.blob"))
 TARGET_LABELS = ["person"]
@@ -34,9 +36,13 @@ class VisionSystem:
         self.face_recognizer = FaceRecognition()
         self.frame = None
         self.detections = []
-        self.lock = threading.Lock()
         self.last_print = time.time()
 
+        # Recognitions go to the telemetry ring; the flusher prints at most one line per second
+        self.telemetry = get_telemetry()
+        self.ev_recognized = self.telemetry.register(
+            "face.recognized", "🧠 Recognized {label} at {value:.2f} m", echo_interval=1.0)
+
     def create_pipeline(self):
         p = dai.Pipeline()
 
@@ -81,60 +87,69 @@ class VisionSystem:
 
         return p
 
-    def update_detections(self):
-        while True:
-            in_det = self.q_det.tryGet()
-            if in_det:
-                with self.lock:
-                    self.detections = in_det.detections
+    async def update_detections(self, camera):
+        # Wakes up only when the device sends detections (no tryGet busy loop)
+        # Same thread as the frame loop, so a plain reference swap needs no lock
+        async for detections in camera.detections():
+            self.detections = detections
 
     def run(self):
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
         print("✅ Starting combined detection… Press Q to quit.")
-        threading.Thread(target=self.update_detections, daemon=True).start()
+        self.telemetry.start_flusher()
+        loop = asyncio.get_running_loop()
 
         cv2.namedWindow("Vision Detection", cv2.WINDOW_NORMAL)
 
-        while True:
-            in_rgb = self.q_rgb.tryGet()
-            if in_rgb:
-                frame = in_rgb.getCvFrame()
+        camera = AsyncOakCamera(device=self.device, queues={"rgb": self.q_rgb, "detections": self.q_det})
+        async with camera:
+            detection_task = asyncio.create_task(self.update_detections(camera))
+
+            async for frame in camera.frames():
                 frame = cv2.convertScaleAbs(frame, alpha=1.2, beta=20)
 
-                with self.lock:
-                    for det in self.detections:
-                        if det.label >= len(LABEL_MAP):
-                            continue
-                        label = LABEL_MAP[det.label]
-                        if label not in TARGET_LABELS:
-                            continue
-                        x1 = int(det.xmin * frame.shape[1])
-                        y1 = int(det.ymin * frame.shape[0])
-                        x2 = int(det.xmax * frame.shape[1])
-                        y2 = int(det.ymax * frame.shape[0])
-                        depth_m = det.spatialCoordinates.z / 1000.0
-                        conf = det.confidence * 100
-
-                        # Extract ROI for face recognition
-                        person_roi = frame[y1:y2, x1:x2]
-                        matches = self.face_recognizer.recognize_face(person_roi)
-
-                        for name, (left, top, right, bottom) in matches:
-                            cv2.rectangle(person_roi, (left, top), (right, bottom), (255, 0, 0), 2)
-                            cv2.putText(person_roi, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-
-                            if name != "Unknown":
-                                print(f"🧠 Recognized {name} at {depth_m:.2f} m ")
-
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 3)
-                        cv2.putText(frame, f"{label} {conf:.1f}% ({depth_m:.2f}m)", (x1, max(y1 - 10, 20)),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+                # The detection task may swap in a new list while face recognition
+                # awaits; this loop keeps the one it started with
+                for det in self.detections:
+                    if det.label >= len(LABEL_MAP):
+                        continue
+                    label = LABEL_MAP[det.label]
+                    if label not in TARGET_LABELS:
+                        continue
+                    x1 = int(det.xmin * frame.shape[1])
+                    y1 = int(det.ymin * frame.shape[0])
+                    x2 = int(det.xmax * frame.shape[1])
+                    y2 = int(det.ymax * frame.shape[0])
+                    depth_m = det.spatialCoordinates.z / 1000.0
+                    conf = det.confidence * 100
+
+                    # Extract ROI for face recognition
+                    person_roi = frame[y1:y2, x1:x2]
+                    # Off the event loop, so detections keep flowing meanwhile
+                    matches = await loop.run_in_executor(None, self.face_recognizer.recognize_face, person_roi)
+
+                    for name, (left, top, right, bottom) in matches:
+                        cv2.rectangle(person_roi, (left, top), (right, bottom), (255, 0, 0), 2)
+                        cv2.putText(person_roi, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+
+                        if name != "Unknown":
+                            self.telemetry.record(self.ev_recognized, value=depth_m, label=name)
+
+                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 3)
+                    cv2.putText(frame, f"{label} {conf:.1f}% ({depth_m:.2f}m)", (x1, max(y1 - 10, 20)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
 
                 cv2.imshow("Vision Detection", frame)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+            detection_task.cancel()
 
         cv2.destroyAllWindows()
+        self.telemetry.stop_flusher()
         print("🛑 Stopped. ✅ Vision + Face module complete.")
 
 